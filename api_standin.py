@@ -0,0 +1,357 @@
+"""Local stand-in for the api-sports.io fixtures and standings endpoints.
+
+Serves recorded payloads from a directory, or synthetically generated seasons, with rate limit
+headers, injected latency and injected errors. Point the app to it with the API_URL environment
+variable:
+
+    py api_standin.py --port 8765 --latency 0.2 --error-rate 0.1
+    API_URL=http://127.0.0.1:8765/ py main.py
+
+Recorded payloads are read from '<record-dir>/<endpoint>-<season>.json' and contain the full API
+response, e.g. a payload from the API cache in website/data/api_cache/objects.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import urlparse, parse_qs
+
+LEAGUE_ID = 39
+ROUND_PREFIX = 'Regular Season - '
+
+class StandinConfig:
+    """Behaviour of the stand-in server."""
+
+    def __init__(self, teams: int = 20, seed: int = 0, played_rounds: int = None,
+                 record_dir: str = None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500, daily_limit: int = 100,
+                 minute_limit: int = 10):
+        self.teams: int = teams
+        self.seed: int = seed
+        # Number of rounds that have been played. If None, fixtures before the current time are
+        # played.
+        self.played_rounds: int = played_rounds
+        self.record_dir: str = record_dir
+        # Seconds added to every response, plus a random jitter of up to the given seconds
+        self.latency: float = latency
+        self.jitter: float = jitter
+        # Fraction of requests that are answered with the error status
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+        self.daily_limit: int = daily_limit
+        self.minute_limit: int = minute_limit
+
+class StandinServer:
+    """Stand-in server running in a background thread."""
+
+    def __init__(self, config: StandinConfig, host: str = '127.0.0.1', port: int = 0):
+        self.config: StandinConfig = config
+        self.requests: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._daily_used: int = 0
+        self._minute_used: int = 0
+        self._minute_start: float = time.monotonic()
+        self._random: random.Random = random.Random(config.seed)
+        self._httpd: ThreadingHTTPServer = ThreadingHTTPServer((host, port), _handler(self))
+        self._thread: threading.Thread = None
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the server."""
+
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> 'StandinServer':
+        """Start serving in a background thread and return the server."""
+
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self) -> None:
+        """Serve in the current thread until interrupted."""
+
+        self._httpd.serve_forever()
+
+    def respond(self, path: str, params: dict[str, str]) -> tuple[int, dict[str, str], Any]:
+        """Return the status, headers and payload for a request."""
+
+        config = self.config
+        with self._lock:
+            self.requests += 1
+            if time.monotonic() - self._minute_start >= 60:
+                self._minute_start = time.monotonic()
+                self._minute_used = 0
+            self._minute_used += 1
+            self._daily_used += 1
+            minute_exceeded = self._minute_used > config.minute_limit
+            daily_exceeded = self._daily_used > config.daily_limit
+            minute_remaining = max(0, config.minute_limit - self._minute_used)
+            daily_remaining = max(0, config.daily_limit - self._daily_used)
+            failed = self._random.random() < config.error_rate
+            delay = config.latency + self._random.uniform(0, config.jitter)
+
+        if delay:
+            time.sleep(delay)
+
+        headers = {
+            'x-ratelimit-requests-limit': str(config.daily_limit),
+            'x-ratelimit-requests-remaining': str(daily_remaining),
+            'X-RateLimit-Limit': str(config.minute_limit),
+            'X-RateLimit-Remaining': str(minute_remaining)
+        }
+        endpoint = path.strip('/')
+        if minute_exceeded:
+            return 429, headers, {'message': "Too many requests"}
+        if daily_exceeded:
+            return 200, headers, _payload(endpoint, params, [], {
+                'requests': "You have reached the request limit for the day"})
+        if failed:
+            return config.error_status, headers, {'message': "Injected error"}
+        if endpoint not in ('fixtures', 'standings'):
+            return 404, headers, {'message': f"Endpoint '{endpoint}' does not exist"}
+
+        season = params.get('season', '')
+        if not season.isdigit() or params.get('league') != str(LEAGUE_ID):
+            return 200, headers, _payload(endpoint, params, [], {
+                'season': "The Season field must be a valid year and the League field must be "
+                          f"{LEAGUE_ID}."})
+
+        recorded = self._recorded(endpoint, season)
+        if recorded is not None:
+            return 200, headers, recorded
+
+        fixtures = generate_fixtures(int(season), config.teams, config.seed, config.played_rounds)
+        if endpoint == 'fixtures':
+            return 200, headers, _payload(endpoint, params, fixtures)
+        return 200, headers, _payload(endpoint, params, generate_standings(fixtures))
+
+    def _recorded(self, endpoint: str, season: str) -> Any:
+        """Return the recorded payload for an endpoint and season, or None if it doesn't exist."""
+
+        if self.config.record_dir is None:
+            return None
+
+        path = os.path.join(self.config.record_dir, f"{endpoint}-{season}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+
+def generate_fixtures(season: int, teams: int = 20, seed: int = 0,
+                      played_rounds: int = None) -> list[dict[str, Any]]:
+    """Return a synthetic double round-robin season of fixtures in the api-sports format. Fixtures
+    are one week apart per round, starting in the middle of August of the season."""
+
+    rnd = random.Random(f"{seed}-{season}")
+    now = datetime.now(timezone.utc)
+    start = datetime(season, 8, 16, 14, 0, tzinfo=timezone.utc)
+    team_ids = list(range(1, teams + 1))
+    half = [_round_pairs(team_ids, index) for index in range(teams - 1)]
+    rounds = half + [[(away, home) for home, away in pairs] for pairs in half]
+
+    fixtures = []
+    for round_index, pairs in enumerate(rounds):
+        for match_index, (home, away) in enumerate(pairs):
+            fixture_id = season * 1000 + round_index * len(pairs) + match_index + 1
+            kickoff = start + timedelta(weeks=round_index, hours=2 * (match_index % 4))
+            if played_rounds is not None:
+                played = round_index < played_rounds
+            else:
+                played = kickoff + timedelta(hours=2) < now
+            fixtures.append({
+                'fixture': {
+                    'id': fixture_id,
+                    'referee': None,
+                    'timezone': 'UTC',
+                    'date': kickoff.isoformat(),
+                    'timestamp': int(kickoff.timestamp()),
+                    'status': {
+                        'long': 'Match Finished' if played else 'Not Started',
+                        'short': 'FT' if played else 'NS',
+                        'elapsed': 90 if played else None
+                    }
+                },
+                'league': {
+                    'id': LEAGUE_ID,
+                    'season': season,
+                    'round': f"{ROUND_PREFIX}{round_index + 1}"
+                },
+                'teams': {
+                    'home': _team(home),
+                    'away': _team(away)
+                },
+                'goals': {
+                    'home': rnd.choice([0, 0, 1, 1, 1, 2, 2, 3, 4]) if played else None,
+                    'away': rnd.choice([0, 0, 1, 1, 2, 2, 3]) if played else None
+                }
+            })
+
+    return fixtures
+
+def generate_standings(fixtures: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Return the standings in the api-sports format computed from the played fixtures."""
+
+    table = {}
+    for fixture in fixtures:
+        for side in ('home', 'away'):
+            team = fixture['teams'][side]
+            table.setdefault(team['id'], {'team': team, 'played': 0, 'win': 0, 'draw': 0,
+                                          'lose': 0, 'for': 0, 'against': 0, 'form': ''})
+        if fixture['fixture']['status']['short'] != 'FT':
+            continue
+
+        goals = fixture['goals']
+        for side, other in (('home', 'away'), ('away', 'home')):
+            row = table[fixture['teams'][side]['id']]
+            row['played'] += 1
+            row['for'] += goals[side]
+            row['against'] += goals[other]
+            if goals[side] > goals[other]:
+                row['win'] += 1
+                row['form'] += 'W'
+            elif goals[side] < goals[other]:
+                row['lose'] += 1
+                row['form'] += 'L'
+            else:
+                row['draw'] += 1
+                row['form'] += 'D'
+
+    rows = sorted(table.values(), key=lambda row: (-(3 * row['win'] + row['draw']),
+                                                   -(row['for'] - row['against']),
+                                                   -row['for'], row['team']['id']))
+    standings = []
+    for rank, row in enumerate(rows, start=1):
+        team = row['team']
+        standings.append({
+            'rank': rank,
+            'team': {'id': team['id'], 'name': team['name'], 'logo': team['logo']},
+            'points': 3 * row['win'] + row['draw'],
+            'goalsDiff': row['for'] - row['against'],
+            'group': 'Premier League',
+            'form': row['form'][-5:][::-1],
+            'status': 'same',
+            'description': _description(rank, len(rows)),
+            'all': {
+                'played': row['played'],
+                'win': row['win'],
+                'draw': row['draw'],
+                'lose': row['lose'],
+                'goals': {'for': row['for'], 'against': row['against']}
+            },
+            'update': datetime.now(timezone.utc).isoformat()
+        })
+
+    return [{'league': {'id': LEAGUE_ID, 'name': 'Premier League', 'standings': [standings]}}]
+
+def _round_pairs(team_ids: list[int], index: int) -> list[tuple[int, int]]:
+    """Return the pairs of a round using the circle method, alternating home and away."""
+
+    rotated = team_ids[:1] + (team_ids[1:][-index:] + team_ids[1:][:-index] if index else
+                              team_ids[1:])
+    count = len(rotated)
+    pairs = []
+    for position in range(count // 2):
+        home, away = rotated[position], rotated[count - 1 - position]
+        pairs.append((home, away) if (index + position) % 2 == 0 else (away, home))
+    return pairs
+
+def _team(team_id: int) -> dict[str, Any]:
+    return {
+        'id': team_id,
+        'name': f"Team {team_id}",
+        'logo': f"https://media.api-sports.io/football/teams/{team_id}.png",
+        'winner': None
+    }
+
+def _description(rank: int, teams: int) -> str:
+    if rank <= 4:
+        return 'Promotion - Champions League (League phase: )'
+    if rank == 5:
+        return 'Promotion - Europa League (League phase: )'
+    if rank == 6:
+        return 'Promotion - Conference League (Qualification: )'
+    if rank > teams - 3:
+        return 'Relegation - Championship'
+    return None
+
+def _payload(endpoint: str, params: dict[str, str], response: list[Any],
+             errors: dict[str, str] = None) -> dict[str, Any]:
+    return {
+        'get': endpoint,
+        'parameters': params,
+        'errors': errors or [],
+        'results': len(response),
+        'paging': {'current': 1, 'total': 1},
+        'response': response
+    }
+
+def _handler(server: StandinServer) -> type[BaseHTTPRequestHandler]:
+    """Return a request handler class bound to a stand-in server."""
+
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            status, headers, payload = server.respond(url.path, params)
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+            pass
+
+    return StandinHandler
+
+def main() -> None:
+    """Run the stand-in server from the command line."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--played-rounds', type=int, default=None)
+    parser.add_argument('--record-dir', default=None)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--daily-limit', type=int, default=100)
+    parser.add_argument('--minute-limit', type=int, default=10)
+    args = parser.parse_args()
+
+    config = StandinConfig(teams=args.teams, seed=args.seed, played_rounds=args.played_rounds,
+                           record_dir=args.record_dir, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, error_status=args.error_status,
+                           daily_limit=args.daily_limit, minute_limit=args.minute_limit)
+    server = StandinServer(config, args.host, args.port)
+    print(f"Serving api-sports stand-in at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Concurrency benchmark.
+
+Measure the read throughput of each database profile while a sync writes. Reader processes render
+pages through the test client while a writer process repeatedly upserts the fixtures of the season
+with changed scores and recalculates the results. Run from the repository root:
+
+    python -m benchmarks.concurrency --readers 8 --duration 10
+    python -m benchmarks.concurrency --profiles server --database-url postgresql://...
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from typing import Any
+from flask import Flask
+from website import create_app, db
+from website.database import PROFILES
+from website.models import Fixture, Season, User
+from website.parsers import parse_fixtures
+from website.scoring import calculate_season_results
+from .data import DataConfig, build_database, fixtures_payload
+
+def run_profile(profile: str, database_url: str, config: DataConfig, readers: int,
+                duration: float) -> dict[str, Any]:
+    """Build a database for a profile and run the readers and the writer for a duration. Return
+    the throughput and latency of the reads and the number of writes."""
+
+    app = _create_app(profile, database_url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        season = build_database(config)[-1]
+        calculate_season_results(season)
+        db.session.commit()
+        season_id = season.id
+        fixtures_json = fixtures_payload(season, config)['response']
+        paths = ['/fixtures', f"/stats/{season.season}", '/tips']
+        user_ids = [user.id for user in User.all() if not user.is_admin]
+        db.engine.dispose()
+
+    # Readers and the writer run in separate processes like the workers of a server, so they
+    # contend for the database and not for the GIL
+    context = multiprocessing.get_context('spawn')
+    start = context.Barrier(readers + 2)
+    stop = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=_write, args=(profile, database_url, season_id,
+                                                      fixtures_json, start, stop, results))]
+    for index in range(readers):
+        processes.append(context.Process(target=_read, args=(profile, database_url,
+                                                             user_ids[index % len(user_ids)],
+                                                             paths, start, stop, results)))
+    for process in processes:
+        process.start()
+    start.wait()
+    time.sleep(duration)
+    stop.set()
+
+    latencies, read_errors, writes, write_errors, errors = [], 0, 0, 0, set()
+    for _ in processes:
+        result = results.get()
+        latencies += result.get('latencies', [])
+        read_errors += result.get('read_errors', 0)
+        writes += result.get('writes', 0)
+        write_errors += result.get('write_errors', 0)
+        errors.update(result['errors'])
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latencies) or [0]
+    return {
+        'reads_per_second': len(latencies) / duration,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95)],
+        'read_errors': read_errors,
+        'writes': writes,
+        'write_errors': write_errors,
+        'errors': sorted(errors)
+    }
+
+def _create_app(profile: str, database_url: str) -> Flask:
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'DATABASE_PROFILE': profile,
+        'TESTING': True
+    })
+
+def _describe(error: Exception) -> str:
+    return f"{type(error).__name__}: {str(error).splitlines()[0]}"
+
+def _read(profile: str, database_url: str, user_id: str, paths: list[str], start: Any, stop: Any,
+          results: Any) -> None:
+    """Render pages as a user until stopped and put the latencies on the results queue."""
+
+    app = _create_app(profile, database_url)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user_id
+        session['_fresh'] = True
+
+    latencies, read_errors, errors = [], 0, set()
+    start.wait()
+    request = 0
+    while not stop.is_set():
+        path = paths[request % len(paths)]
+        request += 1
+        request_start = time.perf_counter()
+        try:
+            if client.get(path).status_code == 200:
+                latencies.append(time.perf_counter() - request_start)
+                continue
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            errors.add(_describe(error))
+        read_errors += 1
+
+    results.put({'latencies': latencies, 'read_errors': read_errors, 'errors': errors})
+
+def _write(profile: str, database_url: str, season_id: int, fixtures_json: list[dict[str, Any]],
+           start: Any, stop: Any, results: Any) -> None:
+    """Upsert the fixtures with changed scores and recalculate the results until stopped, like a
+    sync followed by a result calculation, and put the number of writes on the results queue."""
+
+    app = _create_app(profile, database_url)
+    writes, write_errors, errors = 0, 0, set()
+    start.wait()
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                fixtures = parse_fixtures(fixtures_json, season_id)
+                for fixture in fixtures:
+                    if fixture['home_score'] is not None:
+                        fixture['home_score'] += writes % 2
+                Fixture.bulk_create_or_update(fixtures)
+                db.session.commit()
+                calculate_season_results(db.session.get(Season, season_id))
+                db.session.commit()
+                writes += 1
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                db.session.rollback()
+                write_errors += 1
+                errors.add(_describe(error))
+
+    results.put({'writes': writes, 'write_errors': write_errors, 'errors': errors})
+
+def main() -> int:
+    """Parse arguments and run the benchmark for each profile."""
+
+    defaults = DataConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=['sqlite', 'sqlite-wal'])
+    parser.add_argument('--database-url',
+                        help="database URL for the server profile. It is cleared before the run.")
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--users', type=int, default=defaults.users)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    config = DataConfig(users=args.users, seed=args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in args.profiles:
+            database_url = f"sqlite:///{os.path.join(directory, f'{profile}.db')}"
+            if profile == 'server':
+                if args.database_url is None:
+                    print("Skipping server profile, --database-url is not set", file=sys.stderr)
+                    continue
+                database_url = args.database_url
+
+            result = run_profile(profile, database_url, config, args.readers, args.duration)
+            print(f"{profile:<12} {result['reads_per_second']:>7.1f} reads/s  "
+                  f"p50 {result['p50'] * 1000:>7.1f} ms  p95 {result['p95'] * 1000:>7.1f} ms  "
+                  f"read errors {result['read_errors']:>4}  writes {result['writes']:>4}  "
+                  f"write errors {result['write_errors']:>4}")
+            for error in result['errors']:
+                print(f"  {error}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
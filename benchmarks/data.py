@@ -0,0 +1,120 @@
+"""Synthetic data for benchmarks."""
+
+import random
+
+from datetime import datetime, timedelta
+from typing import Any
+from werkzeug.security import generate_password_hash
+from api_standin import generate_fixtures, generate_standings
+from website import db
+from website.models import User, Tip, Fixture, Team, TeamStanding, Season, General
+
+class DataConfig:
+    """Size of the synthetic database."""
+
+    def __init__(self, users: int = 20, seasons: int = 1, teams: int = 20, tip_rate: float = 0.9,
+                 played_rounds: int = 19, seed: int = 0):
+        self.users: int = users
+        self.seasons: int = seasons
+        # Each season has teams * (teams - 1) fixtures
+        self.teams: int = teams
+        # Fraction of fixtures each user has tipped
+        self.tip_rate: float = tip_rate
+        # Number of rounds played in the current season. Earlier seasons are fully played.
+        self.played_rounds: int = played_rounds
+        self.seed: int = seed
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the config as a JSON serializable dictionary."""
+
+        return dict(self.__dict__)
+
+def build_database(config: DataConfig) -> list[Season]:
+    """Fill the database of the current app context with seasons, teams, fixtures, standings,
+    users and tips generated through the models. The last season is set as the active season.
+    Return the created seasons."""
+
+    rnd = random.Random(config.seed)
+    first_season = datetime.now().year - config.seasons + 1
+    # All users share a password hash since hashing is slow and not part of the benchmarks
+    password = generate_password_hash('benchmark', method='scrypt')
+    users = [User.create('admin', password)]
+    users += [User.create(f"user{index}", password) for index in range(config.users)]
+
+    seasons = []
+    for year in range(first_season, first_season + config.seasons):
+        season = Season.create(str(year))
+        db.session.flush()
+        seasons.append(season)
+
+        fixtures_json = _fixtures_json(year, config)
+        standings_json = generate_standings(fixtures_json)[0]['league']['standings'][0]
+        for team_json in standings_json:
+            team = db.session.get(Team, team_json['team']['id'])
+            if team is None:
+                db.session.add(Team(team_id=team_json['team']['id'],
+                                    name=team_json['team']['name'],
+                                    logo=team_json['team']['logo']))
+            db.session.add(_standing(season, team_json))
+        db.session.flush()
+
+        for fixture_json in fixtures_json:
+            fixture = _fixture(season, fixture_json)
+            db.session.add(fixture)
+            for user in users:
+                if rnd.random() < config.tip_rate:
+                    db.session.add(Tip(fixture_id=fixture.fixture_id, tip=rnd.choice('1X2'),
+                                       user_id=user.id))
+        db.session.flush()
+
+    if General.get() is None:
+        General.create(seasons[-1])
+    else:
+        General.get().season_id = seasons[-1].id
+    db.session.commit()
+    return seasons
+
+def fixtures_payload(season: Season, config: DataConfig) -> dict[str, Any]:
+    """Return a fixtures API payload for a season matching the generated database."""
+
+    return {'response': _fixtures_json(int(season.season), config)}
+
+def standings_payload(season: Season, config: DataConfig) -> dict[str, Any]:
+    """Return a standings API payload for a season matching the generated database."""
+
+    return {'response': generate_standings(_fixtures_json(int(season.season), config))}
+
+def _fixtures_json(year: int, config: DataConfig) -> list[dict[str, Any]]:
+    # Only the current season is in progress
+    played_rounds = config.played_rounds if year == datetime.now().year else 2 * (config.teams - 1)
+    return generate_fixtures(year, config.teams, config.seed, played_rounds)
+
+def _fixture(season: Season, fixture_json: dict[str, Any]) -> Fixture:
+    date_time = datetime.fromisoformat(fixture_json['fixture']['date']).replace(tzinfo=None)
+    # Keep the unplayed fixtures in the future so they count as upcoming
+    if fixture_json['fixture']['status']['short'] == 'NS' and date_time < datetime.now():
+        date_time = datetime.now() + timedelta(days=fixture_json['fixture']['id'] % 1000 // 10)
+    return Fixture(fixture_id=fixture_json['fixture']['id'],
+                   season_id=season.id,
+                   round=int(fixture_json['league']['round'].split(' - ')[1]),
+                   date_time=date_time,
+                   status=fixture_json['fixture']['status']['short'],
+                   home_team_id=fixture_json['teams']['home']['id'],
+                   away_team_id=fixture_json['teams']['away']['id'],
+                   home_score=fixture_json['goals']['home'],
+                   away_score=fixture_json['goals']['away'])
+
+def _standing(season: Season, team_json: dict[str, Any]) -> TeamStanding:
+    return TeamStanding(season_id=season.id,
+                        team_id=team_json['team']['id'],
+                        rank=team_json['rank'],
+                        points=team_json['points'],
+                        games_played=team_json['all']['played'],
+                        wins=team_json['all']['win'],
+                        draws=team_json['all']['draw'],
+                        losses=team_json['all']['lose'],
+                        goals_scored=team_json['all']['goals']['for'],
+                        goals_conceded=team_json['all']['goals']['against'],
+                        form=team_json['form'],
+                        status=team_json['status'],
+                        last_update=datetime.now())
@@ -0,0 +1,222 @@
+"""Benchmark runner.
+
+Build a seeded SQLite database and time the hot paths of the app. Run from the repository root:
+
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Callable
+from flask import Flask
+from sqlalchemy import event
+from website import create_app, db
+from website.models import User, Fixture, Team, Season
+from website.parsers import parse_fixtures, parse_standings
+from website.schemas import FixtureSchema, TeamSchema
+from website.scoring import calculate_season_results, update_season_results
+from website.utils import calculate_user_result
+from .data import DataConfig, build_database, fixtures_payload, standings_payload
+
+class Benchmark:
+    """A named function to time."""
+
+    def __init__(self, name: str, function: Callable[[], Any]):
+        self.name: str = name
+        self.function: Callable[[], Any] = function
+
+class QueryCounter:
+    """Count the statements executed on an engine."""
+
+    def __init__(self, engine: Any):
+        self.count: int = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *_args) -> None:
+        self.count += 1
+
+def get_benchmarks(app: Flask, season: Season, config: DataConfig) -> list[Benchmark]:
+    """Return the benchmarks for a season of the generated database."""
+
+    fixtures_json = fixtures_payload(season, config)['response']
+    standings_json = standings_payload(season, config)['response'][0]['league']['standings'][0]
+    fixture_schema = FixtureSchema(context={"season": season})
+    team_schema = TeamSchema(context={"season": season})
+
+    def user_results() -> None:
+        for user in User.all():
+            calculate_user_result(user, season)
+        db.session.rollback()
+
+    def season_results() -> None:
+        calculate_season_results(season)
+        db.session.rollback()
+
+    def incremental_results() -> None:
+        update_season_results(season)
+        db.session.rollback()
+
+    def fixture_upsert() -> None:
+        Fixture.bulk_create_or_update(parse_fixtures(fixtures_json, season.id))
+        db.session.rollback()
+
+    def standings_upsert() -> None:
+        Team.bulk_create_or_update_rows(parse_standings(standings_json, season.id))
+        db.session.rollback()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(User.by_username('user0').id)
+        session['_fresh'] = True
+
+    def render(path: str) -> Callable[[], None]:
+        def get() -> None:
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+        return get
+
+    return [
+        Benchmark('calculate_user_result', user_results),
+        Benchmark('calculate_season_results', season_results),
+        Benchmark('update_season_results', incremental_results),
+        Benchmark('fixture_schema_load',
+                  lambda: [fixture_schema.load(fixture_json) for fixture_json in fixtures_json]),
+        Benchmark('team_schema_load',
+                  lambda: [team_schema.load(team_json) for team_json in standings_json]),
+        Benchmark('fixture_parse', lambda: parse_fixtures(fixtures_json, season.id)),
+        Benchmark('standings_parse', lambda: parse_standings(standings_json, season.id)),
+        Benchmark('fixture_upsert', fixture_upsert),
+        Benchmark('standings_upsert', standings_upsert),
+        Benchmark('render_fixtures', render('/fixtures')),
+        Benchmark('render_stats', render(f"/stats/{season.season}")),
+        Benchmark('render_tips', render('/tips')),
+    ]
+
+def run_benchmark(benchmark: Benchmark, counter: QueryCounter, repeat: int) -> dict[str, Any]:
+    """Run a benchmark once to warm up, then time it and finally trace its peak memory in a
+    separate run, since tracing slows it down. Return the wall times, the number of queries per
+    run and the peak memory."""
+
+    benchmark.function()
+
+    times = []
+    counter.count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark.function()
+        times.append(time.perf_counter() - start)
+    queries = counter.count // repeat
+
+    tracemalloc.start()
+    benchmark.function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'min': min(times),
+        'mean': statistics.mean(times),
+        'queries': queries,
+        'peak_memory': peak
+    }
+
+def run(config: DataConfig, repeat: int) -> dict[str, Any]:
+    """Build a database for the config in a temporary directory and run all benchmarks."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+            'TESTING': True
+        })
+        with app.app_context():
+            start = time.perf_counter()
+            season = build_database(config)[-1]
+            build_time = time.perf_counter() - start
+            calculate_season_results(season)
+            db.session.commit()
+
+            counter = QueryCounter(db.engine)
+            results = {}
+            for benchmark in get_benchmarks(app, season, config):
+                results[benchmark.name] = run_benchmark(benchmark, counter, repeat)
+                print_result(benchmark.name, results[benchmark.name])
+            db.session.remove()
+            db.engine.dispose()
+
+    return {'config': config.to_dict(), 'build_time': build_time, 'results': results}
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Compare results to a baseline and return a description of each regression. A benchmark
+    regresses if its minimum time grows by more than the threshold, or if it runs more
+    queries."""
+
+    if baseline['config'] != current['config']:
+        print("Warning: the baseline was run with a different config", file=sys.stderr)
+
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        change = result['min'] / base['min'] - 1
+        print(f"{name:<28} {base['min'] * 1000:>9.2f} ms -> {result['min'] * 1000:>9.2f} ms "
+              f"({change:+.0%}), queries {base['queries']} -> {result['queries']}")
+        if change > threshold:
+            regressions.append(f"{name} is {change:.0%} slower")
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name} runs {result['queries'] - base['queries']} more queries")
+    return regressions
+
+def print_result(name: str, result: dict[str, Any]) -> None:
+    """Print the result of a benchmark."""
+
+    print(f"{name:<28} min {result['min'] * 1000:>9.2f} ms  mean {result['mean'] * 1000:>9.2f} ms"
+          f"  queries {result['queries']:>6}  peak {result['peak_memory'] / 1024:>9.1f} KiB")
+
+def main() -> int:
+    """Parse arguments, run the benchmarks and save or compare baselines. Return 1 if a regression
+    was found."""
+
+    defaults = DataConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=defaults.users)
+    parser.add_argument('--seasons', type=int, default=defaults.seasons)
+    parser.add_argument('--teams', type=int, default=defaults.teams)
+    parser.add_argument('--tip-rate', type=float, default=defaults.tip_rate)
+    parser.add_argument('--played-rounds', type=int, default=defaults.played_rounds)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help="save the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare the results to a baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown counted as a regression (default 0.2)")
+    args = parser.parse_args()
+
+    config = DataConfig(args.users, args.seasons, args.teams, args.tip_rate, args.played_rounds,
+                        args.seed)
+    current = run(config, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(current, file, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(json.load(file), current, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
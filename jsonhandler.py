@@ -1,55 +1,125 @@
-from website import db
-from website.models import User, Fixture, Tip
+"""Import and export of tips.
+
+Tips are exported to and imported from NDJSON files with one tip per line, e.g.
+{"user": "name", "fixture_id": 1035037, "tip": "1"}. Both directions stream the tips in chunks, so
+memory use doesn't grow with the number of tips. The legacy tip.json document can still be
+imported with read_legacy_tip.
+"""
+
 import json
 import os
 
+from itertools import islice
+from typing import Any, Iterable, Iterator
+from sqlalchemy import insert, update
+from website import db
+from website.models import User, Fixture, Tip, DataVersion
+
 curr_folder = os.path.dirname(os.path.abspath(__file__))
 tip_file = os.path.join(curr_folder, 'website/data/tip.json')
+tips_file = os.path.join(curr_folder, 'website/data/tips.ndjson')
+
+# Number of tips read, written and committed at a time
+CHUNK_SIZE = 1000
+
+def write_tip(path: str = tips_file) -> int:
+    """Export all tips to an NDJSON file ordered by user and fixture. Return the number of tips
+    written."""
+
+    rows = db.session.execute(db.select(User.username, Tip.fixture_id, Tip.tip)
+                              .join(Tip.user)
+                              .order_by(User.username, Tip.fixture_id)
+                              .execution_options(yield_per=CHUNK_SIZE))
+    count = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        for username, fixture_id, tip in rows:
+            file.write(json.dumps({'user': username, 'fixture_id': fixture_id, 'tip': tip}))
+            file.write('\n')
+            count += 1
+    return count
+
+def read_tip(path: str = tips_file) -> dict[str, int]:
+    """Import tips from an NDJSON file written by write_tip. Existing tips are updated. Return the
+    number of 'inserted', 'updated' and 'skipped' tips."""
+
+    with open(path, encoding='utf-8') as file:
+        return import_tips(json.loads(line) for line in file if line.strip())
+
+def read_legacy_tip(path: str = tip_file) -> dict[str, int]:
+    """Import tips from the legacy tip.json document, which holds a list of users with their tips.
+    Return the number of 'inserted', 'updated' and 'skipped' tips."""
+
+    with open(path, encoding='utf-8') as file:
+        tips_data = json.load(file)
+
+    return import_tips({'user': user['name'], 'fixture_id': tip['fixture_id'], 'tip': tip['tip']}
+                       for user in tips_data['users'] for tip in user['tips'])
 
-def read_tip():
-    with open(tip_file) as f:
-        tips_data = json.load(f)
+def import_tips(records: Iterable[dict[str, Any]]) -> dict[str, int]:
+    """Import tips given as dictionaries with a username, fixture ID and tip. Each chunk of tips is
+    written with a few set-based queries and committed. Tips of unknown users or fixtures, and
+    invalid tips, are skipped. Return the number of 'inserted', 'updated' and 'skipped' tips."""
 
-    for username in tips_data["users"]:
-        user = User.query.filter_by(username=username["name"]).first()
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    user_ids: dict[str, str] = {}
+    for chunk in _chunks(records):
+        for key, value in _import_chunk(chunk, user_ids).items():
+            counts[key] += value
+        DataVersion.bump(None, 'tips')
+        db.session.commit()
+    return counts
 
-        for tip in username["tips"]:
-            fixture_id = tip["fixture_id"]
-            value = tip["tip"]
-            fixture = Fixture.query.filter_by(fixture_id=fixture_id).first()
+def _import_chunk(chunk: list[dict[str, Any]], user_ids: dict[str, str]) -> dict[str, int]:
+    """Insert or update a chunk of tips. User IDs are looked up by username and cached across
+    chunks."""
 
-            if fixture is not None:
-                new_tip = Tip.query.filter_by(user_id=user.id).filter_by(
-                    fixture_id=fixture_id).first()
+    usernames = {record['user'] for record in chunk} - user_ids.keys()
+    if usernames:
+        user_ids.update(db.session.execute(db.select(User.username, User.id)
+                                           .filter(User.username.in_(usernames))).all())
 
-                if new_tip is None:
-                    new_tip = Tip(fixture_id=fixture_id, tip=value,
-                                  correct=0, user_id=user.id)
-                    db.session.add(new_tip)
-                else:
-                    new_tip.tip = value
+    fixture_ids = {record['fixture_id'] for record in chunk}
+    fixture_ids = set(db.session.execute(db.select(Fixture.fixture_id)
+                                         .filter(Fixture.fixture_id.in_(fixture_ids)))
+                                .scalars())
 
-    db.session.commit()
+    # Later tips for the same user and fixture replace earlier ones
+    tips = {}
+    for record in chunk:
+        user_id = user_ids.get(record['user'])
+        if (user_id is not None and record['fixture_id'] in fixture_ids
+                and record['tip'] in ('1', 'X', '2')):
+            tips[(user_id, record['fixture_id'])] = record['tip']
 
-def write_tip():
-    data = {}
-    user_list = []
+    existing = {(row.user_id, row.fixture_id): row for row in db.session.execute(
+        db.select(Tip.id, Tip.user_id, Tip.fixture_id, Tip.tip)
+        .filter(Tip.fixture_id.in_(fixture_ids),
+                Tip.user_id.in_({user_id for user_id, _fixture_id in tips})))}
 
-    for user in User.query.all():
-        user_data = {}
-        tip_list = []
+    inserts = []
+    updates = []
+    changed_fixture_ids = set()
+    for (user_id, fixture_id), tip in tips.items():
+        row = existing.get((user_id, fixture_id))
+        if row is None:
+            inserts.append({'user_id': user_id, 'fixture_id': fixture_id, 'tip': tip, 'correct': 0})
+            changed_fixture_ids.add(fixture_id)
+        elif row.tip != tip:
+            updates.append({'id': row.id, 'tip': tip})
+            changed_fixture_ids.add(fixture_id)
 
-        for tip in user.tips:
-            tip_data = {}
-            tip_data["fixture_id"] = tip.fixture_id
-            tip_data["tip"] = tip.tip
-            tip_list.append(tip_data)
+    if inserts:
+        db.session.execute(insert(Tip), inserts)
+    if updates:
+        db.session.execute(update(Tip), updates)
+    Fixture.mark_unscored(list(changed_fixture_ids))
 
-        user_data["name"] = user.username
-        user_data["tips"] = tip_list
-        user_list.append(user_data)
+    return {'inserted': len(inserts), 'updated': len(updates),
+            'skipped': len(chunk) - len(tips)}
 
-    data["users"] = user_list
+def _chunks(records: Iterable[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    """Yield lists of at most CHUNK_SIZE records."""
 
-    with open(tip_file, "w") as f:
-        json.dump(data, f)
\ No newline at end of file
+    iterator = iter(records)
+    while chunk := list(islice(iterator, CHUNK_SIZE)):
+        yield chunk
@@ -0,0 +1,97 @@
+"""Fixtures."""
+
+import os
+
+from typing import Callable, Iterator
+import pytest
+
+from flask import Flask
+from flask.testing import FlaskClient
+from benchmarks.data import DataConfig, build_database
+from website import create_app, db
+from website.cache import season_context, kickoff_indexes, fragments
+from website.models import User, Season
+from website.scoring import calculate_season_results, update_leaderboard
+
+@pytest.fixture(scope='session')
+def data_config() -> DataConfig:
+    """Size of the seeded database."""
+
+    return DataConfig(users=5, played_rounds=10)
+
+@pytest.fixture(scope='session')
+def seeded_app(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Callable[[DataConfig], Flask]]:
+    """Factory of apps with a seeded SQLite database of a given size in a temporary directory.
+    The results and leaderboard of the active season are calculated."""
+
+    apps = []
+
+    def create(config: DataConfig) -> Flask:
+        directory = tmp_path_factory.mktemp('database')
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'test.db')}",
+            'TESTING': True
+        })
+        with app.app_context():
+            season = build_database(config)[-1]
+            calculate_season_results(season)
+            update_leaderboard(season)
+            db.session.commit()
+        apps.append(app)
+        return app
+
+    yield create
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+@pytest.fixture(scope='session')
+def app(seeded_app: Callable[[DataConfig], Flask], data_config: DataConfig) -> Flask:
+    """App with a seeded SQLite database in a temporary directory."""
+
+    return seeded_app(data_config)
+
+@pytest.fixture(autouse=True)
+def empty_caches() -> None:
+    """Empty the in-process caches, which are shared by all apps, before each test."""
+
+    season_context.invalidate()
+    kickoff_indexes.invalidate()
+    fragments.invalidate()
+
+@pytest.fixture
+def app_context(app: Flask) -> Iterator[None]:
+    """App context that rolls back the changes of a test."""
+
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+@pytest.fixture
+def season(app: Flask) -> str:
+    """Name of the active season."""
+
+    with app.app_context():
+        return Season.get_season_data()['active_season'].season
+
+@pytest.fixture(scope='session')
+def login() -> Callable[[Flask, str], FlaskClient]:
+    """Return a function that returns a test client of an app logged in as a given user."""
+
+    def client_for(app: Flask, username: str) -> FlaskClient:
+        client = app.test_client()
+        with app.app_context():
+            user_id = User.by_username(username).id
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+
+    return client_for
+
+@pytest.fixture
+def client(app: Flask, login: Callable[[Flask, str], FlaskClient]) -> FlaskClient:
+    """Test client logged in as a user that is not an admin."""
+
+    return login(app, 'user0')
@@ -0,0 +1,98 @@
+"""API."""
+
+from typing import Any
+import pytest
+
+from flask import Flask
+from flask.testing import FlaskClient
+from website import db
+from website.api import (FIXTURE_FIELDS, STANDING_FIELDS, TIP_FIELDS, RESULT_FIELDS,
+                         RESULT_ROUND_FIELDS)
+from website.models import DataVersion, Season
+
+ENDPOINTS = [
+    ('/api/fixtures/{season}', FIXTURE_FIELDS),
+    ('/api/standings/{season}', STANDING_FIELDS),
+    ('/api/tips/{season}', TIP_FIELDS),
+    ('/api/tips/{season}?user=user1', TIP_FIELDS),
+    ('/api/results/{season}', RESULT_FIELDS),
+    ('/api/results/{season}/rounds', RESULT_ROUND_FIELDS)
+]
+
+@pytest.mark.parametrize('path, field', [(path, field) for path, fields in ENDPOINTS
+                                         for field in fields])
+def test_single_field(client: FlaskClient, season: str, path: str, field: str) -> None:
+    """Each field can be requested on its own."""
+
+    separator = '&' if '?' in path else '?'
+    response = client.get(f"{path.format(season=season)}{separator}fields={field}")
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data
+    assert all(list(row) == [field] for row in data)
+
+@pytest.mark.parametrize('path, fields', ENDPOINTS)
+def test_all_fields(client: FlaskClient, season: str, path: str, fields: dict[str, Any]) -> None:
+    """All fields are returned if none are selected."""
+
+    response = client.get(path.format(season=season))
+    assert response.status_code == 200
+    assert set(response.get_json()['data'][0]) == set(fields)
+
+def test_fixtures_round(client: FlaskClient, season: str) -> None:
+    """The round argument returns the fixtures of one round."""
+
+    response = client.get(f"/api/fixtures/{season}?round=5&fields=round")
+    assert response.status_code == 200
+    assert response.get_json()['next_cursor'] is None
+    data = response.get_json()['data']
+    assert len(data) == 10
+    assert {row['round'] for row in data} == {5}
+
+def test_fixtures_pages(client: FlaskClient, season: str) -> None:
+    """Following next_cursor returns every fixture once."""
+
+    fixture_ids = []
+    path = f"/api/fixtures/{season}?fields=id&limit=10"
+    while path is not None:
+        page = client.get(path).get_json()
+        fixture_ids += [row['id'] for row in page['data']]
+        cursor = page['next_cursor']
+        path = None
+        if cursor is not None:
+            path = f"/api/fixtures/{season}?fields=id&limit=10&cursor={cursor}"
+    assert len(fixture_ids) == len(set(fixture_ids)) == 380
+
+def test_tips_etag_changes_with_results(app: Flask, client: FlaskClient, season: str) -> None:
+    """The tips change status when results are calculated, so their ETag does too."""
+
+    path = f"/api/tips/{season}"
+    etag = client.get(path).headers['ETag']
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        DataVersion.bump(Season.by_season(season).id, 'results')
+        db.session.commit()
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 200
+
+@pytest.mark.parametrize('query, status', [
+    ('?fields=unknown', 400),
+    ('?round=first', 400),
+    ('?limit=0', 400),
+    ('?from=yesterday', 400)
+])
+def test_fixtures_errors(client: FlaskClient, season: str, query: str, status: int) -> None:
+    """Invalid arguments are answered with a JSON error."""
+
+    response = client.get(f"/api/fixtures/{season}{query}")
+    assert response.status_code == status
+    assert 'error' in response.get_json()
+
+def test_fixtures_current_round(client: FlaskClient, season: str) -> None:
+    """The round 'current' is the round of the next upcoming fixture."""
+
+    response = client.get(f"/api/fixtures/{season}?round=current&fields=round,status")
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert len({row['round'] for row in data}) == 1
+    assert any(row['status'] == 'NS' for row in data)
@@ -0,0 +1,112 @@
+"""Api Cache."""
+
+import os
+
+from pathlib import Path
+import pytest
+
+from api_standin import StandinConfig, StandinServer
+from website import apicache, utils
+from website.apicache import ApiCache
+from website.apisports import ApiClient
+from website.models import SeasonInfo
+
+TTLS = {'fixtures': 60, 'standings': 3600}
+KEY = 'fixtures-2025-39'
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ApiCache:
+    """Empty cache in a temporary directory."""
+
+    return ApiCache(str(tmp_path), TTLS)
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Current time seen by the cache, which a test can move forward."""
+
+    now = [1_000_000.0]
+    monkeypatch.setattr(apicache.time, 'time', lambda: now[0])
+    return now
+
+def test_lookup_returns_fresh_payload(cache: ApiCache, clock: list[float]) -> None:
+    """A stored payload is served from the cache until its endpoint's TTL has passed."""
+
+    stored = cache.store(KEY, {'x-ratelimit-requests-remaining': '99'}, {'response': [1, 2]})
+    assert not stored.from_cache
+
+    clock[0] += 60
+    payload = cache.lookup('fixtures', KEY)
+    assert payload == stored._replace(from_cache=True)
+
+    clock[0] += 1
+    assert cache.lookup('fixtures', KEY) is None
+    assert cache.lookup('standings', KEY) is not None
+
+def test_lookup_misses(cache: ApiCache) -> None:
+    """Missing keys, endpoints without a TTL and unreadable payloads are not served."""
+
+    assert cache.lookup('fixtures', KEY) is None
+    payload = cache.store(KEY, {}, {'response': []})
+    assert cache.lookup('players', KEY) is None
+
+    with open(os.path.join(cache.directory, 'objects', f"{payload.digest}.json"), 'w',
+              encoding='utf-8') as file:
+        file.write('{"response": [')
+    assert cache.lookup('fixtures', KEY) is None
+
+def test_objects_are_shared_and_removed(cache: ApiCache) -> None:
+    """Payloads are stored once per digest, and an object is removed when no key refers to it
+    anymore."""
+
+    first = cache.store(KEY, {}, {'response': [1]})
+    shared = cache.store('standings-2025-39', {}, {'response': [1]})
+    assert first.digest == shared.digest
+    assert _objects(cache) == {first.digest}
+
+    changed = cache.store(KEY, {}, {'response': [2]})
+    assert _objects(cache) == {first.digest, changed.digest}
+
+    cache.store('standings-2025-39', {}, {'response': [2]})
+    assert _objects(cache) == {changed.digest}
+
+def test_processed_payloads(cache: ApiCache) -> None:
+    """A payload stays processed when the same data is fetched again, until the data changes."""
+
+    payload = cache.store(KEY, {}, {'response': [1]})
+    assert not cache.is_processed(payload)
+
+    cache.mark_processed(payload)
+    assert cache.is_processed(payload)
+    assert cache.is_processed(cache.store(KEY, {'date': 'later'}, {'response': [1]}))
+
+    changed = cache.store(KEY, {}, {'response': [2]})
+    assert not cache.is_processed(changed)
+    assert not cache.is_processed(cache.store('standings-2025-39', {}, {'response': [1]}))
+
+def test_force_bypasses_cache(cache: ApiCache, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Cached API calls are served from the cache unless forced."""
+
+    server = StandinServer(StandinConfig(teams=4)).start()
+    try:
+        monkeypatch.setattr(utils, 'api_cache', cache)
+        monkeypatch.setattr(utils, 'api_client', ApiClient(server.url, 'key'))
+        season = SeasonInfo(1, '2025', '2025-26')
+
+        fetched = utils.cached_api_call('fixtures', season)
+        cached = utils.cached_api_call('fixtures', season)
+        assert (fetched.from_cache, cached.from_cache) == (False, True)
+        assert cached.data == fetched.data
+        assert server.requests == 1
+
+        forced = utils.cached_api_call('fixtures', season, force=True)
+        assert not forced.from_cache
+        assert forced.digest == fetched.digest
+        assert server.requests == 2
+    finally:
+        server.stop()
+
+def _objects(cache: ApiCache) -> set[str]:
+    """Return the digests of the stored objects."""
+
+    return {name.removesuffix('.json')
+            for name in os.listdir(os.path.join(cache.directory, 'objects'))}
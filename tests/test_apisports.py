@@ -0,0 +1,175 @@
+"""Api-Sports."""
+
+import json
+
+from collections import deque
+from typing import Any, Iterator
+import pytest
+import requests
+
+from api_standin import StandinConfig, StandinServer, generate_fixtures
+from website import apisports
+from website.apisports import ApiClient, ApiError, ApiBudgetExceeded, ResponseStream
+
+PARAMS = {'league': '39', 'season': '2025'}
+
+class ScriptedServer(StandinServer):
+    """Stand-in server that answers with scripted statuses and rate limit headers, in order,
+    before it serves requests normally."""
+
+    def __init__(self, config: StandinConfig):
+        super().__init__(config)
+        self.script: deque[tuple[int, dict[str, str]]] = deque()
+
+    def respond(self, path: str, params: dict[str, str]) -> tuple[int, dict[str, str], Any]:
+        status, headers, payload = super().respond(path, params)
+        if not self.script:
+            return status, headers, payload
+
+        status, scripted_headers = self.script.popleft()
+        return status, headers | scripted_headers, payload if status == 200 else {}
+
+@pytest.fixture
+def server() -> Iterator[ScriptedServer]:
+    """Stand-in server with a small season."""
+
+    server = ScriptedServer(StandinConfig(teams=4, played_rounds=2, daily_limit=100)).start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Record the seconds the client sleeps instead of sleeping."""
+
+    sleeps = []
+    monkeypatch.setattr(apisports.time, 'sleep', sleeps.append)
+    return sleeps
+
+def test_get_returns_headers_and_data(server: ScriptedServer) -> None:
+    """A successful call returns the response headers and data and updates the budget."""
+
+    client = ApiClient(server.url, 'key')
+    headers, data = client.get('fixtures', PARAMS)
+    assert data['response'] == generate_fixtures(2025, teams=4, played_rounds=2)
+    assert headers['x-ratelimit-requests-remaining'] == '99'
+    status = client.status()
+    assert (status['limit'], status['remaining']) == (100, 99)
+    assert [(call.endpoint, call.status) for call in status['calls']] == [('fixtures', 200)]
+
+def test_get_raises_api_errors(server: ScriptedServer) -> None:
+    """Errors in the payload raise ApiError."""
+
+    with pytest.raises(ApiError, match='season'):
+        ApiClient(server.url, 'key').get('fixtures', {'league': '39', 'season': 'x'})
+
+def test_retries_with_backoff(server: ScriptedServer, sleeps: list[float]) -> None:
+    """Retryable statuses are retried with jittered exponential backoff, or after the time
+    requested by the API if it is longer."""
+
+    server.script.extend([(503, {'Retry-After': '2'}), (500, {}), (502, {})])
+    client = ApiClient(server.url, 'key', retries=3, backoff=0.1)
+    _headers, data = client.get('fixtures', PARAMS)
+
+    assert data['results'] == 12
+    assert server.requests == 4
+    assert sleeps[0] == 2
+    assert 0.1 <= sleeps[1] <= 0.3
+    assert 0.2 <= sleeps[2] <= 0.6
+    assert [call.status for call in client.status()['calls']] == [200, 502, 500, 503]
+
+def test_backoff_is_capped(server: ScriptedServer, sleeps: list[float]) -> None:
+    """Backoff and Retry-After are capped at the maximum backoff before the jitter is applied."""
+
+    server.script.extend([(429, {'Retry-After': '3600'}), (500, {})])
+    ApiClient(server.url, 'key', backoff=10, max_backoff=5).get('fixtures', PARAMS)
+    assert 5 <= sleeps[0] <= 7.5
+    assert 2.5 <= sleeps[1] <= 7.5
+
+def test_retries_are_limited(server: ScriptedServer, sleeps: list[float]) -> None:
+    """The last retryable status is raised once the retries are used up, and other errors are
+    raised without retrying."""
+
+    server.script.extend([(500, {})] * 3)
+    with pytest.raises(requests.HTTPError):
+        ApiClient(server.url, 'key', retries=2).get('fixtures', PARAMS)
+    assert server.requests == 3
+    assert len(sleeps) == 2
+
+    with pytest.raises(requests.HTTPError):
+        ApiClient(server.url, 'key').get('players', PARAMS)
+    assert server.requests == 4
+
+def test_reserve_refuses_calls(server: ScriptedServer) -> None:
+    """Calls are refused without a request once the remaining daily budget reaches the
+    reserve."""
+
+    server.config.daily_limit = 7
+    client = ApiClient(server.url, 'key', reserve=5)
+    client.get('fixtures', PARAMS)
+    client.get('standings', PARAMS)
+    with pytest.raises(ApiBudgetExceeded):
+        client.get('fixtures', PARAMS)
+    assert server.requests == 2
+    assert client.status()['remaining'] == 5
+
+def test_exhausted_minute_defers_calls(server: ScriptedServer, sleeps: list[float]) -> None:
+    """A call is deferred until the next minute once the per minute budget is exhausted."""
+
+    server.script.append((200, {'X-RateLimit-Remaining': '0'}))
+    client = ApiClient(server.url, 'key')
+    client.get('fixtures', PARAMS)
+    assert not sleeps
+
+    client.get('fixtures', PARAMS)
+    assert len(sleeps) == 1
+    assert 55 < sleeps[0] <= 60
+    assert server.requests == 2
+
+    client.get('fixtures', PARAMS)
+    assert len(sleeps) == 1
+
+def test_stream_yields_items(server: ScriptedServer) -> None:
+    """Streamed items match the payload, and errors in the payload are raised after the items."""
+
+    client = ApiClient(server.url, 'key')
+    headers, items = client.stream('fixtures', PARAMS)
+    assert headers['x-ratelimit-requests-remaining'] == '99'
+    assert list(items) == generate_fixtures(2025, teams=4, played_rounds=2)
+
+    _headers, items = client.stream('standings', {'league': '39', 'season': 'x'})
+    with pytest.raises(ApiError, match='season'):
+        list(items)
+
+def test_response_stream_decodes_any_chunking() -> None:
+    """Items and the envelope are decoded however the body is split, including inside multibyte
+    characters."""
+
+    payload = {
+        'get': 'fixtures',
+        'errors': [],
+        'response': [{'team': {'name': 'Malmö FF', 'id': 1}}, {'team': {'name': 'Ünited'}}, [],
+                     "Åby", {'nested': {'response': [1, 2]}}],
+        'paging': {'current': 1, 'total': 1}
+    }
+    body = json.dumps(payload, ensure_ascii=False, indent=1).encode('utf-8')
+    for size in (1, 2, 3, 7, 64, len(body)):
+        stream = ResponseStream(body[start:start + size] for start in range(0, len(body), size))
+        assert list(stream) == payload['response']
+        assert stream.envelope == payload | {'response': []}
+
+def test_response_stream_without_items() -> None:
+    """A payload with an empty or missing response list yields nothing and sets the envelope."""
+
+    for payload in ({'errors': {'token': 'Invalid'}, 'response': []},
+                    {'message': 'Too many requests'}):
+        body = json.dumps(payload).encode('utf-8')
+        stream = ResponseStream(body[start:start + 4] for start in range(0, len(body), 4))
+        assert not list(stream)
+        assert stream.envelope == payload
+
+def test_response_stream_truncated_body() -> None:
+    """A body that ends inside the response list raises an error."""
+
+    body = json.dumps({'response': [{'id': 1}, {'id': 2}]}).encode('utf-8')
+    with pytest.raises(json.JSONDecodeError):
+        list(ResponseStream([body[:-8]]))
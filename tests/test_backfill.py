@@ -0,0 +1,113 @@
+"""Backfill."""
+
+import os
+
+from pathlib import Path
+from typing import Iterator
+import pytest
+
+from click.testing import Result as CliResult
+from flask import Flask
+from api_standin import StandinConfig, StandinServer
+from website import backfill, create_app, db, utils
+from website.apisports import ApiClient
+from website.models import Fixture, Job, Season, TeamStanding
+
+@pytest.fixture
+def server() -> Iterator[StandinServer]:
+    """Stand-in server with seasons of six teams."""
+
+    server = StandinServer(StandinConfig(teams=6, daily_limit=1000, minute_limit=1000)).start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def empty_app(tmp_path: Path, server: StandinServer,
+              monkeypatch: pytest.MonkeyPatch) -> Iterator[Flask]:
+    """App with an empty database that backfills from the stand-in server in batches of 10
+    items."""
+
+    client = ApiClient(server.url, 'key', retries=0)
+    monkeypatch.setattr(utils, 'api_client', client)
+    monkeypatch.setattr(backfill, 'api_client', client)
+    monkeypatch.setattr(backfill, 'BACKFILL_BATCH_SIZE', 10)
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp_path, 'test.db')}",
+        'TESTING': True
+    })
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def test_backfill_writes_batches(empty_app: Flask) -> None:
+    """Fixtures and standings of each season are written in batches and recorded in jobs."""
+
+    result = _backfill(empty_app, 2023, 2024)
+    assert result.exit_code == 0, result.output
+    assert "2023 fixtures: 10 items written\n2023 fixtures: 20 items written\n" in result.output
+    assert "2023 fixtures: 30 items written\n2023 fixtures: finished" in result.output
+
+    with empty_app.app_context():
+        for season in ('2023', '2024'):
+            assert len(Fixture.by_season(season, with_teams=False)) == 30
+            assert len(TeamStanding.by_season(season)) == 6
+        assert _jobs() == {
+            ('backfill-fixtures', '2023'): [('finished', "30 items backfilled.")],
+            ('backfill-standings', '2023'): [('finished', "6 items backfilled.")],
+            ('backfill-fixtures', '2024'): [('finished', "30 items backfilled.")],
+            ('backfill-standings', '2024'): [('finished', "6 items backfilled.")]
+        }
+
+def test_backfill_resumes_failed_jobs(empty_app: Flask, server: StandinServer) -> None:
+    """Failed payloads are recorded in failed jobs, and running the backfill again skips the
+    finished jobs and runs the failed ones again."""
+
+    assert _backfill(empty_app, 2023, 2023).exit_code == 0
+
+    server.config.error_rate = 1.0
+    result = _backfill(empty_app, 2023, 2024)
+    assert result.exit_code == 1
+    assert "2023 fixtures: already backfilled" in result.output
+    assert "2 payloads failed" in result.output
+    with empty_app.app_context():
+        jobs = _jobs()
+        assert [status for status, _message in jobs[('backfill-fixtures', '2024')]] == ['failed']
+        assert "500 Server Error" in jobs[('backfill-standings', '2024')][0][1]
+        assert not Fixture.by_season('2024', with_teams=False)
+
+    server.config.error_rate = 0.0
+    result = _backfill(empty_app, 2023, 2024)
+    assert result.exit_code == 0, result.output
+    assert "2023 standings: already backfilled" in result.output
+    with empty_app.app_context():
+        jobs = _jobs()
+        assert len(jobs[('backfill-fixtures', '2023')]) == 1
+        assert [status for status, _message in jobs[('backfill-fixtures', '2024')]] == [
+            'failed', 'finished']
+        assert len(Fixture.by_season('2024', with_teams=False)) == 30
+
+def test_backfill_restart(empty_app: Flask) -> None:
+    """Restarting backfills finished seasons again."""
+
+    assert _backfill(empty_app, 2023, 2023).exit_code == 0
+    assert _backfill(empty_app, 2023, 2023).output == "2023 fixtures: already backfilled\n" \
+        "2023 standings: already backfilled\nNothing to backfill.\n"
+    assert _backfill(empty_app, 2023, 2023, '--restart').exit_code == 0
+    with empty_app.app_context():
+        assert [len(jobs) for jobs in _jobs().values()] == [2, 2]
+        assert len(Fixture.by_season('2023', with_teams=False)) == 30
+
+def _backfill(app: Flask, first: int, last: int, *options: str) -> CliResult:
+    """Run the backfill command with two workers."""
+
+    return app.test_cli_runner().invoke(args=['backfill', str(first), str(last), '--workers', '2',
+                                              *options])
+
+def _jobs() -> dict[tuple[str, str], list[tuple[str, str]]]:
+    """Return the status and message of the jobs by kind and season, oldest first."""
+
+    jobs = {}
+    for job in db.session.execute(db.select(Job).join(Season).order_by(Job.id)).scalars():
+        jobs.setdefault((job.kind, job.season.season), []).append((job.status, job.message))
+    return jobs
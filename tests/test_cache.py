@@ -0,0 +1,109 @@
+"""Cache."""
+
+from typing import Callable
+from flask import Flask
+from flask.testing import FlaskClient
+from website import db
+from website.cache import FragmentCache, fragments
+from website.models import User, Tip, Season, DataVersion
+from website.utils import get_fixture_fragments, get_standings_fragment
+
+def test_least_recently_used_fragments_are_evicted() -> None:
+    """Fragments are evicted in least recently used order once the total size exceeds the
+    maximum size."""
+
+    cache = FragmentCache(max_size=10)
+    rendered = []
+
+    def get(key: str, fragment: str) -> str:
+        return cache.get(key, lambda: rendered.append(key) or fragment)
+
+    get('a', 'aaaa')
+    get('b', 'bbbb')
+    assert get('a', 'changed') == 'aaaa'
+    get('c', 'cccc')
+    assert get('a', 'changed') == 'aaaa'
+    assert get('b', 'BBBB') == 'BBBB'
+    assert rendered == ['a', 'b', 'c', 'b']
+    assert (cache.hits, cache.misses) == (2, 4)
+
+def test_fragment_size_is_bounded() -> None:
+    """Fragments larger than the maximum size are rendered but not cached, and the size function
+    gives the size of a fragment."""
+
+    cache = FragmentCache(max_size=10)
+    assert cache.get('large', lambda: 'x' * 11) == 'x' * 11
+    assert cache.get('large', lambda: 'y' * 11) == 'y' * 11
+
+    cache.get('list', lambda: ['abc', 'def'], size=lambda parts: sum(map(len, parts)))
+    cache.get('small', lambda: 'abcd')
+    assert cache.get('list', lambda: []) == ['abc', 'def']
+    cache.get('more', lambda: 'x')
+    assert cache.get('small', lambda: 'evicted') == 'evicted'
+    assert (cache.hits, cache.misses) == (1, 6)
+
+    cache.invalidate()
+    assert cache.get('list', lambda: []) == []
+
+def test_fragments_follow_data_versions(app: Flask, season: str) -> None:
+    """Fixture and standings fragments are rendered again once the fixtures or standings of their
+    season are bumped, and reused otherwise."""
+
+    with app.test_request_context():
+        info = Season.get_season_info(season)
+        user = User.by_username('user0')
+        hits, misses = fragments.hits, fragments.misses
+
+        def render() -> tuple[int, int]:
+            """Render the fragments and return the hits and misses since the start of the test."""
+
+            get_fixture_fragments(info, 'fixture_card', user)
+            get_standings_fragment(season)
+            return fragments.hits - hits, fragments.misses - misses
+
+        assert render() == (0, 2)
+        assert render() == (2, 2)
+        try:
+            for kind, expected in (('tips', 2), ('results', 2), ('standings', 4), ('fixtures', 5)):
+                DataVersion.bump(info.id, kind)
+                assert render()[1] == expected, kind
+        finally:
+            db.session.rollback()
+
+def test_fixture_cards_are_shared_by_users(app: Flask, client: FlaskClient,
+                                           login: Callable[[Flask, str], FlaskClient]) -> None:
+    """The fixtures page reuses the cached cards for every user while the tips shown on each card
+    follow the current tips."""
+
+    with app.app_context():
+        user0, user1 = User.by_username('user0'), User.by_username('user1')
+        tip = db.session.execute(
+            db.select(Tip).filter_by(user_id=user1.id)
+            .filter(Tip.fixture_id.in_(db.select(Tip.fixture_id).filter_by(user_id=user0.id)))
+            .limit(1)).scalar_one()
+        fixture_id, original = tip.fixture_id, tip.tip
+
+    assert f"user1: {original}" in _card(client.get('/fixtures').text, fixture_id)
+    misses = fragments.misses
+    login(app, 'user1').get('/fixtures')
+
+    changed = '1' if original != '1' else '2'
+    _set_tip(app, tip.id, changed)
+    try:
+        assert f"user1: {changed}" in _card(client.get('/fixtures').text, fixture_id)
+    finally:
+        _set_tip(app, tip.id, original)
+    assert fragments.misses == misses
+
+def _card(page: str, fixture_id: int) -> str:
+    """Return the text of the card of a fixture on a page with normalized whitespace."""
+
+    start = page.index(f'<div id="{fixture_id}"')
+    end = page.find('<div id="', start + 1)
+    return ' '.join(page[start:end if end != -1 else None].split())
+
+def _set_tip(app: Flask, tip_id: int, value: str) -> None:
+    with app.app_context():
+        db.session.get(Tip, tip_id).tip = value
+        DataVersion.bump(None, 'tips')
+        db.session.commit()
@@ -0,0 +1,108 @@
+"""Conditional requests."""
+
+from datetime import datetime, timedelta
+from typing import Callable
+import pytest
+
+from flask import Flask
+from flask.testing import FlaskClient
+from werkzeug.http import http_date
+from werkzeug.test import TestResponse
+from website import db
+from website.models import User, Season, DataVersion
+
+# Kinds of data each page depends on, and a kind it doesn't depend on
+PAGES = [
+    ('/fixtures', ('fixtures', 'tips'), 'standings'),
+    ('/standings/{season}', ('standings',), 'results'),
+    ('/stats/{season}', ('results', 'tips'), 'fixtures')
+]
+
+@pytest.mark.parametrize('path, kinds, other_kind', PAGES)
+def test_unchanged_page_is_not_modified(app: Flask, client: FlaskClient, season: str, path: str,
+                                        kinds: tuple[str, ...], other_kind: str) -> None:
+    """A page is not modified for its ETag or Last-Modified time until one of the kinds of data
+    it depends on is bumped."""
+
+    path = path.format(season=season)
+    for kind in kinds:
+        _bump(app, season, kind)
+    page = client.get(path)
+    assert page.status_code == 200
+    assert page.headers['ETag'] and page.last_modified is not None
+    assert page.cache_control.private
+
+    assert _get(client, path, page.headers['ETag']).status_code == 304
+    assert _get(client, path, modified_since=page.last_modified).status_code == 304
+    _bump(app, season, other_kind)
+    assert _get(client, path, page.headers['ETag']).status_code == 304
+
+    for kind in kinds:
+        _bump(app, season, kind)
+        modified = _get(client, path, page.headers['ETag'])
+        assert modified.status_code == 200
+        assert modified.headers['ETag'] != page.headers['ETag']
+        assert modified.last_modified > page.last_modified
+        assert _get(client, path, modified_since=page.last_modified).status_code == 200
+        assert _get(client, path, modified.headers['ETag']).status_code == 304
+        page = modified
+
+@pytest.mark.parametrize('path', [path for path, *_ in PAGES])
+def test_etag_depends_on_user(app: Flask, login: Callable[[Flask, str], FlaskClient],
+                              season: str, path: str) -> None:
+    """Users get different ETags for the same page, and so does a user that becomes an admin."""
+
+    path = path.format(season=season)
+    etags = {username: login(app, username).get(path).headers['ETag']
+             for username in ('user0', 'user1', 'admin')}
+    assert len(set(etags.values())) == 3
+
+    _set_admin(app, 'user1', True)
+    try:
+        assert login(app, 'user1').get(path).headers['ETag'] != etags['user1']
+    finally:
+        _set_admin(app, 'user1', False)
+
+@pytest.mark.parametrize('path', [path for path, *_ in PAGES])
+def test_no_validators_with_pending_flashes(client: FlaskClient, season: str, path: str) -> None:
+    """A page is rendered without validators while a flashed message is pending."""
+
+    path = path.format(season=season)
+    etag = client.get(path).headers['ETag']
+    with client.session_transaction() as session:
+        session['_flashes'] = [('message', "Sparat")]
+
+    page = _get(client, path, etag)
+    assert page.status_code == 200
+    assert 'ETag' not in page.headers and page.last_modified is None
+    assert page.cache_control.no_store
+    assert _get(client, path, etag).status_code == 304
+
+def _get(client: FlaskClient, path: str, etag: str | None = None,
+         modified_since: datetime | None = None) -> TestResponse:
+    """Request a page conditionally with an ETag or a Last-Modified time."""
+
+    headers = {}
+    if etag is not None:
+        headers['If-None-Match'] = etag
+    if modified_since is not None:
+        headers['If-Modified-Since'] = http_date(modified_since)
+    return client.get(path, headers=headers)
+
+def _bump(app: Flask, season: str, kind: str) -> None:
+    """Bump a kind of data in a season. It is updated a second after the latest update in the
+    season, since Last-Modified has a resolution of seconds."""
+
+    with app.app_context():
+        season_id = Season.by_season(season).id
+        DataVersion.bump(season_id, kind)
+        db.session.expire_all()
+        versions = DataVersion.by_season_id(season_id)
+        latest = max(version.last_update for version in versions.values())
+        versions[kind].last_update = latest + timedelta(seconds=1)
+        db.session.commit()
+
+def _set_admin(app: Flask, username: str, is_admin: bool) -> None:
+    with app.app_context():
+        User.by_username(username).is_admin = is_admin
+        db.session.commit()
@@ -0,0 +1,112 @@
+"""Jobs."""
+
+import threading
+import time
+
+from typing import Callable, Iterator
+import pytest
+
+from flask import Flask
+from benchmarks.data import DataConfig
+from website import db
+from website.models import Job, Season, SeasonInfo, DataVersion
+from website.jobs import submit_job
+
+# Seconds to wait for a job to finish
+TIMEOUT = 10
+
+@pytest.fixture(scope='module')
+def jobs_app(seeded_app: Callable[[DataConfig], Flask]) -> Flask:
+    """App with its own small database, since jobs commit their changes."""
+
+    return seeded_app(DataConfig(users=2, played_rounds=2))
+
+@pytest.fixture
+def jobs_context(jobs_app: Flask) -> Iterator[SeasonInfo]:
+    """App context of the jobs app. Yield the active season."""
+
+    with jobs_app.app_context():
+        yield Season.get_season_data()['active_season']
+        db.session.rollback()
+
+def test_job_commits_task(jobs_context: SeasonInfo) -> None:
+    """A finished job commits the work of its task together with its status."""
+
+    season = jobs_context
+    before = _version(season)
+
+    def task(task_season: Season, progress: Callable[[int], None]) -> str:
+        DataVersion.bump(task_season.id, 'results')
+        progress(50)
+        db.session.commit()
+        return "Done."
+
+    job = _wait(submit_job('results', season, task))
+    assert (job.status, job.progress, job.message) == ('finished', 100, "Done.")
+    assert _version(season) == before + 1
+
+def test_failed_job_rolls_back_task(jobs_context: SeasonInfo) -> None:
+    """A failed job rolls back the work of its task, including work flushed before it reported
+    progress, and records the error."""
+
+    season = jobs_context
+    before = _version(season)
+
+    def task(task_season: Season, progress: Callable[[int], None]) -> str:
+        DataVersion.bump(task_season.id, 'results')
+        db.session.flush()
+        progress(50)
+        raise RuntimeError("API down")
+
+    started = time.monotonic()
+    job = _wait(submit_job('results', season, task))
+    # Progress is skipped rather than waiting for the write lock held by the task
+    assert time.monotonic() - started < 3
+    assert (job.status, job.message) == ('failed', "RuntimeError: API down")
+    assert _version(season) == before
+
+def test_progress_is_visible_while_running(jobs_context: SeasonInfo) -> None:
+    """Progress is visible to other sessions while the task is still running, and only one job per
+    season is queued or running at a time."""
+
+    season = jobs_context
+    reported = threading.Event()
+    release = threading.Event()
+
+    def task(_season: Season, progress: Callable[[int], None]) -> str:
+        progress(50)
+        reported.set()
+        release.wait(TIMEOUT)
+        return "Done."
+
+    job = submit_job('fixtures', season, task)
+    try:
+        assert reported.wait(TIMEOUT)
+        db.session.expire_all()
+        running = Job.by_id(job.id)
+        assert (running.status, running.progress) == ('running', 50)
+        assert submit_job('standings', season, task) is None
+    finally:
+        release.set()
+
+    assert _wait(job).status == 'finished'
+    assert _wait(submit_job('standings', season, lambda *_args: "Done.")).status == 'finished'
+
+def _version(season: SeasonInfo) -> int:
+    """Return the results version of a season, or 0 if it has never been bumped."""
+
+    db.session.expire_all()
+    version = DataVersion.by_season_id(season.id).get('results')
+    return 0 if version is None else version.version
+
+def _wait(job: Job) -> Job:
+    """Wait for a job to finish or fail and return it."""
+
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        job = Job.by_id(job.id)
+        if job.status in ('finished', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job.id} didn't finish within {TIMEOUT} seconds")
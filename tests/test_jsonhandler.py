@@ -0,0 +1,106 @@
+"""Import and export of tips."""
+
+import json
+
+from pathlib import Path
+from typing import Callable, Iterator
+import pytest
+
+from flask import Flask
+from sqlalchemy import delete
+import jsonhandler
+from benchmarks.data import DataConfig
+from website import db
+from website.models import User, Fixture, Tip, Season
+
+@pytest.fixture(scope='module')
+def import_app(seeded_app: Callable[[DataConfig], Flask], data_config: DataConfig) -> Flask:
+    """App with a database seeded like the app fixture, which the tests import tips into."""
+
+    return seeded_app(data_config)
+
+@pytest.fixture
+def empty_tips(import_app: Flask, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """App context of the import app without any tips, which imports in chunks of 7 tips."""
+
+    monkeypatch.setattr(jsonhandler, 'CHUNK_SIZE', 7)
+    with import_app.app_context():
+        db.session.execute(delete(Tip))
+        db.session.commit()
+        yield
+
+@pytest.mark.usefixtures('empty_tips')
+def test_round_trip(app: Flask, tmp_path: Path) -> None:
+    """Tips exported from one database and imported into another are the same, and importing
+    them again changes nothing."""
+
+    path = str(tmp_path / 'tips.ndjson')
+    with app.app_context():
+        expected = _tips()
+        assert jsonhandler.write_tip(path) == len(expected)
+
+    with open(path, encoding='utf-8') as file:
+        records = [json.loads(line) for line in file]
+    assert records == sorted(records, key=lambda record: (record['user'], record['fixture_id']))
+
+    assert jsonhandler.read_tip(path) == {'inserted': len(expected), 'updated': 0, 'skipped': 0}
+    assert _tips() == expected
+    assert jsonhandler.read_tip(path) == {'inserted': 0, 'updated': 0, 'skipped': 0}
+
+    # Results of the imported tips are updated by the next scoring
+    season = Season.get_season_data()['active_season']
+    tipped = set(db.session.execute(db.select(Fixture.fixture_id)
+                                    .join(Tip, Tip.fixture_id == Fixture.fixture_id)
+                                    .filter(Fixture.season_id == season.id)).scalars())
+    assert tipped
+    assert tipped <= {row.fixture_id for row in Fixture.unscored_by_season_id(season.id)}
+
+@pytest.mark.usefixtures('empty_tips')
+def test_skipped_tips(tmp_path: Path) -> None:
+    """Tips of unknown users or fixtures and invalid tips are skipped, and a later tip for the same
+    user and fixture replaces an earlier one."""
+
+    fixture_ids = db.session.execute(db.select(Fixture.fixture_id).limit(2)).scalars().all()
+    lines = [
+        {'user': 'user0', 'fixture_id': fixture_ids[0], 'tip': '1'},
+        {'user': 'user0', 'fixture_id': fixture_ids[1], 'tip': 'X'},
+        {'user': 'user0', 'fixture_id': fixture_ids[1], 'tip': '2'},
+        {'user': 'nobody', 'fixture_id': fixture_ids[0], 'tip': '1'},
+        {'user': 'user1', 'fixture_id': -1, 'tip': '1'},
+        {'user': 'user1', 'fixture_id': fixture_ids[0], 'tip': '3'}
+    ]
+    path = tmp_path / 'tips.ndjson'
+    path.write_text('\n'.join(json.dumps(line) for line in lines) + '\n\n', encoding='utf-8')
+
+    assert jsonhandler.read_tip(str(path)) == {'inserted': 2, 'updated': 0, 'skipped': 4}
+    assert _tips() == {('user0', fixture_ids[0], '1'), ('user0', fixture_ids[1], '2')}
+
+@pytest.mark.usefixtures('empty_tips')
+def test_legacy_tip_file(tmp_path: Path) -> None:
+    """The legacy tip.json document is imported, and changed tips are updated."""
+
+    fixture_ids = db.session.execute(db.select(Fixture.fixture_id).limit(2)).scalars().all()
+    document = {'users': [
+        {'name': 'user0', 'tips': [{'fixture_id': fixture_ids[0], 'tip': '1'},
+                                   {'fixture_id': fixture_ids[1], 'tip': 'X'}]},
+        {'name': 'user1', 'tips': [{'fixture_id': fixture_ids[0], 'tip': '2'},
+                                   {'fixture_id': -1, 'tip': '2'}]},
+        {'name': 'nobody', 'tips': [{'fixture_id': fixture_ids[0], 'tip': '1'}]}
+    ]}
+    path = tmp_path / 'tip.json'
+    path.write_text(json.dumps(document), encoding='utf-8')
+
+    assert jsonhandler.read_legacy_tip(str(path)) == {'inserted': 3, 'updated': 0, 'skipped': 2}
+    assert _tips() == {('user0', fixture_ids[0], '1'), ('user0', fixture_ids[1], 'X'),
+                       ('user1', fixture_ids[0], '2')}
+
+    document['users'][0]['tips'][1]['tip'] = '2'
+    path.write_text(json.dumps(document), encoding='utf-8')
+    assert jsonhandler.read_legacy_tip(str(path)) == {'inserted': 0, 'updated': 1, 'skipped': 2}
+    assert ('user0', fixture_ids[1], '2') in _tips()
+
+def _tips() -> set[tuple[str, int, str]]:
+    """Return the username, fixture ID and tip of all tips."""
+
+    return set(db.session.execute(db.select(User.username, Tip.fixture_id, Tip.tip)
+                                  .join(Tip.user)).all())
@@ -0,0 +1,65 @@
+"""Kickoffs."""
+
+from datetime import datetime, time
+
+from website.utils import Kickoff, KickoffIndex
+
+MONDAY = datetime(2025, 8, 11)
+SUNDAY_END = datetime.combine(datetime(2025, 8, 17), time.max)
+
+KICKOFFS = [
+    Kickoff(datetime(2025, 8, 10, 23, 59), 1, 1, 'FT'),
+    Kickoff(MONDAY, 2, 1, 'FT'),
+    Kickoff(datetime(2025, 8, 12, 20, 0), 3, 1, 'PST'),
+    Kickoff(datetime(2025, 8, 13, 20, 0), 4, 2, 'TBD'),
+    Kickoff(datetime(2025, 8, 17, 23, 59, 59), 5, 2, 'NS'),
+    Kickoff(datetime(2025, 8, 18), 6, 3, 'NS'),
+    Kickoff(None, 7, 3, 'TBD')
+]
+
+def test_empty_season() -> None:
+    """An index without fixtures answers every lookup with nothing."""
+
+    index = KickoffIndex([])
+    assert index.next_upcoming(MONDAY) is None
+    assert index.last() is None
+    assert index.current_round(MONDAY) is None
+    assert not index.in_window(MONDAY, SUNDAY_END)
+
+def test_unscheduled_fixtures() -> None:
+    """Fixtures without a kickoff time are left out of the index."""
+
+    index = KickoffIndex([Kickoff(None, 7, 3, 'TBD')])
+    assert index.next_upcoming(MONDAY) is None
+    assert index.last() is None
+    assert 7 not in [kickoff.fixture_id for kickoff in KickoffIndex(KICKOFFS).kickoffs]
+
+def test_next_upcoming() -> None:
+    """The next upcoming fixture is the first open fixture at or after the given time. Started
+    and postponed fixtures are skipped, and fixtures to be decided are open."""
+
+    index = KickoffIndex(list(reversed(KICKOFFS)))
+    assert index.next_upcoming(datetime(2025, 8, 1)).fixture_id == 4
+    assert index.next_upcoming(datetime(2025, 8, 13, 20, 0)).fixture_id == 4
+    assert index.next_upcoming(datetime(2025, 8, 13, 20, 1)).fixture_id == 5
+    assert index.next_upcoming(datetime(2025, 8, 18)).fixture_id == 6
+    assert index.next_upcoming(datetime(2025, 8, 18, 0, 1)) is None
+
+def test_last_and_current_round() -> None:
+    """The current round is the round of the next upcoming fixture, or of the last fixture once
+    all fixtures have started."""
+
+    index = KickoffIndex(KICKOFFS)
+    assert index.last().fixture_id == 6
+    assert index.current_round(datetime(2025, 8, 1)) == 2
+    assert index.current_round(datetime(2025, 8, 17, 23, 59, 59, 1)) == 3
+    assert index.current_round(datetime(2025, 9, 1)) == 3
+
+def test_in_window_bounds() -> None:
+    """A window includes kickoffs on both of its bounds and nothing outside them."""
+
+    index = KickoffIndex(KICKOFFS)
+    assert [kickoff.fixture_id for kickoff in index.in_window(MONDAY, SUNDAY_END)] == [2, 3, 4, 5]
+    assert [kickoff.fixture_id for kickoff in index.in_window(datetime(2025, 8, 18),
+                                                              datetime(2025, 8, 18))] == [6]
+    assert not index.in_window(datetime(2025, 8, 14), datetime(2025, 8, 17))
@@ -0,0 +1,25 @@
+"""Leaderboard."""
+
+import pytest
+
+from flask.testing import FlaskClient
+from website import LEADERBOARD_MAX
+
+# Number of users with an entry in the seeded database
+USERS = 5
+
+@pytest.mark.parametrize('query, top, around', [
+    ('?limit=2', 2, None),
+    ('?limit=0&around=0', 0, 1),
+    ('?limit=-1&around=-1', 0, 1),
+    (f"?limit={LEADERBOARD_MAX + 1}&around={LEADERBOARD_MAX + 1}", USERS, USERS)
+])
+def test_leaderboard_limits(client: FlaskClient, season: str, query: str, top: int,
+                            around: int | None) -> None:
+    """The number of returned entries is clamped between 0 and LEADERBOARD_MAX."""
+
+    response = client.get(f"/leaderboard/{season}{query}")
+    assert response.status_code == 200
+    assert len(response.get_json()['top']) == top
+    if around is not None:
+        assert len(response.get_json()['around_me']) == around
@@ -0,0 +1,265 @@
+"""Migrations."""
+
+import json
+import sqlite3
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+import pytest
+
+from flask import Flask
+from sqlalchemy import inspect, text
+from website import create_app, db
+from website.migrations import MIGRATIONS, run_migrations
+from website.models import User, Season, SchemaVersion
+from website.utils import calculate_user_result
+
+# Schema of the tables that existed before the first migration
+BASELINE_SCHEMA = """
+CREATE TABLE team (
+    team_id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    logo VARCHAR(200),
+    PRIMARY KEY (team_id)
+);
+CREATE TABLE season (
+    id INTEGER NOT NULL,
+    season VARCHAR(4) NOT NULL,
+    display_name VARCHAR(10) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (season),
+    UNIQUE (display_name)
+);
+CREATE TABLE user (
+    id VARCHAR(36) NOT NULL,
+    username VARCHAR(100) NOT NULL,
+    password VARCHAR(500) NOT NULL,
+    is_admin BOOLEAN NOT NULL,
+    email VARCHAR(100),
+    timestamp DATETIME NOT NULL,
+    favorite_team_id INTEGER,
+    PRIMARY KEY (id),
+    UNIQUE (username),
+    FOREIGN KEY(favorite_team_id) REFERENCES team (team_id)
+);
+CREATE TABLE fixture (
+    fixture_id INTEGER NOT NULL,
+    season_id INTEGER NOT NULL,
+    round INTEGER,
+    date_time DATETIME,
+    status VARCHAR(10) NOT NULL,
+    home_team_id INTEGER NOT NULL,
+    away_team_id INTEGER NOT NULL,
+    home_score INTEGER,
+    away_score INTEGER,
+    PRIMARY KEY (fixture_id),
+    FOREIGN KEY(season_id) REFERENCES season (id),
+    FOREIGN KEY(home_team_id) REFERENCES team (team_id),
+    FOREIGN KEY(away_team_id) REFERENCES team (team_id)
+);
+CREATE TABLE team_standing (
+    id INTEGER NOT NULL,
+    season_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    games_played INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    goals_scored INTEGER NOT NULL,
+    goals_conceded INTEGER NOT NULL,
+    form VARCHAR(5) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    promotion VARCHAR(50),
+    last_update DATETIME NOT NULL,
+    team_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(season_id) REFERENCES season (id),
+    FOREIGN KEY(team_id) REFERENCES team (team_id)
+);
+CREATE TABLE general (
+    id INTEGER NOT NULL,
+    season_id INTEGER NOT NULL,
+    last_update DATETIME,
+    remaining_requests INTEGER,
+    allow_late_modification BOOLEAN NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(season_id) REFERENCES season (id)
+);
+CREATE TABLE tip (
+    id INTEGER NOT NULL,
+    fixture_id INTEGER NOT NULL,
+    tip VARCHAR(1) NOT NULL,
+    correct INTEGER NOT NULL,
+    user_id VARCHAR(36) NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE result (
+    id INTEGER NOT NULL,
+    season_id INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    finished INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    incorrect INTEGER NOT NULL,
+    tip_1 INTEGER NOT NULL,
+    "tip_X" INTEGER NOT NULL,
+    tip_2 INTEGER NOT NULL,
+    round_stats TEXT NOT NULL,
+    placements_total INTEGER NOT NULL,
+    last_update DATETIME NOT NULL,
+    user_id VARCHAR(36) NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(season_id) REFERENCES season (id),
+    FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE result_team_association (
+    result_id INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (result_id, team_id),
+    FOREIGN KEY(result_id) REFERENCES result (id),
+    FOREIGN KEY(team_id) REFERENCES team (team_id)
+);
+"""
+# Indexes created by the migrations per table
+MIGRATED_INDEXES = {
+    'tip': {'ux_tip_user_id_fixture_id', 'ix_tip_fixture_id'},
+    'fixture': {'ix_fixture_season_id_date_time'},
+    'team_standing': {'ux_team_standing_season_id_team_id', 'ix_team_standing_season_id_rank'}
+}
+ROUND_COLUMNS = ('result_id', 'round', 'tips', 'finished', 'correct', 'tip_1', 'tip_X', 'tip_2')
+
+@pytest.fixture
+def baseline(app: Flask, tmp_path: Path) -> str:
+    """Path of a database with the baseline schema and the data of the app fixture, plus a
+    duplicate of a tip and a team standing. The round stats JSON of the results holds the tips and
+    correct tips per round of the per-user calculation it used to be written by."""
+
+    source = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    with app.app_context():
+        season = db.session.get(Season, Season.get_season_data()['active_season'].id)
+        round_stats = [(json.dumps({stats.round: {'tips': stats.tips, 'correct': stats.correct}
+                                    for stats in calculate_user_result(user, season).rounds}),
+                        user.id, season.id) for user in User.all()]
+        db.session.rollback()
+
+    path = str(tmp_path / 'baseline.db')
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript(BASELINE_SCHEMA)
+        connection.execute("ATTACH DATABASE ? AS source", (source,))
+        tables = connection.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")
+        for (table,) in tables.fetchall():
+            columns = [f'"{row[1]}"' for row in connection.execute(
+                f"PRAGMA main.table_info({table})") if row[1] != 'round_stats']
+            values = list(columns)
+            if table == 'result':
+                columns.append('round_stats')
+                values.append("''")
+            connection.execute(f"INSERT INTO main.{table} ({', '.join(columns)}) "
+                               f"SELECT {', '.join(values)} FROM source.{table}")
+        connection.executemany("UPDATE main.result SET round_stats = ? "
+                               "WHERE user_id = ? AND season_id = ?", round_stats)
+
+        # Duplicates of the first tip and team standing, which the migrations keep since they are
+        # the most recent
+        connection.execute("INSERT INTO main.tip (fixture_id, tip, correct, user_id) "
+                           "SELECT fixture_id, tip, correct, user_id FROM main.tip "
+                           "ORDER BY id LIMIT 1")
+        connection.execute("INSERT INTO main.team_standing "
+                           "SELECT NULL, season_id, rank, points, games_played, wins, draws, "
+                           "losses, goals_scored, goals_conceded, form, status, promotion, "
+                           "last_update, team_id FROM main.team_standing ORDER BY id LIMIT 1")
+        connection.commit()
+    finally:
+        connection.close()
+    return path
+
+def test_migrations_upgrade_baseline(app: Flask, baseline: str) -> None:
+    """The migrations upgrade a database with the baseline schema, remove duplicates before
+    creating unique indexes, and rebuild the result rounds. Running them again changes
+    nothing."""
+
+    with app.app_context():
+        expected_tips = db.session.execute(text("SELECT COUNT(*) FROM tip")).scalar()
+        expected_rounds = _rows('result_round', ROUND_COLUMNS)
+    duplicate_tip, duplicate_standing = _latest_rows(baseline)
+
+    with _upgraded(baseline):
+        assert SchemaVersion.applied_versions() == {version for version, *_ in MIGRATIONS}
+        inspector = inspect(db.engine)
+        for table, names in MIGRATED_INDEXES.items():
+            assert names <= {index['name'] for index in inspector.get_indexes(table)}
+        assert 'round_stats' not in {column['name'] for column in
+                                     inspector.get_columns('result')}
+        assert {'scored_round', 'scored_outcome'} <= {column['name'] for column in
+                                                      inspector.get_columns('fixture')}
+
+        assert db.session.execute(text("SELECT COUNT(*) FROM tip")).scalar() == expected_tips
+        assert _latest_rows(baseline) == (duplicate_tip, duplicate_standing)
+        assert _rows('result_round', ROUND_COLUMNS) == expected_rounds
+
+        before = _snapshot()
+        assert run_migrations() == []
+        assert _snapshot() == before
+
+def test_result_rounds_match_round_stats(baseline: str) -> None:
+    """The result rounds rebuilt from the tips hold the same tips and correct tips as the round
+    stats JSON they replace."""
+
+    connection = sqlite3.connect(baseline)
+    try:
+        round_stats = {result_id: json.loads(stats) for result_id, stats in
+                       connection.execute("SELECT id, round_stats FROM result")}
+    finally:
+        connection.close()
+    assert any(round_stats.values())
+
+    with _upgraded(baseline):
+        rounds = {result_id: {} for result_id in round_stats}
+        for result_id, round_number, tips, correct in _rows(
+                'result_round', ('result_id', 'round', 'tips', 'correct')):
+            rounds[result_id][str(round_number)] = {'tips': tips, 'correct': correct}
+        assert rounds == round_stats
+
+@contextmanager
+def _upgraded(path: str) -> Iterator[None]:
+    """Create an app for a database, which applies the migrations, and push its app context."""
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}", 'TESTING': True})
+    with app.app_context():
+        try:
+            yield
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+def _latest_rows(path: str) -> tuple[Any, Any]:
+    """Return the most recent tip and team standing in a database."""
+
+    connection = sqlite3.connect(path)
+    try:
+        return (connection.execute("SELECT * FROM tip ORDER BY id DESC LIMIT 1").fetchone(),
+                connection.execute("SELECT * FROM team_standing ORDER BY id DESC LIMIT 1")
+                          .fetchone())
+    finally:
+        connection.close()
+
+def _rows(table: str, columns: tuple[str, ...]) -> list[Any]:
+    """Return the given columns of all rows of a table in order."""
+
+    names = ', '.join(f'"{column}"' for column in columns)
+    return db.session.execute(text(f"SELECT {names} FROM {table} ORDER BY {names}")).all()
+
+def _snapshot() -> dict[str, Any]:
+    """Return the schema and the rows of all tables."""
+
+    inspector = inspect(db.engine)
+    snapshot = {}
+    for table in inspector.get_table_names():
+        columns = tuple(column['name'] for column in inspector.get_columns(table))
+        indexes = sorted(index['name'] for index in inspector.get_indexes(table))
+        snapshot[table] = (columns, indexes, _rows(table, columns))
+    return snapshot
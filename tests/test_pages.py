@@ -0,0 +1,27 @@
+"""Pages."""
+
+from flask import Flask
+from flask.testing import FlaskClient
+from website import db
+from website.cache import season_context
+from website.models import General, Season
+
+def test_pages_without_fixtures(app: Flask, client: FlaskClient) -> None:
+    """The fixture pages render for an active season without fixtures."""
+
+    with app.app_context():
+        previous_id = General.get().season_id
+        season = Season.create('1999')
+        db.session.flush()
+        General.get().season_id = season.id
+        db.session.commit()
+    season_context.invalidate()
+    try:
+        for path in ('/fixtures', '/tip/view', '/'):
+            assert client.get(path).status_code == 200
+    finally:
+        with app.app_context():
+            General.get().season_id = previous_id
+            db.session.delete(Season.by_season('1999'))
+            db.session.commit()
+        season_context.invalidate()
@@ -0,0 +1,52 @@
+"""Parsers."""
+
+from typing import Any
+
+from benchmarks.data import DataConfig, fixtures_payload, standings_payload
+from website.models import Season, Team
+from website.parsers import parse_fixtures, parse_standings
+from website.schemas import FixtureSchema, TeamSchema
+
+def _values(parsed: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in parsed.items()
+            if value is not None and key != 'last_update'}
+
+def test_parse_fixtures_matches_schema(app_context: None, data_config: DataConfig) -> None:
+    """The fixture parser returns the same values as FixtureSchema."""
+
+    season = Season.get_season_data()['active_season']
+    fixtures_json = fixtures_payload(season, data_config)['response']
+    fixture_schema = FixtureSchema(context={"season": season})
+
+    parsed = parse_fixtures(fixtures_json, season.id)
+    assert len(parsed) == len(fixtures_json)
+    for fixture_json, fixture in zip(fixtures_json, parsed):
+        assert _values(fixture) == _values(fixture_schema.load(fixture_json).column_values())
+
+def test_parse_standings_matches_schema(app_context: None, data_config: DataConfig) -> None:
+    """The standings parser returns the same team and standing values as TeamSchema."""
+
+    season = Season.get_season_data()['active_season']
+    standings_json = standings_payload(season, data_config)['response'][0]['league']['standings'][0]
+    team_schema = TeamSchema(context={"season": season})
+
+    parsed = parse_standings(standings_json, season.id)
+    assert len(parsed) == len(standings_json)
+    for team_json, (team, standing) in zip(standings_json, parsed):
+        expected_team, expected_standing = team_schema.load(team_json)
+        assert _values(team) == _values(expected_team.column_values())
+        assert _values(standing) == _values(expected_standing.column_values())
+
+def test_standings_upsert_skips_unchanged(app_context: None, data_config: DataConfig) -> None:
+    """Writing the same standings twice only updates them the first time."""
+
+    season = Season.get_season_data()['active_season']
+    standings_json = standings_payload(season, data_config)['response'][0]['league']['standings'][0]
+
+    Team.bulk_create_or_update_rows(parse_standings(standings_json, season.id))
+    assert (Team.bulk_create_or_update_rows(parse_standings(standings_json, season.id))
+            == {'inserted': 0, 'updated': 0})
+
+    standings_json[0]['points'] += 1
+    assert (Team.bulk_create_or_update_rows(parse_standings(standings_json, season.id))
+            == {'inserted': 0, 'updated': 1})
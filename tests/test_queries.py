@@ -0,0 +1,59 @@
+"""Queries."""
+
+from typing import Callable
+import pytest
+
+from flask import Flask
+from flask.testing import FlaskClient
+from benchmarks.data import DataConfig
+from website.cache import season_context, kickoff_indexes, fragments
+
+# Maximum number of queries per page with empty caches. The pages load each kind of row with a
+# fixed number of queries, so the bounds don't depend on the number of users, fixtures or tips.
+MAX_QUERIES = {
+    '/': 7,
+    '/fixtures': 10,
+    '/tip/view': 9,
+    '/standings/{season}': 8,
+    '/stats/{season}': 10,
+    '/tips': 8
+}
+
+@pytest.fixture(scope='module')
+def large_app(seeded_app: Callable[[DataConfig], Flask]) -> Flask:
+    """App with four times the users of the default database and more played rounds."""
+
+    return seeded_app(DataConfig(users=20, played_rounds=25))
+
+@pytest.mark.parametrize('path', MAX_QUERIES)
+def test_page_query_count(client: FlaskClient, season: str, path: str) -> None:
+    """Each page stays within its query bound with empty caches, and doesn't run more queries once
+    the caches are filled."""
+
+    counts = _query_counts(client, path.format(season=season))
+    assert counts[0] <= MAX_QUERIES[path]
+    assert counts[1] <= counts[0]
+
+@pytest.mark.parametrize('path', MAX_QUERIES)
+def test_page_query_count_is_constant(app: Flask, large_app: Flask,
+                                      login: Callable[[Flask, str], FlaskClient], season: str,
+                                      path: str) -> None:
+    """Each page runs the same number of queries on a database with more users and tips."""
+
+    path = path.format(season=season)
+    assert (_query_counts(login(app, 'user0'), path)
+            == _query_counts(login(large_app, 'user0'), path))
+
+def _query_counts(client: FlaskClient, path: str) -> list[int]:
+    """Return the number of queries of a page with empty caches and with filled caches."""
+
+    season_context.invalidate()
+    kickoff_indexes.invalidate()
+    fragments.invalidate()
+
+    counts = []
+    for _ in range(2):
+        response = client.get(path)
+        assert response.status_code == 200
+        counts.append(int(response.headers['X-Query-Count']))
+    return counts
@@ -0,0 +1,145 @@
+"""Scoring."""
+
+from collections import defaultdict
+from typing import Any, Callable
+from sqlalchemy import event
+
+from website import db
+from website.models import User, Fixture, Tip, Result, ResultRound, Season
+from website.scoring import (ROUND_STATS, calculate_season_results, update_season_results,
+                             _write_rounds)
+from website.utils import calculate_user_result
+
+RESULT_COLUMNS = ('total', 'finished', 'correct', 'incorrect', 'tip_1', 'tip_X', 'tip_2')
+
+def test_season_results_match_user_results(app_context: None) -> None:
+    """The season results and round stats match the per-user calculation for every user."""
+
+    season = Season.get_season_data()['active_season']
+    results = {result.user_id: result for result in calculate_season_results(season)}
+
+    users = [user for user in User.all() if user.username != 'admin']
+    assert set(results) == {user.id for user in users}
+    assert all(result.finished for result in results.values())
+    rounds = _rounds(season)
+    for user in users:
+        expected = calculate_user_result(user, season)
+        assert _columns(results[user.id]) == _columns(expected)
+        assert rounds[user.id] == {stats.round: (stats.tips, stats.finished, stats.correct)
+                                   for stats in expected.rounds}
+
+def _finish(fixtures: list[Fixture]) -> None:
+    for index, fixture in enumerate(fixtures):
+        fixture.status = 'FT'
+        fixture.home_score, fixture.away_score = index % 3, 1
+
+def _correct_scores(fixtures: list[Fixture]) -> None:
+    for fixture in fixtures:
+        fixture.home_score, fixture.away_score = fixture.away_score, fixture.home_score + 1
+
+def _move(fixtures: list[Fixture]) -> None:
+    for fixture in fixtures:
+        fixture.round += 7
+
+def _change_tips(fixtures: list[Fixture]) -> None:
+    for index, user in enumerate(User.all()):
+        tips = {fixture.fixture_id: '12X'[(index + fixture.fixture_id) % 3] for fixture in fixtures}
+        Tip.bulk_create_or_update(user, tips, True)
+
+def _postpone(fixtures: list[Fixture]) -> None:
+    for fixture in fixtures:
+        fixture.status = 'PST'
+        fixture.home_score = fixture.away_score = None
+
+# Changes applied to some fixtures of a round, in order
+CHANGES: list[tuple[int, Callable[[list[Fixture]], None]]] = [
+    (11, _finish),
+    (3, _correct_scores),
+    (4, _move),
+    (2, _change_tips),
+    (15, _change_tips),
+    (11, _correct_scores),
+    (5, _postpone),
+    (12, _move),
+    (9, _change_tips)
+]
+
+def test_update_matches_full_calculation(app_context: None) -> None:
+    """Updating the results after each change to scores, rounds and tips gives the same results,
+    round stats and tip statuses as a full calculation."""
+
+    season = Season.get_season_data()['active_season']
+    assert update_season_results(season) == []
+
+    for round_number, change in CHANGES:
+        fixtures = db.session.execute(db.select(Fixture)
+                                      .filter_by(season_id=season.id, round=round_number)
+                                      .order_by(Fixture.fixture_id)
+                                      .limit(3)).scalars().all()
+        change(fixtures)
+        db.session.flush()
+
+        update_season_results(season)
+        updated = _snapshot(season)
+        calculate_season_results(season)
+        assert updated == _snapshot(season), change.__name__
+        assert update_season_results(season) == []
+
+def test_write_rounds_writes_changes_only(app_context: None) -> None:
+    """Writing round stats inserts new rounds, updates changed rounds, deletes missing rounds of
+    the given users and leaves everything else untouched."""
+
+    season = Season.get_season_data()['active_season']
+    results = {result.user_id: result for result in Result.by_season_id(season.id)}
+    existing = ResultRound.rows_by_season_id(season.id)
+    rows = defaultdict(dict)
+    for row in existing:
+        rows[row.user_id][row.round] = row
+    changed, emptied, *others = sorted(rows)
+
+    stats = {round_number: {key: getattr(row, key) for key in ROUND_STATS}
+             for round_number, row in rows[changed].items()}
+    updated, deleted = sorted(stats)[:2]
+    stats[updated]['correct'] += 1
+    del stats[deleted]
+    stats[99] = dict.fromkeys(ROUND_STATS, 0) | {'tips': 1}
+
+    statements = []
+
+    def record(_connection, _cursor, statement, parameters, _context, executemany) -> None:
+        statements.append((statement.split()[0], len(parameters) if executemany else 1))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        _write_rounds(results, {changed: stats, emptied: {}}, existing)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert sorted(statements) == [('DELETE', 1), ('INSERT', 1), ('UPDATE', 1)]
+
+    after = defaultdict(dict)
+    for row in ResultRound.rows_by_season_id(season.id):
+        after[row.user_id][row.round] = row
+    assert {round_number: {key: getattr(row, key) for key in ROUND_STATS}
+            for round_number, row in after[changed].items()} == stats
+    assert {round_number: row.id for round_number, row in after[changed].items()
+            if round_number != 99} == {round_number: row.id for round_number, row
+                                        in rows[changed].items() if round_number != deleted}
+    assert emptied not in after
+    assert all(after[user_id] == rows[user_id] for user_id in others)
+
+def _snapshot(season: Season) -> tuple[Any, ...]:
+    db.session.flush()
+    results = {result.user_id: _columns(result) for result in Result.by_season_id(season.id)}
+    rounds = {(row.user_id, row.round): tuple(getattr(row, key) for key in ROUND_STATS)
+              for row in ResultRound.rows_by_season_id(season.id)}
+    tips = dict(db.session.execute(db.select(Tip.id, Tip.correct)).all())
+    return results, rounds, tips
+
+def _columns(result: Result) -> tuple[int, ...]:
+    return tuple(getattr(result, column) for column in RESULT_COLUMNS)
+
+def _rounds(season: Season) -> dict[str, dict[int, tuple[int, int, int]]]:
+    rounds = defaultdict(dict)
+    for row in ResultRound.rows_by_season_id(season.id):
+        rounds[row.user_id][row.round] = (row.tips, row.finished, row.correct)
+    return rounds
@@ -0,0 +1,79 @@
+"""Tips."""
+
+import json
+
+from datetime import datetime, timedelta
+import pytest
+
+from flask.testing import FlaskClient
+from website import db
+from website.models import Fixture, Tip, User, Season
+
+@pytest.mark.parametrize('body', [
+    'not json',
+    '{"fixtureId": 1, "value": "1"}',
+    '[1]',
+    '[{"value": "1"}]',
+    '[{"fixtureId": "abc", "value": "1"}]',
+    '[{"fixtureId": null, "value": "1"}]'
+])
+def test_register_malformed_tips(client: FlaskClient, body: str) -> None:
+    """Requests that aren't a list of tips with valid fixture IDs are rejected."""
+
+    assert client.post('/register-tips', data=body).status_code == 400
+
+def test_register_tip_without_value(client: FlaskClient, app_context: None) -> None:
+    """A tip without a value is invalid."""
+
+    fixture = _upcoming_fixtures()[0]
+    response = client.post('/register-tips', data=json.dumps([{'fixtureId': fixture.fixture_id}]))
+    assert response.status_code == 200
+    assert response.get_json() == {'results': {str(fixture.fixture_id): 'invalid'}}
+
+def test_bulk_create_or_update(app_context: None) -> None:
+    """Tips are only accepted for open fixtures, and fixtures without a kickoff time are open."""
+
+    user = User.by_username('user0')
+    upcoming, unscheduled = _upcoming_fixtures()[:2]
+    unscheduled.date_time = None
+    started = db.session.execute(db.select(Fixture).filter(Fixture.status == 'FT')).scalar()
+    db.session.flush()
+
+    results = Tip.bulk_create_or_update(user, {
+        upcoming.fixture_id: '1',
+        unscheduled.fixture_id: 'X',
+        started.fixture_id: '2',
+        0: '1',
+        upcoming.fixture_id + 1: 'Y'
+    }, False)
+    assert results == {
+        upcoming.fixture_id: 'accepted',
+        unscheduled.fixture_id: 'accepted',
+        started.fixture_id: 'closed',
+        0: 'unknown',
+        upcoming.fixture_id + 1: 'invalid'
+    }
+    assert Tip.values_by_season_id(user, upcoming.season_id)[unscheduled.fixture_id] == 'X'
+
+def test_bulk_create_or_update_replaces_tips(app_context: None) -> None:
+    """Changing a tip updates the existing row instead of adding a new one."""
+
+    user = User.by_username('user0')
+    fixture_ids = [fixture.fixture_id for fixture in _upcoming_fixtures()[:2]]
+    Tip.bulk_create_or_update(user, {fixture_ids[0]: '1', fixture_ids[1]: '1'}, False)
+    Tip.bulk_create_or_update(user, {fixture_ids[0]: '2', fixture_ids[1]: '1'}, False)
+
+    count = db.session.execute(db.select(db.func.count(Tip.id))
+                               .filter(Tip.user_id == user.id,
+                                       Tip.fixture_id.in_(fixture_ids))).scalar()
+    assert count == 2
+    tips = Tip.values_by_season_id(user, Season.get_season_data()['active_season'].id)
+    assert [tips[fixture_id] for fixture_id in fixture_ids] == ['2', '1']
+
+def _upcoming_fixtures() -> list[Fixture]:
+    season = Season.get_season_data()['active_season']
+    return list(db.session.execute(db.select(Fixture)
+                                   .filter(Fixture.season_id == season.id,
+                                           Fixture.status == 'NS',
+                                           Fixture.date_time > datetime.now() + timedelta(hours=1))
+                                   .order_by(Fixture.date_time)).scalars())
@@ -1,48 +1,137 @@
 """Website."""
 
-from flask import Flask, render_template
+import os
+
+from typing import Any
+from flask import Flask, Response, render_template, g, has_request_context
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from keys import APP_SECRET_KEY
 
 # Enable debug and test environment
 TEST_ENVIRONMENT_ENABLED = True
-# Database location
+# Database location, used if DATABASE_URL isn't set. See database.py for the configuration.
 DB_NAME = 'database_test.db'
+# Pragmas set on every SQLite connection in the 'sqlite-wal' profile. WAL lets readers run while
+# a sync writes, and busy_timeout makes writers wait for each other instead of failing.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024
+}
+# Connection pool options of the 'server' profile
+DATABASE_POOL = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_recycle': 1800,
+    'pool_pre_ping': True
+}
 # Premier League ID
 LEAGUE_ID = 39
 # The current active season
 # Note: Only used as a fallback in case no active season is set in the database
 ACTIVE_SEASON = '2025'
 SEASON_DISPLAY_NAME = '2025-26'
+# Fixture statuses that can still be tipped
+TIP_OPEN_STATUSES = ['TBD', 'NS']
+# Seconds before the cached season context is reloaded from the database
+SEASON_CONTEXT_TTL = 300
+# Seconds before the cached kickoff index of a season is rebuilt from the database
+KICKOFF_INDEX_TTL = 300
+# Maximum total size in characters of the rendered fragments in the fragment cache
+FRAGMENT_CACHE_SIZE = 8 * 1024 * 1024
+# Base URL of the API. Can be pointed to a local stand-in server, see api_standin.py.
+API_URL = os.environ.get('API_URL', 'https://v3.football.api-sports.io/')
+# Directory of the on-disk cache for API payloads
+API_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'api_cache')
+# Seconds an API payload is served from the cache per endpoint
+API_CACHE_TTL = {
+    'fixtures': 15 * 60,
+    'standings': 60 * 60
+}
+# Seconds a page served with conditional GET can be reused by the browser without revalidating it
+# with the server per page. Standings only change when an admin syncs them.
+PAGE_MAX_AGE = {
+    'fixtures': 0,
+    'standings': 5 * 60,
+    'stats': 0
+}
+# Default number of entries at the top of the leaderboard and around the current user, and the
+# maximum number that can be requested
+LEADERBOARD_TOP = 10
+LEADERBOARD_AROUND = 2
+LEADERBOARD_MAX = 100
+# Default and maximum number of rounds per page in the JSON API
+API_ROUNDS_PER_PAGE = 1
+API_MAX_ROUNDS_PER_PAGE = 38
+# Number of background jobs that can run at the same time
+JOB_WORKERS = 2
+# Seconds without progress before a queued or running job is considered abandoned
+JOB_STALE_AFTER = 600
+# Number of payloads fetched at the same time by the backfill command
+BACKFILL_WORKERS = 4
+# Number of API items written to the database per batch when backfilling
+BACKFILL_BATCH_SIZE = 100
+# Number of batches buffered between the fetching threads and the database writer
+BACKFILL_QUEUE_SIZE = 16
 
 db: SQLAlchemy = SQLAlchemy()
 
-def create_app() -> Flask:
-    """Create the app and initialize the database and login manager."""
+def create_app(config: dict[str, Any] | None = None) -> Flask:
+    """Create the app and initialize the database and login manager. The given config overrides
+    the default configuration, e.g. to use another database. Set QUERY_COUNT, which defaults to
+    TESTING, to add the number of database queries of each request as the X-Query-Count
+    header."""
+
+    # pylint: disable=import-outside-toplevel
+    # pylint: disable=cyclic-import
+    from .database import database_config, engine_options, configure_engine
 
     app = Flask(__name__)
     app.config['SECRET_KEY'] = APP_SECRET_KEY
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{DB_NAME}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.update(database_config())
+    app.config.update(config or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
 
-    # pylint: disable=import-outside-toplevel
-    # pylint: disable=cyclic-import
     from .views import views
     from .auth import auth
     from .admin import admin
+    from .api import api
 
     app.register_blueprint(views, url_prefix='/')
     app.register_blueprint(auth, url_prefix='/')
     app.register_blueprint(admin, url_prefix='/admin')
+    app.register_blueprint(api, url_prefix='/api')
+
+    from .backfill import backfill_command
+
+    app.cli.add_command(backfill_command)
 
     # pylint: disable=unused-import
     # Note: Import all defined models to allow create_all to function properly.
-    from .models import User, Tip, Fixture, Team, TeamStanding, Result, General
+    from .models import (User, Tip, Fixture, Team, TeamStanding, Result, General, Job,
+                         SchemaVersion, LeaderboardEntry, ResultRound, DataVersion)
+    from .migrations import run_migrations
 
     with app.app_context():
+        configure_engine(db.engine, app.config['DATABASE_PROFILE'])
         db.create_all()
+        run_migrations()
+
+        if app.config.get('QUERY_COUNT', app.testing):
+            event.listen(db.engine, 'before_cursor_execute', _count_query)
+
+    if app.config.get('QUERY_COUNT', app.testing):
+        @app.after_request
+        def add_query_count(response: Response) -> Response:
+            response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+            return response
 
     login_manager = LoginManager()
     login_manager.login_view = 'auth.endpoint_login'
@@ -58,3 +147,9 @@ def create_app() -> Flask:
         return render_template('404.html'), 404
 
     return app
+
+def _count_query(*_args) -> None:
+    """Count the database queries made while handling the current request."""
+
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
@@ -1,16 +1,17 @@
 """Admin."""
 
-import datetime
 import json
 import re
-import time
 
+from typing import Callable
 from flask import Blueprint, Response, render_template, flash, redirect, jsonify, url_for, request
 from flask_login import login_required, current_user
 
-from .models import User, General, Fixture, Team, Result, Season
-from .schemas import FixtureSchema, TeamSchema
-from .utils import api_call, calculate_user_result
+from .cache import season_context
+from .jobs import submit_job
+from .models import User, General, Season, Job, DataVersion
+from .sync import sync_fixtures, sync_standings, calculate_results
+from .utils import api_client
 from . import db
 
 admin = Blueprint('admin', __name__)
@@ -28,118 +29,50 @@ def endpoint_admin() -> str:
         'season_data': Season.get_season_data(),
         'user': current_user,
         'all_users': User.all(),
-        'general': General.get()
+        'general': General.get(),
+        'jobs': Job.recent(),
+        'api_status': api_client.status()
     }
     return render_template('admin.html', **kwargs)
 
 @admin.route('/fetch-api-fixtures', methods=['POST'])
 @login_required
 def endpoint_fetch_api_fixtures() -> Response:
-    """Fetch fixture data from the API and update the database."""
+    """Start a job to fetch fixture data from the API and update the database. The API cache is
+    bypassed if the 'force' query parameter is given."""
 
-    if not current_user.is_admin:
-        flash("Admin priviliges are needed to access this endpoint", category='error')
-        return jsonify({})
-
-    if General.get() is None:
-        flash("No general table exists.", category='error')
-        return jsonify({})
-
-    print("Starting task to fetch API fixture data...")
-    season = General.get_active_season()
-    start_time = time.perf_counter()
-
-    try:
-        headers, fixture_response = api_call('fixtures', season)
-        schema = FixtureSchema(context={"season": season})
-        __parse_headers(headers)
-
-        for fixture_json in fixture_response['response']:
-            fixture = schema.load(fixture_json)
-            Fixture.create_or_update(fixture)
-
-        db.session.commit()
-        end_time = time.perf_counter()
-        status = f"Task finished in {(end_time - start_time):.2f} seconds."
-        flash(status, category='success')
-        print(status)
-    except Exception as error:
-        end_time = time.perf_counter()
-        flash(f"Task failed in {(end_time - start_time):.2f} seconds: "
-              f"{type(error).__name__}", category='error')
-        print(error)
-
-    return jsonify({})
+    return __submit_job('fixtures', sync_fixtures, force=bool(request.args.get('force')))
 
 @admin.route('/fetch-api-standings', methods=['POST'])
 @login_required
 def endpoint_fetch_api_standings() -> Response:
-    """Fetch standings data from the API and update the database."""
-
-    if not current_user.is_admin:
-        flash("Admin priviliges are needed to access this endpoint", category='error')
-        return jsonify({})
-
-    if General.get() is None:
-        flash("No general table exists.", category='error')
-        return jsonify({})
-
-    print("Starting task to fetch API standings data...")
-    season = General.get_active_season()
-    start_time = time.perf_counter()
+    """Start a job to fetch standings data from the API and update the database. The API cache is
+    bypassed if the 'force' query parameter is given."""
 
-    try:
-        headers, standings_response = api_call('standings', season)
-        schema = TeamSchema(context={"season": season})
-        __parse_headers(headers)
-
-        for team_json in standings_response['response'][0]['league']['standings'][0]:
-            team, standings = schema.load(team_json)
-            Team.create_or_update_team_and_standing(team, standings)
-
-        db.session.commit()
-        end_time = time.perf_counter()
-        status = f"Task finished in {(end_time - start_time):.2f} seconds."
-        flash(status, category='success')
-        print(status)
-    except Exception as error:
-        end_time = time.perf_counter()
-        flash(f"Task failed in {(end_time - start_time):.2f} seconds: "
-              f"{type(error).__name__}", category='error')
-        print(error)
-
-    return jsonify({})
+    return __submit_job('standings', sync_standings, force=bool(request.args.get('force')))
 
 @admin.route('/calculate-results', methods=['POST'])
 @login_required
 def endpoint_calculate_results() -> Response:
-    """Fetch standings data from the API and update the database."""
+    """Start a job to calculate the results for all users in the active season and update the
+    database. Only tips in fixtures that have changed since the last calculation are applied unless
+    the 'full' query parameter is given."""
 
-    if not current_user.is_admin:
-        flash("Admin priviliges are needed to access this endpoint", category='error')
-        return jsonify({})
-
-    if General.get() is None:
-        flash("No general table exists.", category='error')
-        return jsonify({})
+    return __submit_job('results', calculate_results, full=bool(request.args.get('full')))
 
-    print("Starting task to calculate results...")
-    season = General.get_active_season()
-    start_time = time.perf_counter()
+@admin.route('/jobs/<int:job_id>')
+@login_required
+def endpoint_job(job_id: int) -> Response:
+    """Return the status, progress and duration of a job."""
 
-    for user in User.all():
-        if user.username == 'admin':
-            continue
-        result = calculate_user_result(user, season)
-        Result.create_or_update(result)
+    if not current_user.is_admin:
+        return jsonify({}), 403
 
-    db.session.commit()
-    end_time = time.perf_counter()
-    status = f"Task finished in {(end_time - start_time):.2f} seconds."
-    flash(status, category='success')
-    print(status)
+    job = Job.by_id(job_id)
+    if job is None:
+        return jsonify({}), 404
 
-    return jsonify({})
+    return jsonify(job.to_dict())
 
 @admin.route('/add-season', methods=['POST'])
 @login_required
@@ -157,6 +90,7 @@ def endpoint_add_season() -> Response:
 
     new_season = Season.create(season)
     db.session.commit()
+    season_context.invalidate()
     flash(f"Season {new_season.display_name} created.", category='success')
 
     return jsonify({})
@@ -183,6 +117,7 @@ def endpoint_set_active_season() -> Response:
         general.season_id = season.id
 
     db.session.commit()
+    season_context.invalidate()
     flash(f"Season {season.display_name} is now active.", category='success')
 
     return jsonify({})
@@ -203,6 +138,7 @@ def endpoint_toggle_late_modification() -> Response:
 
     general.allow_late_modification = not general.allow_late_modification
     db.session.commit()
+    season_context.invalidate()
 
     return jsonify({})
 
@@ -223,6 +159,8 @@ def endpoint_set_user_admin() -> Response:
     user = User.by_id(uuid)
     if user:
         user.is_admin = True
+        # Admins are left out of the results
+        DataVersion.bump(None, 'results')
         db.session.commit()
         flash(f"User {user.username} is now an admin.", category='success')
     else:
@@ -230,12 +168,21 @@ def endpoint_set_user_admin() -> Response:
 
     return jsonify({})
 
-def __parse_headers(headers: dict) -> None:
-    """Update the General table with info from the API response headers."""
+def __submit_job(kind: str, task: Callable[..., str], **kwargs) -> Response:
+    """Submit a background job for the active season. Return the ID of the job."""
 
-    data = {
-        'last_update': datetime.datetime.now(),
-        'remaining_requests':  headers['x-ratelimit-requests-remaining']
-    }
-    General.update(**data)
-    db.session.commit()
+    if not current_user.is_admin:
+        flash("Admin priviliges are needed to access this endpoint", category='error')
+        return jsonify({})
+
+    if General.get() is None:
+        flash("No general table exists.", category='error')
+        return jsonify({})
+
+    season = General.get_active_season()
+    job = submit_job(kind, season, task, **kwargs)
+    if job is None:
+        flash(f"A job is already running for season {season.display_name}.", category='error')
+        return jsonify({})
+
+    return jsonify({'job_id': job.id})
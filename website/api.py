@@ -0,0 +1,258 @@
+"""API.
+
+Read-only JSON API for clients and dashboards. Every endpoint takes a 'fields' argument with a
+comma separated list of the fields to return, e.g. ?fields=id,round,home_score, and returns all
+fields if it isn't given.
+
+Fixtures, tips and result rounds are paginated by round. A page holds the items of 'limit' rounds
+after the round given by the 'cursor' argument, and the 'next_cursor' of a page is passed as the
+'cursor' of the next page. It is null on the last page. The 'round' argument returns a single round
+instead, e.g. ?round=5, and ?round=current returns the round of the next upcoming fixture.
+"""
+
+from datetime import datetime, time
+from typing import Any
+from flask import Blueprint, Response, abort, jsonify, request
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+from .conditional import conditional
+from .models import User, Fixture, Team, TeamStanding, Tip, Result, ResultRound, Season, SeasonInfo
+from .utils import get_kickoff_index
+from . import API_ROUNDS_PER_PAGE, API_MAX_ROUNDS_PER_PAGE
+
+api = Blueprint('api', __name__)
+current_user: User
+
+FIXTURE_FIELDS = {
+    'id': Fixture.fixture_id,
+    'round': Fixture.round,
+    'date': Fixture.date_time,
+    'status': Fixture.status,
+    'home_team_id': Fixture.home_team_id,
+    'away_team_id': Fixture.away_team_id,
+    'home_score': Fixture.home_score,
+    'away_score': Fixture.away_score
+}
+
+STANDING_FIELDS = {
+    'rank': TeamStanding.rank,
+    'team_id': TeamStanding.team_id,
+    'team': Team.name,
+    'logo': Team.logo,
+    'points': TeamStanding.points,
+    'games_played': TeamStanding.games_played,
+    'wins': TeamStanding.wins,
+    'draws': TeamStanding.draws,
+    'losses': TeamStanding.losses,
+    'goals_scored': TeamStanding.goals_scored,
+    'goals_conceded': TeamStanding.goals_conceded,
+    'form': TeamStanding.form,
+    'promotion': TeamStanding.promotion
+}
+
+TIP_FIELDS = {
+    'fixture_id': Tip.fixture_id,
+    'round': Fixture.round,
+    'tip': Tip.tip,
+    'correct': Tip.correct
+}
+
+RESULT_FIELDS = {
+    'username': User.username,
+    'total': Result.total,
+    'finished': Result.finished,
+    'correct': Result.correct,
+    'incorrect': Result.incorrect,
+    'tip_1': Result.tip_1,
+    'tip_X': Result.tip_X,
+    'tip_2': Result.tip_2
+}
+
+RESULT_ROUND_FIELDS = {
+    'username': User.username,
+    'round': ResultRound.round,
+    'tips': ResultRound.tips,
+    'finished': ResultRound.finished,
+    'correct': ResultRound.correct
+}
+
+@api.before_request
+def require_login() -> None:
+    """Answer requests from users that aren't logged in with 401 instead of redirecting them to
+    the login page."""
+
+    if not current_user.is_authenticated:
+        abort(401, "Login required.")
+
+# Handlers are looked up by status code before exception class, so the codes are registered to
+# take precedence over the app's 404 page
+@api.errorhandler(400)
+@api.errorhandler(401)
+@api.errorhandler(404)
+def handle_error(error: HTTPException) -> tuple[Response, int]:
+    """Return errors as JSON."""
+
+    return jsonify({'error': error.description}), error.code
+
+@api.route('/fixtures/<season>')
+@conditional('fixtures', key=lambda season: __current_round(season))
+def endpoint_fixtures(season: str) -> Response:
+    """Endpoint for the fixtures in a season. The 'from' and 'to' arguments limit the fixtures to
+    a window of dates or datetimes in ISO format, e.g. ?from=2025-08-15&to=2025-08-18."""
+
+    info = __season(season)
+    fields = __fields(FIXTURE_FIELDS)
+    start = __datetime_arg('from')
+    end = __datetime_arg('to', end_of_day=True)
+    rounds, next_cursor = __page(info, start, end)
+    rows = Fixture.columns_by_season_id(info.id, list(fields.values()), rounds, start, end)
+
+    return jsonify({'season': info.season, 'data': __rows(rows, fields),
+                    'next_cursor': next_cursor})
+
+@api.route('/standings/<season>')
+@conditional('standings')
+def endpoint_standings(season: str) -> Response:
+    """Endpoint for the standings in a season ordered by rank."""
+
+    info = __season(season)
+    fields = __fields(STANDING_FIELDS)
+    rows = TeamStanding.columns_by_season_id(info.id, list(fields.values()))
+
+    return jsonify({'season': info.season, 'data': __rows(rows, fields)})
+
+@api.route('/tips/<season>')
+@conditional('tips', 'results', key=lambda season: __current_round(season))
+def endpoint_tips(season: str) -> Response:
+    """Endpoint for the tips of a user in a season. The user is given by the 'user' argument, or
+    is the current user. Like on the fixtures page, only admins can see another user's tips in
+    fixtures they haven't tipped themselves."""
+
+    info = __season(season)
+    fields = __fields(TIP_FIELDS)
+    user = current_user
+    username = request.args.get('user')
+    if username is not None and username != current_user.username:
+        user = User.by_username(username)
+        if user is None:
+            abort(404, f"Unknown user: {username}")
+    visible_to = None if user.id == current_user.id or current_user.is_admin else current_user
+    rounds, next_cursor = __page(info)
+    rows = Tip.columns_by_season_id(user, info.id, list(fields.values()), rounds, visible_to)
+
+    return jsonify({'season': info.season, 'user': user.username, 'data': __rows(rows, fields),
+                    'next_cursor': next_cursor})
+
+@api.route('/results/<season>')
+@conditional('results')
+def endpoint_results(season: str) -> Response:
+    """Endpoint for the results of all users in a season."""
+
+    info = __season(season)
+    fields = __fields(RESULT_FIELDS)
+    rows = Result.columns_by_season_id(info.id, list(fields.values()))
+
+    return jsonify({'season': info.season, 'data': __rows(rows, fields)})
+
+@api.route('/results/<season>/rounds')
+@conditional('results', key=lambda season: __current_round(season))
+def endpoint_result_rounds(season: str) -> Response:
+    """Endpoint for the results of all users per round in a season."""
+
+    info = __season(season)
+    fields = __fields(RESULT_ROUND_FIELDS)
+    rounds, next_cursor = __page(info)
+    rows = ResultRound.columns_by_season_id(info.id, list(fields.values()), rounds)
+
+    return jsonify({'season': info.season, 'data': __rows(rows, fields),
+                    'next_cursor': next_cursor})
+
+def __season(season: str) -> SeasonInfo:
+    """Return a season or abort with 404 if it doesn't exist."""
+
+    info = Season.get_season_info(season)
+    if info is None:
+        abort(404, f"Unknown season: {season}")
+    return info
+
+def __fields(available: dict[str, Any]) -> dict[str, Any]:
+    """Return the fields and columns selected by the 'fields' argument, or all available fields if
+    it isn't given. Abort with 400 on unknown fields."""
+
+    names = request.args.get('fields')
+    if not names:
+        return available
+
+    fields = {}
+    for name in names.split(','):
+        name = name.strip()
+        if name not in available:
+            abort(400, f"Unknown field: {name}. Valid fields are {', '.join(available)}.")
+        fields[name] = available[name]
+    return fields
+
+def __page(season: SeasonInfo, start: datetime | None = None,
+           end: datetime | None = None) -> tuple[list[int], int | None]:
+    """Return the rounds of the page given by the 'cursor' and 'limit' arguments, and the cursor of
+    the next page or None if it is the last page. If the 'round' argument is given, the page only
+    holds that round. The round 'current' is the round of the next upcoming fixture."""
+
+    if request.args.get('round') == 'current':
+        round_number = __current_round(season)
+        return ([round_number] if round_number is not None else []), None
+    round_number = __int_arg('round', None)
+    if round_number is not None:
+        return [round_number], None
+
+    cursor = __int_arg('cursor', None)
+    limit = __int_arg('limit', API_ROUNDS_PER_PAGE)
+    if not 1 <= limit <= API_MAX_ROUNDS_PER_PAGE:
+        abort(400, f"limit must be between 1 and {API_MAX_ROUNDS_PER_PAGE}.")
+
+    # One round more than the page tells whether there is a next page
+    rounds = Fixture.rounds_by_season_id(season.id, cursor, limit + 1, start, end)
+    if len(rounds) > limit:
+        return rounds[:limit], rounds[limit - 1]
+    return rounds, None
+
+def __current_round(season: SeasonInfo) -> int | None:
+    """Return the current round of a season if the 'round' argument is 'current', since the page
+    then changes when a fixture kicks off."""
+
+    if request.args.get('round') != 'current':
+        return None
+    return get_kickoff_index(season).current_round(datetime.now())
+
+def __int_arg(name: str, default: int | None) -> int | None:
+    """Return an integer argument, or the default if it isn't given. Abort with 400 if it isn't an
+    integer."""
+
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, f"{name} must be an integer.")
+
+def __datetime_arg(name: str, end_of_day: bool = False) -> datetime | None:
+    """Return a date or datetime argument in ISO format, or None if it isn't given. A date is
+    converted to the start of the day, or the end of the day if end_of_day is True. Abort with 400
+    if it isn't a date or datetime."""
+
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, f"{name} must be a date or datetime in ISO format.")
+    if end_of_day and len(value) == len('YYYY-MM-DD'):
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed
+
+def __rows(rows: list[Any], fields: dict[str, Any]) -> list[dict[str, Any]]:
+    """Return rows of selected columns as dictionaries keyed by field name."""
+
+    return [{name: value.isoformat() if isinstance(value, datetime) else value
+             for name, value in zip(fields, row)} for row in rows]
@@ -0,0 +1,123 @@
+"""Api Cache."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from typing import Any, NamedTuple
+
+class ApiPayload(NamedTuple):
+    """A payload returned by the API or read from the cache."""
+
+    key: str
+    headers: dict
+    data: Any
+    # SHA-256 digest of the payload data
+    digest: str
+    from_cache: bool
+
+class ApiCache:
+    """Content-addressed on-disk cache of API payloads. Payloads are stored once per digest in the
+    'objects' directory, and each cache key has a reference file in the 'refs' directory that
+    points to its latest digest, the time it was fetched and the digest that was last processed
+    into the database."""
+
+    def __init__(self, directory: str, ttls: dict[str, int]):
+        self.directory: str = directory
+        # Seconds a payload is fresh per endpoint. Endpoints without a TTL are not cached.
+        self.ttls: dict[str, int] = ttls
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint: str, params: dict[str, Any]) -> str:
+        """Return the cache key for an endpoint and its season and league parameters."""
+
+        return f"{endpoint}-{params.get('season')}-{params.get('league')}"
+
+    def lookup(self, endpoint: str, key: str) -> ApiPayload:
+        """Return the cached payload for a key if it is still fresh, else None."""
+
+        ttl = self.ttls.get(endpoint)
+        ref = self._read_ref(key)
+        if ttl is None or ref is None or time.time() - ref['fetched'] > ttl:
+            return None
+
+        try:
+            with open(self._object_path(ref['digest']), encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        return ApiPayload(key, ref['headers'], data, ref['digest'], True)
+
+    def store(self, key: str, headers: dict, data: Any) -> ApiPayload:
+        """Store a payload for a key and return it with its digest."""
+
+        body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+
+        with self._lock:
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                _write_atomic(object_path, body)
+
+            ref = self._read_ref(key) or {}
+            previous_digest = ref.get('digest')
+            ref.update({'digest': digest, 'fetched': time.time(), 'headers': headers})
+            _write_atomic(self._ref_path(key), json.dumps(ref).encode('utf-8'))
+
+            if previous_digest not in (None, digest) and not self._is_referenced(previous_digest):
+                os.remove(self._object_path(previous_digest))
+
+        return ApiPayload(key, headers, data, digest, False)
+
+    def is_processed(self, payload: ApiPayload) -> bool:
+        """Return True if the payload has already been processed into the database."""
+
+        ref = self._read_ref(payload.key)
+        return ref is not None and ref.get('processed') == payload.digest
+
+    def mark_processed(self, payload: ApiPayload) -> None:
+        """Mark a payload as processed into the database."""
+
+        with self._lock:
+            ref = self._read_ref(payload.key)
+            if ref is not None:
+                ref['processed'] = payload.digest
+                _write_atomic(self._ref_path(payload.key), json.dumps(ref).encode('utf-8'))
+
+    def _is_referenced(self, digest: str) -> bool:
+        """Return True if any reference points to a digest."""
+
+        refs_directory = os.path.join(self.directory, 'refs')
+        for name in os.listdir(refs_directory):
+            ref = self._read_ref(name.removesuffix('.json'))
+            if ref is not None and ref.get('digest') == digest:
+                return True
+        return False
+
+    def _read_ref(self, key: str) -> dict[str, Any]:
+        """Return the reference for a key, or None if it doesn't exist."""
+
+        try:
+            with open(self._ref_path(key), encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self.directory, 'refs', f"{key}.json")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'objects', f"{digest}.json")
+
+def _write_atomic(path: str, body: bytes) -> None:
+    """Write a file by replacing it with a temporary file, so readers never see partial files."""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(body)
+    os.replace(temp_path, path)
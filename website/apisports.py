@@ -0,0 +1,248 @@
+"""Api-Sports."""
+
+import codecs
+import json
+import random
+import re
+import threading
+import time
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, NamedTuple
+import requests
+from requests.adapters import HTTPAdapter
+
+# Response status codes that are retried
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Bytes read at a time from streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+# Start of the response list in a payload, and the separators between its items
+RESPONSE_START = re.compile(r'"response"\s*:\s*\[')
+SEPARATOR = re.compile(r'[\s,]*')
+
+class ApiError(Exception):
+    """Raised when the API returns an error."""
+
+class ApiBudgetExceeded(ApiError):
+    """Raised when a call would exhaust the daily request budget."""
+
+class ApiCall(NamedTuple):
+    """A call made to the API."""
+
+    endpoint: str
+    # Response status code, or None if no response was received
+    status: int
+    # Latency in seconds
+    latency: float
+    timestamp: datetime
+
+class ApiClient:
+    """Client for api-sports.io with a pooled session, timeouts, retries with jittered backoff and
+    tracking of the daily request budget."""
+
+    def __init__(self, base_url: str, api_key: str, timeout: tuple[float, float] = (5, 30),
+                 retries: int = 3, backoff: float = 1.0, max_backoff: float = 30,
+                 reserve: int = 5, pool_size: int = 4):
+        self.base_url: str = base_url.rstrip('/')
+        self.timeout: tuple[float, float] = timeout
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        # Number of daily requests to keep in reserve. Calls are refused when the remaining budget
+        # reaches the reserve.
+        self.reserve: int = reserve
+        self.session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'x-rapidapi-key': api_key,
+            'x-rapidapi-host': base_url
+        })
+        self._lock: threading.Lock = threading.Lock()
+        # Daily request budget as reported by the latest response and the UTC day it applies to
+        self.limit: int = None
+        self.remaining: int = None
+        self._budget_day: str = None
+        # Per minute request budget as reported by the latest response
+        self._remaining_minute: int = None
+        self._minute_start: float = None
+        self.calls: deque[ApiCall] = deque(maxlen=20)
+
+    def get(self, endpoint: str, params: dict[str, Any]) -> tuple[dict, Any]:
+        """Call an endpoint and return a tuple containing the response headers and data. Retry
+        connection errors and retryable status codes with jittered exponential backoff. Raise
+        ApiBudgetExceeded if the daily budget is exhausted and ApiError if the API returns an
+        error."""
+
+        response = self._request(endpoint, params)
+        data = response.json()
+        if data.get('errors'):
+            raise ApiError(str(data['errors']))
+        return dict(response.headers), data
+
+    def stream(self, endpoint: str, params: dict[str, Any]) -> tuple[dict, Iterator[Any]]:
+        """Call an endpoint like get, but return the response headers and an iterator over the
+        items of the 'response' list that are decoded as the body is read. The iterator raises
+        ApiError after the last item if the API returned an error."""
+
+        response = self._request(endpoint, params, stream=True)
+
+        def items() -> Iterator[Any]:
+            with response:
+                stream = ResponseStream(response.iter_content(STREAM_CHUNK_SIZE))
+                yield from stream
+                if stream.envelope.get('errors'):
+                    raise ApiError(str(stream.envelope['errors']))
+
+        return dict(response.headers), items()
+
+    def _request(self, endpoint: str, params: dict[str, Any],
+                 stream: bool = False) -> requests.Response:
+        """Call an endpoint with retries and return the successful response."""
+
+        url = f"{self.base_url}/{endpoint}"
+        for attempt in range(self.retries + 1):
+            self._wait_for_budget()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout,
+                                            stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(endpoint, None, time.perf_counter() - start)
+                if attempt == self.retries:
+                    raise
+                self._sleep(attempt)
+                continue
+
+            self._record(endpoint, response.status_code, time.perf_counter() - start)
+            self._update_budget(response.headers)
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                response.close()
+                self._sleep(attempt, response.headers.get('Retry-After'))
+                continue
+
+            if not response.ok:
+                response.close()
+            response.raise_for_status()
+            return response
+
+        raise ApiError(f"No response from {endpoint}")
+
+    def status(self) -> dict[str, Any]:
+        """Return the remaining daily budget and the most recent calls."""
+
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'calls': list(reversed(self.calls))
+            }
+
+    def _wait_for_budget(self) -> None:
+        """Refuse the call if the daily budget is exhausted, and defer it until the next minute if
+        the per minute budget is exhausted."""
+
+        with self._lock:
+            if self._budget_day != _utc_day():
+                # The daily budget resets at midnight UTC
+                self.remaining = None
+            if self.remaining is not None and self.remaining <= self.reserve:
+                raise ApiBudgetExceeded(f"Daily request budget exhausted ({self.remaining} "
+                                        f"remaining, {self.reserve} reserved)")
+            delay = 0
+            if self._remaining_minute == 0 and self._minute_start is not None:
+                delay = max(0, 60 - (time.monotonic() - self._minute_start))
+        if delay:
+            time.sleep(delay)
+
+    def _update_budget(self, headers: Any) -> None:
+        """Update the request budget from the rate limit headers of a response."""
+
+        with self._lock:
+            if 'x-ratelimit-requests-remaining' in headers:
+                self.remaining = int(headers['x-ratelimit-requests-remaining'])
+                self._budget_day = _utc_day()
+            if 'x-ratelimit-requests-limit' in headers:
+                self.limit = int(headers['x-ratelimit-requests-limit'])
+            if 'x-ratelimit-remaining' in headers:
+                remaining_minute = int(headers['x-ratelimit-remaining'])
+                if self._remaining_minute is None or remaining_minute > self._remaining_minute:
+                    self._minute_start = time.monotonic()
+                self._remaining_minute = remaining_minute
+
+    def _record(self, endpoint: str, status: int, latency: float) -> None:
+        """Record a call for the status report."""
+
+        with self._lock:
+            self.calls.append(ApiCall(endpoint, status, latency, datetime.now()))
+
+    def _sleep(self, attempt: int, retry_after: str = None) -> None:
+        """Sleep before retrying using exponential backoff with jitter, or the time requested by
+        the API if it is longer."""
+
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(self.max_backoff, int(retry_after)))
+        time.sleep(delay)
+
+class ResponseStream:
+    """Decodes the items of the 'response' list of a payload incrementally from chunks of the
+    body, so only one item is held in memory at a time. The rest of the payload, with an empty
+    'response' list, is available in envelope once all items have been read."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks: Iterator[bytes] = iter(chunks)
+        self.envelope: dict[str, Any] = None
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder: json.JSONDecoder = json.JSONDecoder()
+
+    def __iter__(self) -> Iterator[Any]:
+        # Read until the start of the response list
+        prefix = ''
+        match = None
+        while match is None:
+            chunk = self._read()
+            if chunk is None:
+                self.envelope = json.loads(prefix)
+                return
+            prefix += chunk
+            match = RESPONSE_START.search(prefix)
+        buffer = prefix[match.end():]
+        prefix = prefix[:match.end()]
+
+        position = 0
+        while True:
+            position = SEPARATOR.match(buffer, position).end()
+            if position < len(buffer) and buffer[position] == ']':
+                break
+            try:
+                item, position = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The item continues in the next chunk
+                chunk = self._read()
+                if chunk is None:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield item
+
+        suffix = buffer[position:]
+        while (chunk := self._read()) is not None:
+            suffix += chunk
+        self.envelope = json.loads(prefix + suffix)
+
+    def _read(self) -> str:
+        """Return the next chunk as text, or None at the end of the body."""
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return None
+        return self._text.decode(chunk)
+
+def _utc_day() -> str:
+    """Return the current UTC date as a string."""
+
+    return datetime.now(timezone.utc).date().isoformat()
@@ -0,0 +1,202 @@
+"""Backfill."""
+
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, NamedTuple
+import click
+from flask.cli import with_appcontext
+from .cache import kickoff_indexes, season_context
+from .models import DataVersion, Fixture, Job, Season, SeasonInfo, Team
+from .parsers import parse_fixtures, parse_standings
+from .sync import parse_headers
+from .utils import api_client, stream_api_call
+from . import db, BACKFILL_WORKERS, BACKFILL_BATCH_SIZE, BACKFILL_QUEUE_SIZE
+
+ENDPOINTS = ('fixtures', 'standings')
+
+class Task(NamedTuple):
+    """A payload to backfill and the job that records its progress."""
+
+    endpoint: str
+    season: SeasonInfo
+    job_id: int
+
+class Message(NamedTuple):
+    """A message from a fetching thread to the database writer."""
+
+    task: Task
+    # Kind of message. Valid values are 'headers', 'batch', 'done' and 'failed'.
+    kind: str
+    value: Any
+
+@click.command('backfill')
+@click.argument('first_season', type=int)
+@click.argument('last_season', type=int)
+@click.option('--workers', default=BACKFILL_WORKERS, show_default=True,
+              help="Number of payloads fetched at the same time.")
+@click.option('--restart', is_flag=True,
+              help="Backfill seasons again even if they have been backfilled before.")
+@with_appcontext
+def backfill_command(first_season: int, last_season: int, workers: int, restart: bool) -> None:
+    """Backfill fixtures and standings for the seasons FIRST_SEASON to LAST_SEASON.
+
+    Payloads are fetched concurrently and decoded as they are read, and written to the database
+    in batches. Seasons that have already been backfilled are skipped, so an interrupted
+    backfill can be resumed by running the command again.
+    """
+
+    tasks = create_tasks(range(first_season, last_season + 1), restart)
+    if not tasks:
+        click.echo("Nothing to backfill.")
+        return
+
+    click.echo(f"Backfilling {len(tasks)} payloads with {workers} workers")
+    failed = run_backfill(tasks, workers)
+
+    status = api_client.status()
+    click.echo(f"Remaining requests: {status['remaining']} of {status['limit']}")
+    if failed:
+        raise click.ClickException(f"{failed} payloads failed. Run the command again to resume.")
+
+def create_tasks(years: range, restart: bool) -> list[Task]:
+    """Create the seasons that don't exist and a queued job for each endpoint in each season that
+    hasn't been backfilled. Return the tasks to run."""
+
+    tasks = []
+    for year in years:
+        season = Season.by_season(str(year))
+        if season is None:
+            season = Season.create(str(year))
+            db.session.flush()
+
+        for endpoint in ENDPOINTS:
+            kind = f"backfill-{endpoint}"
+            latest = Job.latest(kind, season.id)
+            if latest is not None and latest.status == 'finished' and not restart:
+                click.echo(f"{season.season} {endpoint}: already backfilled")
+                continue
+            job = Job.create(kind, season)
+            db.session.flush()
+            tasks.append(Task(endpoint, season.info(), job.id))
+
+    db.session.commit()
+    season_context.invalidate()
+    return tasks
+
+def run_backfill(tasks: list[Task], workers: int) -> int:
+    """Fetch the tasks in a thread pool and write them to the database from the calling thread,
+    which needs the app context. Return the number of failed tasks."""
+
+    messages = queue.Queue(maxsize=BACKFILL_QUEUE_SIZE)
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill')
+    for task in tasks:
+        executor.submit(_fetch, task, messages, stop)
+
+    remaining = len(tasks)
+    # Number of items written and IDs of the failed jobs
+    written = {task.job_id: 0 for task in tasks}
+    failed = set()
+    try:
+        while remaining:
+            message = messages.get()
+            if message.task.job_id not in failed and not _write(message, written):
+                failed.add(message.task.job_id)
+            if message.kind in ('done', 'failed'):
+                remaining -= 1
+    finally:
+        stop.set()
+        executor.shutdown(cancel_futures=True)
+
+    return len(failed)
+
+def _fetch(task: Task, messages: queue.Queue, stop: threading.Event) -> None:
+    """Stream a payload from the API and put its items on the queue in batches. Stop early if the
+    writer has stopped."""
+
+    def put(kind: str, value: Any = None) -> bool:
+        # Block while the queue is full, but give up if the writer has stopped
+        while not stop.is_set():
+            try:
+                messages.put(Message(task, kind, value), timeout=1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        headers, items = stream_api_call(task.endpoint, task.season)
+        if not put('headers', headers):
+            return
+
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == BACKFILL_BATCH_SIZE:
+                if not put('batch', batch):
+                    return
+                batch = []
+        if batch and not put('batch', batch):
+            return
+        put('done')
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        put('failed', f"{type(error).__name__}: {error}")
+
+def _write(message: Message, written: dict[int, int]) -> bool:
+    """Apply a message to the database and the job of its task, and count the written items per
+    job. Return False if the task failed."""
+
+    task = message.task
+    job = Job.by_id(task.job_id)
+    job.updated = datetime.now()
+    name = f"{task.season.season} {task.endpoint}"
+
+    try:
+        if message.kind == 'headers':
+            job.status = 'running'
+            job.started = datetime.now()
+            job.message = None
+            parse_headers(message.value)
+        elif message.kind == 'batch':
+            written[task.job_id] += _upsert(task, message.value)
+            job.message = f"{written[task.job_id]} items written."
+            click.echo(f"{name}: {written[task.job_id]} items written")
+        elif message.kind == 'done':
+            job.status = 'finished'
+            job.message = f"{written[task.job_id]} items backfilled."
+            job.progress = 100
+            job.finished = datetime.now()
+            if task.endpoint == 'fixtures':
+                kickoff_indexes.invalidate(task.season.id)
+            click.echo(f"{name}: finished")
+        else:
+            raise RuntimeError(message.value)
+        db.session.commit()
+        return True
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        db.session.rollback()
+        job = Job.by_id(task.job_id)
+        job.status = 'failed'
+        job.message = str(error)
+        job.finished = job.updated = datetime.now()
+        db.session.commit()
+        click.echo(f"{name}: failed: {error}", err=True)
+        return False
+
+def _upsert(task: Task, items: list[dict[str, Any]]) -> int:
+    """Parse and upsert a batch of API items. Return the number of rows written."""
+
+    DataVersion.bump(task.season.id, task.endpoint)
+    if task.endpoint == 'fixtures':
+        Fixture.bulk_create_or_update(parse_fixtures(items, task.season.id))
+        return len(items)
+
+    count = 0
+    for item in items:
+        teams_and_standings = parse_standings(item['league']['standings'][0], task.season.id)
+        Team.bulk_create_or_update_rows(teams_and_standings)
+        count += len(teams_and_standings)
+    return count
@@ -0,0 +1,123 @@
+"""Cache."""
+
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+from . import SEASON_CONTEXT_TTL, KICKOFF_INDEX_TTL, FRAGMENT_CACHE_SIZE
+
+class CachedValue:
+    """Process-level cache for a single value. The value is loaded on first use and kept until it
+    is invalidated or its time to live has passed."""
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl: float | None = ttl
+        self._lock: threading.Lock = threading.Lock()
+        self._value: Any = None
+        self._expires: float | None = None
+        self._loaded: bool = False
+
+    def get(self, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, calling the loader to load it if it is missing or expired."""
+
+        with self._lock:
+            if not self._loaded or (self._expires is not None and time.monotonic() > self._expires):
+                self._value = loader()
+                self._loaded = True
+                self._expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            return self._value
+
+    def invalidate(self) -> None:
+        """Remove the cached value so it is loaded again on next use."""
+
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+class CachedValues:
+    """Process-level cache for values identified by a key. Each value is cached like a
+    CachedValue."""
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl: float | None = ttl
+        self._lock: threading.Lock = threading.Lock()
+        self._values: dict[Any, CachedValue] = {}
+
+    def get(self, key: Any, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for a key, calling the loader to load it if it is missing or
+        expired."""
+
+        with self._lock:
+            value = self._values.setdefault(key, CachedValue(self.ttl))
+        return value.get(loader)
+
+    def invalidate(self, key: Any = None) -> None:
+        """Remove the cached value for a key, or all cached values if no key is given."""
+
+        with self._lock:
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
+
+class FragmentCache:
+    """Process-level cache for rendered fragments identified by a key. The least recently used
+    fragments are evicted when the total size of the fragments exceeds the maximum size. Keys
+    should contain the versions of the data a fragment is rendered from, so fragments of old
+    versions are never served and are evicted once they are no longer used."""
+
+    def __init__(self, max_size: int):
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._fragments: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size: int = 0
+
+    def get(self, key: Hashable, render: Callable[[], Any],
+            size: Callable[[Any], int] = len) -> Any:
+        """Return the cached fragment for a key, calling render to render it if it is missing. The
+        size function returns the size of a rendered fragment."""
+
+        with self._lock:
+            entry = self._fragments.get(key)
+            if entry is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Rendered without holding the lock, so a fragment may be rendered by two requests at the
+        # same time. The last one is kept.
+        fragment = render()
+        fragment_size = size(fragment)
+        with self._lock:
+            if fragment_size > self.max_size:
+                return fragment
+            previous = self._fragments.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._fragments[key] = (fragment, fragment_size)
+            self._size += fragment_size
+            while self._size > self.max_size:
+                _key, (_fragment, evicted_size) = self._fragments.popitem(last=False)
+                self._size -= evicted_size
+        return fragment
+
+    def invalidate(self) -> None:
+        """Remove all cached fragments."""
+
+        with self._lock:
+            self._fragments.clear()
+            self._size = 0
+
+# The active season, all seasons and the general flags. Invalidated by the admin endpoints that
+# modify them. The time to live bounds how long other processes can serve a stale value.
+season_context = CachedValue(ttl=SEASON_CONTEXT_TTL)
+
+# Kickoff index per season ID. Invalidated when a fixture sync changes the fixture dates.
+kickoff_indexes = CachedValues(ttl=KICKOFF_INDEX_TTL)
+
+# Rendered fixture and standings fragments shared by all users, keyed by the season's data versions
+fragments = FragmentCache(FRAGMENT_CACHE_SIZE)
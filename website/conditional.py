@@ -0,0 +1,62 @@
+"""Conditional requests.
+
+Pages that only change with the data of a season are served with an ETag and a Last-Modified
+header derived from the season's data versions, see DataVersion. Code that changes the data bumps
+its version, and a browser revalidating a page whose versions haven't changed gets a 304 Not
+Modified response without the page being rendered.
+"""
+
+import hashlib
+
+from functools import wraps
+from typing import Any, Callable
+from flask import Response, make_response, request, session
+from flask_login import current_user
+from werkzeug.http import is_resource_modified
+from .models import DataVersion, Season, SeasonInfo
+
+def conditional(*kinds: str, max_age: int = 0,
+                key: Callable[[SeasonInfo], Any] | None = None) -> Callable:
+    """Decorator for a page that only changes with the given kinds of data in a season, the season
+    data and the current user. The season is given by the view's 'season' argument, or is the
+    active season. The optional key function returns anything else the page depends on for the
+    season. Pages are rendered without validators while flashed messages are pending, since the
+    messages are only shown once."""
+
+    def decorator(view: Callable[..., Any]) -> Callable[..., Response]:
+        @wraps(view)
+        def wrapper(*args, **kwargs) -> Response:
+            if session.get('_flashes'):
+                response = make_response(view(*args, **kwargs))
+                response.cache_control.no_store = True
+                return response
+
+            season_data = Season.get_season_data()
+            season = Season.get_season_info(kwargs.get('season'))
+            versions = DataVersion.by_season_id(season.id) if season is not None else {}
+            parts = [request.full_path, current_user.get_id(), current_user.is_admin, season_data,
+                     [(kind, versions[kind].version) for kind in kinds if kind in versions]]
+            if key is not None and season is not None:
+                parts.append(key(season))
+            etag = hashlib.sha1(repr(parts).encode()).hexdigest()
+            updates = [versions[kind].last_update for kind in kinds if kind in versions]
+            last_modified = max(updates) if updates else None
+
+            if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = make_response(view(*args, **kwargs))
+            else:
+                response = Response(status=304)
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            if max_age:
+                response.cache_control.max_age = max_age
+            else:
+                response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+
+        return wrapper
+
+    return decorator
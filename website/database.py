@@ -0,0 +1,67 @@
+"""Database.
+
+The database is configured from the environment:
+
+- DATABASE_URL: SQLAlchemy database URL. Defaults to the SQLite database DB_NAME.
+- DATABASE_PROFILE: 'sqlite-wal' (default for SQLite) sets the pragmas in SQLITE_PRAGMAS on every
+  connection, 'sqlite' keeps the driver defaults, and 'server' (default for other databases) uses
+  a connection pool with pre-ping.
+- DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW, DATABASE_POOL_TIMEOUT, DATABASE_POOL_RECYCLE and
+  DATABASE_POOL_PRE_PING: pool options of the 'server' profile, see DATABASE_POOL.
+"""
+
+import os
+
+from typing import Any
+from sqlalchemy import Engine, event
+from . import DB_NAME, DATABASE_POOL, SQLITE_PRAGMAS
+
+PROFILES = ('sqlite', 'sqlite-wal', 'server')
+
+def database_config() -> dict[str, Any]:
+    """Return the database configuration from the environment."""
+
+    url = os.environ.get('DATABASE_URL', f"sqlite:///{DB_NAME}")
+    default_profile = 'sqlite-wal' if url.startswith('sqlite') else 'server'
+    pool = {key: _from_environ(f"DATABASE_{key.upper()}", default)
+            for key, default in DATABASE_POOL.items()}
+    return {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'DATABASE_PROFILE': os.environ.get('DATABASE_PROFILE', default_profile),
+        'DATABASE_POOL': pool
+    }
+
+def engine_options(config: dict[str, Any]) -> dict[str, Any]:
+    """Return the SQLAlchemy engine options for the database profile of an app config."""
+
+    profile = config['DATABASE_PROFILE']
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    if profile == 'server':
+        return dict(config['DATABASE_POOL'])
+    return {}
+
+def configure_engine(engine: Engine, profile: str) -> None:
+    """Set up an engine for a database profile. Must be called before the first connection."""
+
+    if profile == 'sqlite-wal':
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+def _set_sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    """Set the SQLite pragmas on a new connection."""
+
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+def _from_environ(name: str, default: Any) -> Any:
+    """Return an environment variable converted to the type of its default value, or the default
+    if it isn't set."""
+
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() in ('1', 'true', 'yes')
+    return type(default)(value)
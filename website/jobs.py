@@ -0,0 +1,104 @@
+"""Jobs."""
+
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable
+from flask import Flask, current_app
+from sqlalchemy import Engine, create_engine, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+from .models import Job, Season
+from . import db, JOB_WORKERS, JOB_STALE_AFTER
+
+# Jobs run in threads since they mostly wait on the API and the database, and need the app context
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+_lock = threading.Lock()
+# IDs of the seasons with a job queued or running in this process
+_active_seasons: set[int] = set()
+
+def submit_job(kind: str, season: Season, task: Callable[..., str], **kwargs) -> Job:
+    """Create a job and run the task in the background. The task is called with the season, a
+    progress callback and the given keyword arguments and returns a status message. Return the
+    created job, or None if a job for the season is already queued or running."""
+
+    with _lock:
+        if season.id in _active_seasons or Job.active_by_season(season.id, JOB_STALE_AFTER):
+            return None
+        _active_seasons.add(season.id)
+
+    try:
+        job = Job.create(kind, season)
+        db.session.commit()
+        # pylint: disable=protected-access
+        _executor.submit(_run_job, current_app._get_current_object(), job.id, season.id, task,
+                         kwargs)
+    except Exception:
+        with _lock:
+            _active_seasons.discard(season.id)
+        raise
+
+    current_app.logger.debug(f"Submitted job: {kind} ({job.id})")
+    return job
+
+def _run_job(app: Flask, job_id: int, season_id: int, task: Callable[..., str],
+             kwargs: dict) -> None:
+    """Run a job in the app context and record its status, progress and result. The work of the task
+    and the finished status are committed together at the end, or rolled back if the task fails.
+    Progress is written through a separate connection so it never commits the task's session."""
+
+    with app.app_context():
+        progress_engine = _progress_engine()
+        try:
+            job = Job.by_id(job_id)
+            job.status = 'running'
+            job.started = job.updated = datetime.now()
+            db.session.commit()
+
+            def progress(value: int) -> None:
+                _write_progress(progress_engine, job_id, value)
+
+            season = db.session.get(Season, season_id)
+            message = task(season, progress, **kwargs)
+
+            job.status = 'finished'
+            job.progress = 100
+            job.message = message
+            job.finished = job.updated = datetime.now()
+            db.session.commit()
+            app.logger.info(f"Job {job.kind} ({job_id}) finished in {job.duration:.2f} seconds: "
+                            f"{message}")
+        except Exception as error:
+            app.logger.exception(f"Job {job_id} failed")
+            db.session.rollback()
+            job = Job.by_id(job_id)
+            job.status = 'failed'
+            job.message = f"{type(error).__name__}: {error}"
+            job.finished = job.updated = datetime.now()
+            db.session.commit()
+        finally:
+            progress_engine.dispose()
+            db.session.remove()
+            with _lock:
+                _active_seasons.discard(season_id)
+
+def _progress_engine() -> Engine:
+    """Return an engine without a pool for writing the progress of a job next to the session of the
+    task. SQLite doesn't wait for the write lock, see _write_progress."""
+
+    url = db.engine.url
+    if url.get_backend_name() == 'sqlite':
+        return create_engine(url, poolclass=NullPool, connect_args={'timeout': 0})
+    return create_engine(url, poolclass=NullPool)
+
+def _write_progress(engine: Engine, job_id: int, value: int) -> None:
+    """Record the progress of a job in its own transaction. SQLite only has a single writer, so the
+    progress is skipped while the task holds the write lock instead of blocking the task."""
+
+    try:
+        with engine.begin() as connection:
+            connection.execute(update(Job).where(Job.id == job_id)
+                                          .values(progress=value, updated=datetime.now()))
+    except OperationalError as error:
+        current_app.logger.debug(f"Progress of job {job_id} skipped: {error}")
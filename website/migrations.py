@@ -0,0 +1,142 @@
+"""Migrations.
+
+db.create_all only creates missing tables and never alters existing ones, so changes to existing
+tables are made by the migrations below. Each migration runs once per database, in order, and is
+recorded in the schema_version table. Migrations must also be harmless on a new database where
+create_all has already created the current schema.
+"""
+
+from typing import Any, Callable
+from flask import current_app
+from sqlalchemy import Index, case, delete, func, insert, inspect, text, update
+from sqlalchemy.schema import CreateColumn
+from .models import Fixture, Result, ResultRound, SchemaVersion, TeamStanding, Tip
+from . import db
+
+def run_migrations() -> list[int]:
+    """Apply the migrations that haven't been applied to the database. Return the versions of
+    the applied migrations."""
+
+    applied = SchemaVersion.applied_versions()
+    versions = []
+    for version, description, migration in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            migration()
+            db.session.add(SchemaVersion(version=version, description=description))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception(f"Migration {version} failed: {description}")
+            raise
+        current_app.logger.info(f"Applied migration {version}: {description}")
+        versions.append(version)
+    return versions
+
+def _migrate_tip_indexes() -> None:
+    _delete_duplicates(Tip, Tip.user_id, Tip.fixture_id)
+    _create_index(Tip, 'ux_tip_user_id_fixture_id')
+    _create_index(Tip, 'ix_tip_fixture_id')
+
+def _migrate_fixture_indexes() -> None:
+    _create_index(Fixture, 'ix_fixture_season_id_date_time')
+
+def _migrate_team_standing_indexes() -> None:
+    _delete_duplicates(TeamStanding, TeamStanding.season_id, TeamStanding.team_id)
+    _create_index(TeamStanding, 'ux_team_standing_season_id_team_id')
+    _create_index(TeamStanding, 'ix_team_standing_season_id_rank')
+
+def _migrate_result_rounds() -> None:
+    # The round stats JSON only held the tips and correct tips of each round, so the rounds are
+    # rebuilt from the tips, which the JSON was calculated from
+    columns = [column['name'] for column in inspect(db.session.connection()).get_columns('result')]
+    if 'round_stats' not in columns:
+        return
+
+    rounds = (db.select(Result.id,
+                        Fixture.round,
+                        func.count(Tip.id),
+                        func.count(case((Tip.correct != 0, 1))),
+                        func.count(case((Tip.correct == 1, 1))))
+              .join(Tip, Tip.user_id == Result.user_id)
+              .join(Fixture, (Fixture.fixture_id == Tip.fixture_id)
+                    & (Fixture.season_id == Result.season_id))
+              .group_by(Result.id, Fixture.round))
+    db.session.execute(delete(ResultRound))
+    db.session.execute(insert(ResultRound).from_select(
+        ['result_id', 'round', 'tips', 'finished', 'correct'], rounds))
+    db.session.execute(text("ALTER TABLE result DROP COLUMN round_stats"))
+
+def _migrate_scored_fixtures() -> None:
+    # Existing fixtures have no scored outcome, so the next results update rescores all of them
+    _add_columns(Fixture, 'scored_round', 'scored_outcome')
+    # The decided tips are counted even if the columns exist, since create_all adds them to the
+    # result_round table that migration 4 fills when upgrading from before it
+    _add_columns(ResultRound, 'tip_1', 'tip_X', 'tip_2')
+
+    def decided(value: str) -> Any:
+        return (db.select(func.count(Tip.id))
+                .join(Fixture, Fixture.fixture_id == Tip.fixture_id)
+                .join(Result, (Result.user_id == Tip.user_id)
+                      & (Result.season_id == Fixture.season_id))
+                .where(Result.id == ResultRound.result_id,
+                       Fixture.round == ResultRound.round,
+                       Tip.correct != 0,
+                       Tip.tip == value)
+                .scalar_subquery())
+
+    db.session.execute(update(ResultRound)
+                       .values(tip_1=decided('1'), tip_X=decided('X'), tip_2=decided('2'))
+                       .execution_options(synchronize_session=False))
+
+def _add_columns(model: type[db.Model], *names: str) -> list[str]:
+    """Add the columns defined on a model that are missing from its table. Return the names of the
+    added columns."""
+
+    table = model.__table__
+    existing = {column['name'] for column in
+                inspect(db.session.connection()).get_columns(table.name)}
+    added = []
+    for name in names:
+        if name in existing:
+            continue
+        column = table.columns[name]
+        definition = str(CreateColumn(column).compile(dialect=db.session.get_bind().dialect))
+        # Columns added to existing rows need a default if they can't be null
+        if column.default is not None and column.default.is_scalar:
+            definition += f" DEFAULT {column.default.arg!r}"
+        db.session.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+        added.append(name)
+    return added
+
+def _delete_duplicates(model: type[db.Model], *columns) -> None:
+    """Delete all but the most recently created row of each group of rows with the same values in
+    the given columns, so a unique index can be created on them."""
+
+    latest = db.select(func.max(model.id)).group_by(*columns)
+    result = db.session.execute(delete(model).where(model.id.not_in(latest))
+                                .execution_options(synchronize_session=False))
+    if result.rowcount:
+        current_app.logger.info(f"Deleted {result.rowcount} duplicate rows from "
+                                f"{model.__tablename__}")
+
+def _create_index(model: type[db.Model], name: str) -> None:
+    """Create an index defined on a model if it doesn't exist."""
+
+    index: Index = next(index for index in model.__table__.indexes if index.name == name)
+    index.create(db.session.connection(), checkfirst=True)
+
+# Version, description and function of each migration. Never change or reorder an applied
+# migration, add a new one instead.
+MIGRATIONS: list[tuple[int, str, Callable[[], None]]] = [
+    (1, "Add unique index on tip user and fixture, and index on tip fixture",
+     _migrate_tip_indexes),
+    (2, "Add index on fixture season and date", _migrate_fixture_indexes),
+    (3, "Add unique index on team standing season and team, and index on season and rank",
+     _migrate_team_standing_indexes),
+    (4, "Move the round stats of results from JSON to the result_round table",
+     _migrate_result_rounds),
+    (5, "Add the scored round and outcome of fixtures, and decided tips per value of result rounds",
+     _migrate_scored_fixtures),
+]
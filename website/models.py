@@ -4,13 +4,32 @@ from __future__ import annotations
 
 import uuid
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from flask import current_app
 from flask_login import UserMixin
-from sqlalchemy import Boolean, ForeignKey, Integer, String, DateTime, Table, Column, Text
+from sqlalchemy import (Boolean, ForeignKey, Float, Index, Integer, String, DateTime, Table, Column,
+                        Text, case, func, insert, update)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Mapped, mapped_column, relationship, joinedload
-from typing import Any
-from . import db, ACTIVE_SEASON, SEASON_DISPLAY_NAME
+from typing import Any, NamedTuple
+from .cache import season_context
+from . import db, ACTIVE_SEASON, SEASON_DISPLAY_NAME, TIP_OPEN_STATUSES
+
+def _naive(value: Any) -> Any:
+    """Return a datetime without its timezone, matching how datetimes are stored in the database.
+    Other values are returned unchanged."""
+
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+def _upsert(model: type) -> Any:
+    """Return an INSERT statement for a model that supports ON CONFLICT clauses in the dialect of
+    the database, i.e. SQLite or PostgreSQL."""
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
 
 class Updateable:
     """Mixin class to add update_attributes method to models."""
@@ -23,6 +42,16 @@ class Updateable:
             if not str(key).startswith('_') and hasattr(self, key) and value is not None:
                 setattr(self, key, value)
 
+    def column_values(self) -> dict[str, Any]:
+        """Return a dictionary with the column values of the instance. Ignore None values."""
+
+        values = {}
+        for column in self.__table__.columns:
+            value = getattr(self, column.key)
+            if value is not None:
+                values[column.key] = value
+        return values
+
 class User(db.Model, UserMixin):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     username: Mapped[str] = mapped_column(String(100), unique=True)
@@ -78,6 +107,14 @@ class Fixture(db.Model, Updateable):
     away_team: Mapped['Team'] = relationship("Team", foreign_keys=[away_team_id])
     home_score: Mapped[int] = mapped_column(Integer, nullable=True)
     away_score: Mapped[int] = mapped_column(Integer, nullable=True)
+    # Round and outcome the tips of the fixture were last scored against. The outcome is '-' if
+    # the fixture hadn't finished, and None if the tips have changed since.
+    scored_round: Mapped[int] = mapped_column(Integer, nullable=True)
+    scored_outcome: Mapped[str] = mapped_column(String(1), nullable=True)
+
+    __table_args__ = (
+        Index('ix_fixture_season_id_date_time', 'season_id', 'date_time'),
+    )
 
     @staticmethod
     def by_id(fixture_id: int) -> Fixture:
@@ -87,25 +124,148 @@ class Fixture(db.Model, Updateable):
                           .scalar_one_or_none())
 
     @staticmethod
-    def by_season(season: str) -> list[Fixture]:
-        """Return the list of fixtures in a given season."""
+    def by_ids(fixture_ids: list[int], with_teams: bool = True) -> list[Fixture]:
+        """Return the list of fixtures with the given IDs sorted by kickoff time. If with_teams is
+        True, the home and away teams are loaded in the same query."""
+
+        return (db.session.query(Fixture)
+                .filter(Fixture.fixture_id.in_(fixture_ids))
+                .order_by(Fixture.date_time)
+                .options(*Fixture.loader_options(with_teams))
+                .all())
+
+    @staticmethod
+    def by_season(season: str, with_teams: bool = True) -> list[Fixture]:
+        """Return the list of fixtures in a given season. If with_teams is True, the home and away
+        teams are loaded in the same query."""
 
         return (db.session.query(Fixture)
                 .join(Fixture.season)
                 .filter(Season.season == season)
+                .options(*Fixture.loader_options(with_teams))
                 .all())
 
     @staticmethod
-    def by_dates(season: str, start_date: str, end_date: str) -> list[Fixture]:
-        """Return the list of fixtures in a given season between two dates."""
+    def by_dates(season: str, start_date: str, end_date: str,
+                 with_teams: bool = True) -> list[Fixture]:
+        """Return the list of fixtures in a given season between two dates. If with_teams is True,
+        the home and away teams are loaded in the same query."""
 
         return (db.session.query(Fixture)
                 .join(Fixture.season)
                 .filter(Season.season == season)
                 .filter(Fixture.date_time >= start_date)
                 .filter(Fixture.date_time <= end_date)
+                .options(*Fixture.loader_options(with_teams))
                 .all())
 
+    @staticmethod
+    def rounds_by_season_id(season_id: int, after: int | None = None, limit: int | None = None,
+                            start: datetime | None = None,
+                            end: datetime | None = None) -> list[int]:
+        """Return the rounds with fixtures in a given season in order. Only return rounds after a
+        given round, at most limit rounds, and rounds with fixtures between start and end if
+        given."""
+
+        query = (db.select(Fixture.round)
+                 .filter(Fixture.season_id == season_id, Fixture.round.is_not(None))
+                 .distinct()
+                 .order_by(Fixture.round)
+                 .limit(limit))
+        if after is not None:
+            query = query.filter(Fixture.round > after)
+        if start is not None:
+            query = query.filter(Fixture.date_time >= start)
+        if end is not None:
+            query = query.filter(Fixture.date_time <= end)
+        return db.session.execute(query).scalars().all()
+
+    @staticmethod
+    def columns_by_season_id(season_id: int, columns: list[Any], rounds: list[int],
+                             start: datetime | None = None,
+                             end: datetime | None = None) -> list[Any]:
+        """Return the given columns of the fixtures in the given rounds of a season ordered by
+        kickoff. Only return fixtures between start and end if given."""
+
+        query = (db.select(*columns)
+                 .select_from(Fixture)
+                 .filter(Fixture.season_id == season_id, Fixture.round.in_(rounds))
+                 .order_by(Fixture.round, Fixture.date_time, Fixture.fixture_id))
+        if start is not None:
+            query = query.filter(Fixture.date_time >= start)
+        if end is not None:
+            query = query.filter(Fixture.date_time <= end)
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def kickoffs_by_season(season_id: int) -> list[Any]:
+        """Return the kickoff time of every fixture in a given season. Each row contains the
+        columns 'date_time', 'fixture_id', 'round' and 'status'."""
+
+        return db.session.execute(db.select(Fixture.date_time,
+                                            Fixture.fixture_id,
+                                            Fixture.round,
+                                            Fixture.status)
+                                  .filter(Fixture.season_id == season_id)).all()
+
+    @staticmethod
+    def outcome() -> Any:
+        """Return an SQL expression for the outcome of a fixture: '1', 'X' or '2' if it has
+        finished, otherwise '-'."""
+
+        return case((Fixture.status != 'FT', '-'),
+                    (Fixture.home_score > Fixture.away_score, '1'),
+                    (Fixture.home_score < Fixture.away_score, '2'),
+                    else_='X')
+
+    @staticmethod
+    def unscored_by_season_id(season_id: int) -> list[Any]:
+        """Return the fixtures in a given season whose tips need to be scored, i.e. fixtures whose
+        round or outcome has changed or whose tips have changed since they were last scored. Each
+        row contains the columns 'fixture_id', 'round' and 'scored_round'."""
+
+        return db.session.execute(db.select(Fixture.fixture_id,
+                                            Fixture.round,
+                                            Fixture.scored_round)
+                                  .filter(Fixture.season_id == season_id)
+                                  .filter(Fixture.scored_outcome.is_(None)
+                                          | (Fixture.scored_outcome != Fixture.outcome())
+                                          | Fixture.scored_round.is_distinct_from(Fixture.round))
+                                  ).all()
+
+    @staticmethod
+    def mark_scored(season_id: int, fixture_ids: list[int] | None = None) -> None:
+        """Record the current round and outcome of the fixtures in a given season as scored. Only
+        mark the given fixtures if fixture_ids is given."""
+
+        query = (update(Fixture)
+                 .where(Fixture.season_id == season_id)
+                 .values(scored_round=Fixture.round, scored_outcome=Fixture.outcome())
+                 .execution_options(synchronize_session=False))
+        if fixture_ids is not None:
+            query = query.where(Fixture.fixture_id.in_(fixture_ids))
+        db.session.execute(query)
+
+    @staticmethod
+    def mark_unscored(fixture_ids: list[int]) -> None:
+        """Mark the given fixtures as having tips that need to be scored, after their tips have
+        been added or changed."""
+
+        if fixture_ids:
+            db.session.execute(update(Fixture)
+                               .where(Fixture.fixture_id.in_(fixture_ids))
+                               .values(scored_outcome=None)
+                               .execution_options(synchronize_session=False))
+
+    @staticmethod
+    def loader_options(with_teams: bool = True) -> list[Any]:
+        """Return the loader options for listing fixtures. If with_teams is True, the home and away
+        teams are joined into the query instead of being lazy loaded per fixture."""
+
+        if not with_teams:
+            return []
+        return [joinedload(Fixture.home_team), joinedload(Fixture.away_team)]
+
     @staticmethod
     def create_or_update(fixture: Fixture) -> None:
         """Create or update a fixture."""
@@ -118,6 +278,52 @@ class Fixture(db.Model, Updateable):
             db.session.add(fixture)
             current_app.logger.debug(f"Added fixture: {fixture.fixture_id}")
 
+    @staticmethod
+    def bulk_create_or_update(fixtures: list[dict[str, Any]]) -> dict[str, int]:
+        """Create or update a list of fixtures given as dictionaries of column values. Existing
+        fixtures are loaded in one query and the changes are written in batched statements. None
+        values are ignored when updating a fixture. Return a dictionary with the number of
+        'inserted', 'updated' and 'unchanged' fixtures, and the number of 'rescheduled' fixtures
+        that were inserted or had their date or status changed."""
+
+        columns = [column.key for column in Fixture.__table__.columns]
+        existing = {row.fixture_id: row for row in db.session.execute(
+            db.select(*Fixture.__table__.columns)
+            .filter(Fixture.fixture_id.in_([fixture['fixture_id'] for fixture in fixtures]))
+        )}
+
+        inserts = []
+        updates = []
+        rescheduled = 0
+        for fixture in fixtures:
+            values = {key: _naive(value) for key, value in fixture.items() if key in columns}
+            row = existing.get(values['fixture_id'])
+            if row is None:
+                inserts.append(values)
+                continue
+
+            changes = {key: value for key, value in values.items()
+                       if value is not None and getattr(row, key) != value}
+            if changes:
+                if 'date_time' in changes or 'status' in changes:
+                    rescheduled += 1
+                changes['fixture_id'] = values['fixture_id']
+                updates.append(changes)
+
+        if inserts:
+            db.session.execute(insert(Fixture), inserts)
+        if updates:
+            db.session.execute(update(Fixture), updates)
+
+        counts = {
+            'inserted': len(inserts),
+            'updated': len(updates),
+            'unchanged': len(fixtures) - len(inserts) - len(updates),
+            'rescheduled': len(inserts) + rescheduled
+        }
+        current_app.logger.debug(f"Bulk updated fixtures: {counts}")
+        return counts
+
 class Team(db.Model, Updateable):
     team_id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -158,11 +364,9 @@ class Team(db.Model, Updateable):
         # Check if standings exists for this team and season
         exisiting_standings: TeamStanding = (db.session.execute(db.select(TeamStanding)
                                                        .filter_by(team_id=team.team_id,
-                                                                  season=standings.season))
+                                                                  season_id=standings.season_id))
                                                        .scalar_one_or_none())
         if exisiting_standings is not None:
-            print(exisiting_standings.goals_scored)
-            print(standings.goals_scored)
             exisiting_standings.update_attributes(standings.__dict__)
             current_app.logger.debug(f"Updated standings for team: {team.name} "
                                      f"(ID: {team.team_id}, season: {standings.season})")
@@ -171,6 +375,61 @@ class Team(db.Model, Updateable):
             current_app.logger.debug(f"Added standings for team: {team.name} "
                                      f"(ID: {team.team_id}, season: {standings.season})")
 
+    @staticmethod
+    def bulk_create_or_update_rows(
+            teams_and_standings: list[tuple[dict[str, Any], dict[str, Any]]]) -> dict[str, int]:
+        """Create or update a list of teams and their standing for a season given as pairs of
+        dictionaries of column values. Existing teams and standings are loaded in two queries and
+        the changes are written in batched statements. None values are ignored when updating, and
+        a standing is only updated if any value other than last_update has changed. Return a
+        dictionary with the number of 'inserted' and 'updated' standings."""
+
+        if not teams_and_standings:
+            return {'inserted': 0, 'updated': 0}
+
+        team_ids = [team['team_id'] for team, _standing in teams_and_standings]
+        season_id = teams_and_standings[0][1]['season_id']
+        existing_teams = {row.team_id: row for row in db.session.execute(
+            db.select(*Team.__table__.columns).filter(Team.team_id.in_(team_ids)))}
+        existing_standings = {row.team_id: row for row in db.session.execute(
+            db.select(*TeamStanding.__table__.columns)
+            .filter(TeamStanding.season_id == season_id, TeamStanding.team_id.in_(team_ids)))}
+
+        team_inserts, team_updates, standing_inserts, standing_updates = [], [], [], []
+        for team, standing in teams_and_standings:
+            row = existing_teams.get(team['team_id'])
+            if row is None:
+                team_inserts.append(team)
+            else:
+                changes = {key: value for key, value in team.items()
+                           if value is not None and getattr(row, key) != value}
+                if changes:
+                    changes['team_id'] = team['team_id']
+                    team_updates.append(changes)
+
+            row = existing_standings.get(team['team_id'])
+            if row is None:
+                standing_inserts.append(standing)
+            else:
+                changes = {key: value for key, value in standing.items()
+                           if value is not None and key != 'last_update'
+                           and getattr(row, key) != value}
+                if changes:
+                    changes['id'] = row.id
+                    if standing.get('last_update') is not None:
+                        changes['last_update'] = standing['last_update']
+                    standing_updates.append(changes)
+
+        for statement, rows in ((insert(Team), team_inserts), (update(Team), team_updates),
+                                (insert(TeamStanding), standing_inserts),
+                                (update(TeamStanding), standing_updates)):
+            if rows:
+                db.session.execute(statement, rows)
+
+        counts = {'inserted': len(standing_inserts), 'updated': len(standing_updates)}
+        current_app.logger.debug(f"Bulk updated standings for season ID {season_id}: {counts}")
+        return counts
+
 class TeamStanding(db.Model, Updateable):
     id: Mapped[int] = mapped_column(primary_key=True)
     season_id: Mapped[int] = mapped_column(ForeignKey('season.id'), nullable=False)
@@ -193,6 +452,22 @@ class TeamStanding(db.Model, Updateable):
     team_id: Mapped[int] = mapped_column(ForeignKey('team.team_id'))
     team: Mapped['Team'] = relationship("Team", back_populates='standings')
 
+    __table_args__ = (
+        Index('ux_team_standing_season_id_team_id', 'season_id', 'team_id', unique=True),
+        Index('ix_team_standing_season_id_rank', 'season_id', 'rank'),
+    )
+
+    @staticmethod
+    def columns_by_season_id(season_id: int, columns: list[Any]) -> list[Any]:
+        """Return the given columns of the team standings in a given season joined with their team
+        and ordered by rank."""
+
+        return db.session.execute(db.select(*columns)
+                                  .select_from(TeamStanding)
+                                  .join(TeamStanding.team)
+                                  .filter(TeamStanding.season_id == season_id)
+                                  .order_by(TeamStanding.rank)).all()
+
     @staticmethod
     def by_season(season: str) -> list[TeamStanding]:
         """Return the list of teams in a given season ordered by their rank."""
@@ -201,6 +476,7 @@ class TeamStanding(db.Model, Updateable):
                 .join(TeamStanding.season)
                 .filter(Season.season == season)
                 .order_by(TeamStanding.rank)
+                .options(joinedload(TeamStanding.team))
                 .all())
 
 class Tip(db.Model):
@@ -213,6 +489,12 @@ class Tip(db.Model):
     user_id: Mapped[str] = mapped_column(ForeignKey('user.id'))
     user: Mapped['User'] = relationship("User", back_populates='tips')
 
+    __table_args__ = (
+        Index('ux_tip_user_id_fixture_id', 'user_id', 'fixture_id', unique=True),
+        # Tips are joined to the fixtures of a season
+        Index('ix_tip_fixture_id', 'fixture_id'),
+    )
+
     @staticmethod
     def by_fixure_id(user: User, fixture_id: int) -> Tip:
         """Return the tip in a given a user and a fixture ID."""
@@ -221,6 +503,104 @@ class Tip(db.Model):
                                   .filter_by(user_id=user.id)
                                   .filter_by(fixture_id=fixture_id)).scalar_one_or_none()
 
+    @staticmethod
+    def with_fixtures_by_season(season_id: int,
+                                fixture_ids: list[int] | None = None) -> list[Any]:
+        """Return all tips in a given season joined with the status and score of their fixture.
+        Each row contains the columns 'id', 'user_id', 'tip', 'correct', 'round', 'status',
+        'home_score' and 'away_score'. Only return the tips in the given fixtures if fixture_ids
+        is given."""
+
+        query = (db.select(Tip.id,
+                           Tip.user_id,
+                           Tip.tip,
+                           Tip.correct,
+                           Fixture.round,
+                           Fixture.status,
+                           Fixture.home_score,
+                           Fixture.away_score)
+                 .join(Fixture, Fixture.fixture_id == Tip.fixture_id)
+                 .filter(Fixture.season_id == season_id))
+        if fixture_ids is not None:
+            query = query.filter(Tip.fixture_id.in_(fixture_ids))
+
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def columns_by_season_id(user: User, season_id: int, columns: list[Any], rounds: list[int],
+                             visible_to: User | None = None) -> list[Any]:
+        """Return the given columns of a user's tips in the given rounds of a season joined with
+        their fixture and ordered by kickoff. If visible_to is given, only return the tips in
+        fixtures that user has tipped as well."""
+
+        query = (db.select(*columns)
+                 .select_from(Tip)
+                 .join(Fixture, Fixture.fixture_id == Tip.fixture_id)
+                 .filter(Tip.user_id == user.id,
+                         Fixture.season_id == season_id,
+                         Fixture.round.in_(rounds))
+                 .order_by(Fixture.round, Fixture.date_time, Fixture.fixture_id))
+        if visible_to is not None:
+            query = query.filter(Tip.fixture_id.in_(db.select(Tip.fixture_id)
+                                                    .filter(Tip.user_id == visible_to.id)))
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def values_by_season_id(user: User, season_id: int) -> dict[int, str]:
+        """Return the tip values of a user in a given season by fixture ID."""
+
+        return dict(db.session.execute(db.select(Tip.fixture_id, Tip.tip)
+                                       .join(Fixture, Fixture.fixture_id == Tip.fixture_id)
+                                       .filter(Tip.user_id == user.id,
+                                               Fixture.season_id == season_id)).all())
+
+    @staticmethod
+    def with_usernames_by_season(season_id: int) -> list[Any]:
+        """Return all tips in a given season together with the username of the tipper, ordered by
+        user. Each row contains the columns 'fixture_id', 'user_id', 'username' and 'tip'."""
+
+        return db.session.execute(db.select(Tip.fixture_id, Tip.user_id, User.username, Tip.tip)
+                                  .join(User, User.id == Tip.user_id)
+                                  .join(Fixture, Fixture.fixture_id == Tip.fixture_id)
+                                  .filter(Fixture.season_id == season_id)
+                                  .order_by(User.timestamp, Tip.id)).all()
+
+    @staticmethod
+    def upcoming_by_season(season: str) -> list[tuple[Tip, Fixture]]:
+        """Return all tips in fixtures that have not started in a given season together with their
+        fixture ordered by date. The teams of each fixture are loaded in the same query."""
+
+        return db.session.execute(db.select(Tip, Fixture)
+                                  .join(Fixture, Fixture.fixture_id == Tip.fixture_id)
+                                  .join(Fixture.season)
+                                  .filter(Season.season == season)
+                                  .filter(Fixture.status == 'NS')
+                                  .order_by(Fixture.date_time, Fixture.fixture_id)
+                                  .options(*Fixture.loader_options())).all()
+
+    @staticmethod
+    def stats_by_round(season_id: int, rounds: list[int] | None = None) -> list[Any]:
+        """Return the number of tips per user and round in a given season counted from the stored
+        status of each tip. Each row contains the columns 'user_id', 'round', 'tips', 'finished',
+        'correct', and 'tip_1', 'tip_X' and 'tip_2' with the number of finished tips per value.
+        Only count the given rounds if rounds is given."""
+
+        finished = Tip.correct != 0
+        query = (db.select(Tip.user_id,
+                           Fixture.round,
+                           func.count(Tip.id).label('tips'),
+                           func.count(case((finished, 1))).label('finished'),
+                           func.count(case((Tip.correct == 1, 1))).label('correct'),
+                           func.count(case((finished & (Tip.tip == '1'), 1))).label('tip_1'),
+                           func.count(case((finished & (Tip.tip == 'X'), 1))).label('tip_X'),
+                           func.count(case((finished & (Tip.tip == '2'), 1))).label('tip_2'))
+                 .join(Fixture, Fixture.fixture_id == Tip.fixture_id)
+                 .filter(Fixture.season_id == season_id)
+                 .group_by(Tip.user_id, Fixture.round))
+        if rounds is not None:
+            query = query.filter(Fixture.round.in_(rounds))
+        return db.session.execute(query).all()
+
     @staticmethod
     def create_or_update(user: User, fixture_id: int, value: str) -> Tip:
         """Create or update a tip for a user and a fixture ID. Return the created or updated tip."""
@@ -234,9 +614,57 @@ class Tip(db.Model):
         else:
             tip = Tip(fixture_id=fixture_id, tip=value, user_id=user.id)
             db.session.add(tip)
+        Fixture.mark_unscored([fixture_id])
 
         return tip
 
+    @staticmethod
+    def bulk_create_or_update(user: User, tips: dict[int, str],
+                              allow_late_modification: bool) -> dict[int, str]:
+        """Create or update a user's tips given as a dictionary of tips by fixture ID. The
+        fixtures and the user's existing tips are loaded in one query, and the new and changed
+        tips are written in one batched upsert. A tip is only accepted if it is valid and its
+        fixture exists and hasn't started, unless late modification is allowed. Fixtures without
+        a kickoff time haven't started. Return the outcome per fixture ID: 'accepted', 'invalid',
+        'unknown' or 'closed'."""
+
+        rows = db.session.execute(db.select(Fixture.fixture_id, Fixture.status, Fixture.date_time,
+                                            Tip.tip)
+                                  .outerjoin(Tip, (Tip.fixture_id == Fixture.fixture_id)
+                                                  & (Tip.user_id == user.id))
+                                  .filter(Fixture.fixture_id.in_(tips.keys())))
+        fixtures = {row.fixture_id: row for row in rows}
+
+        now = datetime.now()
+        results = {}
+        upserts = []
+        for fixture_id, value in tips.items():
+            fixture = fixtures.get(fixture_id)
+            if value not in ['1', 'X', '2']:
+                results[fixture_id] = 'invalid'
+            elif fixture is None:
+                results[fixture_id] = 'unknown'
+            elif not allow_late_modification and (fixture.status not in TIP_OPEN_STATUSES
+                                                  or (fixture.date_time is not None
+                                                      and fixture.date_time <= now)):
+                results[fixture_id] = 'closed'
+            else:
+                results[fixture_id] = 'accepted'
+                if fixture.tip != value:
+                    upserts.append({'fixture_id': fixture_id, 'tip': value, 'user_id': user.id,
+                                    'correct': 0})
+
+        if upserts:
+            # A tip registered by a concurrent request replaces the existing one
+            statement = _upsert(Tip)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['user_id', 'fixture_id'], set_={'tip': statement.excluded.tip}),
+                upserts)
+            Fixture.mark_unscored([row['fixture_id'] for row in upserts])
+
+        current_app.logger.debug(f"Registered {len(upserts)} tips for user: {user.username}")
+        return results
+
 # Association table to link Result and Team with an additional 'rank' column
 result_team_association = Table(
     'result_team_association',
@@ -259,9 +687,10 @@ class Result(db.Model, Updateable):
     tip_1: Mapped[int] = mapped_column(Integer, default=0)
     tip_X: Mapped[int] = mapped_column(Integer, default=0)
     tip_2: Mapped[int] = mapped_column(Integer, default=0)
-    # Round stats stored as JSON string in the format:
-    # {"<round>": {"tips": <value>, "correct": <value>}
-    round_stats: Mapped[str] = mapped_column(Text, default='')
+    # Tips per round ordered by round
+    rounds: Mapped[list['ResultRound']] = relationship("ResultRound", back_populates='result',
+                                                       order_by='ResultRound.round',
+                                                       cascade='all, delete-orphan')
     # Teams ordered by the user's ranking
     team_rankings: Mapped[list['Team']] = relationship("Team",
                                                        secondary=result_team_association,
@@ -281,6 +710,36 @@ class Result(db.Model, Updateable):
                 .filter(Season.season == season)
                 .all())
 
+    @staticmethod
+    def with_users_by_season(season: str) -> list[tuple[User, Result]]:
+        """Return the list of non-admin users and their result in a given season ordered by the
+        users' creation time."""
+
+        return db.session.execute(db.select(User, Result)
+                                  .join(Result, Result.user_id == User.id)
+                                  .join(Result.season)
+                                  .filter(Season.season == season)
+                                  .filter(User.is_admin.is_(False))
+                                  .order_by(User.timestamp)).all()
+
+    @staticmethod
+    def columns_by_season_id(season_id: int, columns: list[Any]) -> list[Any]:
+        """Return the given columns of the results of non-admin users in a given season joined
+        with their user and ordered by the users' creation time."""
+
+        return db.session.execute(db.select(*columns)
+                                  .select_from(Result)
+                                  .join(Result.user)
+                                  .filter(Result.season_id == season_id)
+                                  .filter(User.is_admin.is_(False))
+                                  .order_by(User.timestamp)).all()
+
+    @staticmethod
+    def by_season_id(season_id: int) -> list[Result]:
+        """Return the list of results in a given season given the season's ID."""
+
+        return db.session.execute(db.select(Result).filter_by(season_id=season_id)).scalars().all()
+
     @staticmethod
     def create_or_update(result: Result) -> None:
         """Create or update a fixture."""
@@ -296,6 +755,177 @@ class Result(db.Model, Updateable):
             db.session.add(result)
             current_app.logger.debug(f"Added result: {result.id}")
 
+class ResultRound(db.Model):
+    id: Mapped[int] = mapped_column(primary_key=True)
+    result_id: Mapped[int] = mapped_column(ForeignKey('result.id'), nullable=False)
+    result: Mapped['Result'] = relationship("Result", back_populates='rounds')
+    round: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Total tips made in the round
+    tips: Mapped[int] = mapped_column(Integer, default=0)
+    # Tips in the round that have been decided
+    finished: Mapped[int] = mapped_column(Integer, default=0)
+    correct: Mapped[int] = mapped_column(Integer, default=0)
+    # Decided tips in the round per value
+    tip_1: Mapped[int] = mapped_column(Integer, default=0)
+    tip_X: Mapped[int] = mapped_column(Integer, default=0)
+    tip_2: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        Index('ux_result_round_result_id_round', 'result_id', 'round', unique=True),
+    )
+
+    @staticmethod
+    def rows_by_season_id(season_id: int, rounds: list[int] | None = None) -> list[Any]:
+        """Return the rounds of all results in a given season, or only the given rounds if rounds
+        is given. Each row contains the columns of the round and the 'user_id' of its result."""
+
+        query = (db.select(*ResultRound.__table__.columns, Result.user_id)
+                 .join(ResultRound.result)
+                 .filter(Result.season_id == season_id))
+        if rounds is not None:
+            query = query.filter(ResultRound.round.in_(rounds))
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def rows_by_season(season: str) -> list[Any]:
+        """Return the rounds of all results in a given season ordered by round. Each row contains
+        the columns 'user_id', 'round', 'tips', 'finished' and 'correct'."""
+
+        return db.session.execute(db.select(Result.user_id,
+                                            ResultRound.round,
+                                            ResultRound.tips,
+                                            ResultRound.finished,
+                                            ResultRound.correct)
+                                  .join(ResultRound.result)
+                                  .join(Result.season)
+                                  .filter(Season.season == season)
+                                  .order_by(ResultRound.round)).all()
+
+    @staticmethod
+    def columns_by_season_id(season_id: int, columns: list[Any], rounds: list[int]) -> list[Any]:
+        """Return the given columns of the rounds of non-admin users' results in the given rounds
+        of a season joined with their result and user, ordered by round and the users' creation
+        time."""
+
+        return db.session.execute(db.select(*columns)
+                                  .select_from(ResultRound)
+                                  .join(ResultRound.result)
+                                  .join(Result.user)
+                                  .filter(Result.season_id == season_id,
+                                          ResultRound.round.in_(rounds))
+                                  .filter(User.is_admin.is_(False))
+                                  .order_by(ResultRound.round, User.timestamp)).all()
+
+    @staticmethod
+    def best_by_season(season: str) -> list[Any]:
+        """Return the best round of each user in a given season, i.e. the earliest round with the
+        most correct tips. Each row contains the columns 'user_id', 'round' and 'correct'."""
+
+        ranked = (db.select(Result.user_id,
+                            ResultRound.round,
+                            ResultRound.correct,
+                            func.row_number()
+                            .over(partition_by=ResultRound.result_id,
+                                  order_by=(ResultRound.correct.desc(), ResultRound.round))
+                            .label('position'))
+                  .join(ResultRound.result)
+                  .join(Result.season)
+                  .filter(Season.season == season)
+                  .subquery())
+        return db.session.execute(db.select(ranked.c.user_id, ranked.c.round, ranked.c.correct)
+                                  .filter(ranked.c.position == 1)).all()
+
+class LeaderboardEntry(db.Model):
+    id: Mapped[int] = mapped_column(primary_key=True)
+    season_id: Mapped[int] = mapped_column(ForeignKey('season.id'), nullable=False)
+    # Round of the entry, or 0 for the whole season
+    round: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[str] = mapped_column(ForeignKey('user.id'), nullable=False)
+    user: Mapped['User'] = relationship("User")
+    # Number of correct tips
+    points: Mapped[int] = mapped_column(Integer, default=0)
+    finished: Mapped[int] = mapped_column(Integer, default=0)
+    # Share of the finished tips that are correct
+    accuracy: Mapped[float] = mapped_column(Float, default=0)
+    # Rank by points. Users with the same points share the rank.
+    rank: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Rank before the rank last changed, or None if it hasn't changed
+    previous_rank: Mapped[int] = mapped_column(Integer, nullable=True)
+    last_update: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index('ux_leaderboard_entry_season_id_round_user_id', 'season_id', 'round', 'user_id',
+              unique=True),
+        Index('ix_leaderboard_entry_season_id_round_rank', 'season_id', 'round', 'rank'),
+    )
+
+    @property
+    def movement(self) -> int:
+        """Return the number of places the user has moved up since the rank last changed."""
+
+        return 0 if self.previous_rank is None else self.previous_rank - self.rank
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the entry as a JSON serializable dictionary."""
+
+        return {
+            'username': self.user.username,
+            'points': self.points,
+            'finished': self.finished,
+            'accuracy': round(self.accuracy, 3),
+            'rank': self.rank,
+            'movement': self.movement
+        }
+
+    @staticmethod
+    def rows_by_season_id(season_id: int) -> list[Any]:
+        """Return the column values of all entries in a given season."""
+
+        return db.session.execute(db.select(*LeaderboardEntry.__table__.columns)
+                                  .filter_by(season_id=season_id)).all()
+
+    @staticmethod
+    def top(season_id: int, round_number: int, limit: int) -> list[LeaderboardEntry]:
+        """Return the entries with the best rank in a round of a given season."""
+
+        return (db.session.execute(db.select(LeaderboardEntry)
+                                   .filter_by(season_id=season_id, round=round_number)
+                                   .order_by(LeaderboardEntry.rank, LeaderboardEntry.user_id)
+                                   .limit(limit)
+                                   .options(joinedload(LeaderboardEntry.user)))
+                          .scalars().all())
+
+    @staticmethod
+    def around(season_id: int, round_number: int, user_id: str,
+               size: int) -> list[LeaderboardEntry]:
+        """Return a user's entry in a round of a given season together with up to size entries
+        before and after it in leaderboard order, or an empty list if the user has no entry."""
+
+        entry = (db.session.execute(db.select(LeaderboardEntry)
+                                    .filter_by(season_id=season_id, round=round_number,
+                                               user_id=user_id)
+                                    .options(joinedload(LeaderboardEntry.user)))
+                           .scalar_one_or_none())
+        if entry is None:
+            return []
+
+        in_round = db.select(LeaderboardEntry).filter_by(season_id=season_id, round=round_number)
+        before = (LeaderboardEntry.rank < entry.rank) | ((LeaderboardEntry.rank == entry.rank)
+                                                         & (LeaderboardEntry.user_id < user_id))
+        after = (LeaderboardEntry.rank > entry.rank) | ((LeaderboardEntry.rank == entry.rank)
+                                                        & (LeaderboardEntry.user_id > user_id))
+        entries_before = db.session.execute(in_round.filter(before)
+                                            .order_by(LeaderboardEntry.rank.desc(),
+                                                      LeaderboardEntry.user_id.desc())
+                                            .limit(size)
+                                            .options(joinedload(LeaderboardEntry.user))).scalars()
+        entries_after = db.session.execute(in_round.filter(after)
+                                           .order_by(LeaderboardEntry.rank,
+                                                     LeaderboardEntry.user_id)
+                                           .limit(size)
+                                           .options(joinedload(LeaderboardEntry.user))).scalars()
+        return list(reversed(entries_before.all())) + [entry] + entries_after.all()
+
 class General(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     season_id: Mapped[int] = mapped_column(ForeignKey('season.id'), nullable=False)
@@ -366,11 +996,183 @@ class Season(db.Model):
         db.session.add(new_season)
         return new_season
 
+    def info(self) -> SeasonInfo:
+        """Return a read-only copy of the season that can be used outside of a session."""
+
+        return SeasonInfo(id=self.id, season=self.season, display_name=self.display_name)
+
     @staticmethod
     def get_season_data() -> dict[str, Any]:
-        """Return a dictionary with the active season and all seasons."""
+        """Return a dictionary with the active season, all seasons and whether late modification
+        of tips is allowed. The data is cached for the process until invalidated with
+        season_context.invalidate()."""
+
+        return season_context.get(Season.load_season_data)
 
+    @staticmethod
+    def get_season_info(season: str | None = None) -> SeasonInfo | None:
+        """Return the cached info of a given season, or of the active season if season is None.
+        Return None if the season doesn't exist."""
+
+        season_data = Season.get_season_data()
+        if season is None:
+            return season_data['active_season']
+        return next((info for info in season_data['all_seasons'] if info.season == season), None)
+
+    @staticmethod
+    def load_season_data() -> dict[str, Any]:
+        """Load the season data returned by get_season_data from the database."""
+
+        general = General.get()
         return {
-            'active_season': General.get_active_season(),
-            'all_seasons': Season.all()
+            'active_season': General.get_active_season().info(),
+            'all_seasons': [season.info() for season in Season.all()],
+            'allow_late_modification': general.allow_late_modification if general else False
         }
+
+class SeasonInfo(NamedTuple):
+    """Read-only copy of a season."""
+
+    id: int
+    season: str
+    display_name: str
+
+class Job(db.Model):
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Type of the job. Valid values are 'fixtures', 'standings', 'results', 'backfill-fixtures'
+    # and 'backfill-standings'.
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    season_id: Mapped[int] = mapped_column(ForeignKey('season.id'), nullable=False)
+    season: Mapped['Season'] = relationship("Season", foreign_keys=[season_id])
+    # Status of the job. Valid values are 'queued', 'running', 'finished' or 'failed'.
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default='queued')
+    # Progress of the job in percent
+    progress: Mapped[int] = mapped_column(Integer, default=0)
+    message: Mapped[str] = mapped_column(Text, nullable=True)
+    created: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    started: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    finished: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # Last time the job reported progress, used to detect jobs abandoned by a stopped process
+    updated: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    @property
+    def duration(self) -> float:
+        """Return the duration of the job in seconds, or None if it hasn't started."""
+
+        if self.started is None:
+            return None
+        return ((self.finished or datetime.now()) - self.started).total_seconds()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the job as a JSON serializable dictionary."""
+
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'season': self.season.season,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'duration': self.duration
+        }
+
+    @staticmethod
+    def by_id(job_id: int) -> Job:
+        """Return the job given an ID."""
+
+        return db.session.execute(db.select(Job).filter_by(id=job_id)).scalar_one_or_none()
+
+    @staticmethod
+    def recent(limit: int = 10) -> list[Job]:
+        """Return the most recently created jobs."""
+
+        return (db.session.execute(db.select(Job).order_by(Job.id.desc()).limit(limit))
+                          .scalars().all())
+
+    @staticmethod
+    def active_by_season(season_id: int, stale_after: int) -> Job:
+        """Return a queued or running job in a given season that has reported progress within the
+        last stale_after seconds, or None if there is no such job."""
+
+        return (db.session.execute(db.select(Job)
+                                   .filter(Job.season_id == season_id)
+                                   .filter(Job.status.in_(['queued', 'running']))
+                                   .filter(Job.updated >= datetime.now() -
+                                           timedelta(seconds=stale_after))
+                                   .limit(1))
+                          .scalar_one_or_none())
+
+    @staticmethod
+    def latest(kind: str, season_id: int) -> Job:
+        """Return the most recently created job of a kind in a given season, or None."""
+
+        return (db.session.execute(db.select(Job)
+                                   .filter_by(kind=kind, season_id=season_id)
+                                   .order_by(Job.id.desc())
+                                   .limit(1))
+                          .scalar_one_or_none())
+
+    @staticmethod
+    def create(kind: str, season: Season) -> Job:
+        """Create a new queued job and add it to the database."""
+
+        job = Job(kind=kind, season_id=season.id, status='queued')
+        db.session.add(job)
+        return job
+
+class SchemaVersion(db.Model):
+    # Version of an applied migration, see migrations.py
+    version: Mapped[int] = mapped_column(primary_key=True)
+    description: Mapped[str] = mapped_column(String(200), nullable=False)
+    applied: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    @staticmethod
+    def applied_versions() -> set[int]:
+        """Return the versions of all applied migrations."""
+
+        return set(db.session.execute(db.select(SchemaVersion.version)).scalars())
+
+class DataVersion(db.Model):
+    id: Mapped[int] = mapped_column(primary_key=True)
+    season_id: Mapped[int] = mapped_column(ForeignKey('season.id'), nullable=False)
+    # Kind of data. Valid values are 'fixtures', 'standings', 'results' and 'tips'.
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    # Increased every time the data changes
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    last_update: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ux_data_version_season_id_kind', 'season_id', 'kind', unique=True),
+    )
+
+    @staticmethod
+    def by_season_id(season_id: int) -> dict[str, DataVersion]:
+        """Return the data versions of a given season by kind."""
+
+        return {version.kind: version for version in db.session.execute(
+            db.select(DataVersion).filter_by(season_id=season_id)).scalars()}
+
+    @staticmethod
+    def bump(season_id: int | None, *kinds: str) -> None:
+        """Increase the versions of the given kinds of data in a season, or in all seasons if the
+        season ID is None."""
+
+        # Stored in UTC without a time zone since it is used for HTTP Last-Modified headers
+        last_update = datetime.now(timezone.utc).replace(tzinfo=None)
+        if season_id is None:
+            season_ids = db.session.execute(db.select(Season.id)).scalars().all()
+        else:
+            season_ids = [season_id]
+        existing = set(db.session.execute(db.select(DataVersion.season_id, DataVersion.kind)
+                                          .filter(DataVersion.season_id.in_(season_ids),
+                                                  DataVersion.kind.in_(kinds))).all())
+        db.session.execute(update(DataVersion)
+                           .where(DataVersion.season_id.in_(season_ids),
+                                  DataVersion.kind.in_(kinds))
+                           .values(version=DataVersion.version + 1, last_update=last_update)
+                           .execution_options(synchronize_session=False))
+        inserts = [{'season_id': bumped_id, 'kind': kind, 'version': 1, 'last_update': last_update}
+                   for bumped_id in season_ids for kind in kinds
+                   if (bumped_id, kind) not in existing]
+        if inserts:
+            db.session.execute(insert(DataVersion), inserts)
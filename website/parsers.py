@@ -0,0 +1,189 @@
+"""Parsers for API payloads.
+
+Batch counterparts of the schemas in schemas.py that turn a whole 'response' list into plain row
+dictionaries ready for bulk upserts. They validate the same fields as the schemas and raise a
+ValidationError with the errors of all records keyed by their index in the list.
+"""
+
+import datetime
+
+from typing import Any
+from marshmallow import ValidationError
+
+FIXTURE_TEAMS_KEYS = frozenset(('home', 'away'))
+FIXTURE_GOALS_KEYS = frozenset(('home', 'away'))
+TEAM_KEYS = frozenset(('id', 'name', 'logo'))
+TEAM_GOALS_KEYS = frozenset(('for', 'against'))
+
+# Promotion values by a phrase in the standing description, checked in order
+PROMOTIONS = (
+    ('Champions League', 'CL'),
+    ('Europa League', 'EL'),
+    ('Conference League', 'ECL'),
+    ('Relegation', 'R')
+)
+
+class _Errors:
+    """Collects field errors in the nested format used by marshmallow."""
+
+    def __init__(self):
+        self.messages: dict[int, dict] = {}
+        self.index: int = 0
+
+    def add(self, path: tuple[str, ...], message: str) -> None:
+        """Add an error message for a field path in the current record."""
+
+        messages = self.messages.setdefault(self.index, {})
+        for key in path[:-1]:
+            messages = messages.setdefault(key, {})
+        messages.setdefault(path[-1], []).append(message)
+
+    def raise_if_any(self) -> None:
+        """Raise a ValidationError if any errors have been added."""
+
+        if self.messages:
+            raise ValidationError(self.messages)
+
+def parse_fixtures(response: list[dict[str, Any]], season_id: int) -> list[dict[str, Any]]:
+    """Parse the 'response' list of a fixtures payload into fixture column values. Raise a
+    ValidationError if any fixture is invalid."""
+
+    errors = _Errors()
+    fixtures = []
+    for index, fixture_json in enumerate(response):
+        errors.index = index
+        fixture = _dict(fixture_json.get('fixture'), ('fixture',), errors)
+        teams = _dict(fixture_json.get('teams'), ('teams',), errors, FIXTURE_TEAMS_KEYS)
+        goals = _dict(fixture_json.get('goals'), ('goals',), errors, FIXTURE_GOALS_KEYS)
+        league = _dict(fixture_json.get('league'), ('league',), errors)
+        if fixture is None or teams is None or goals is None or league is None:
+            continue
+
+        fixture_round = _str(league.get('round'), ('league',), errors)
+        try:
+            fixture_round = int(fixture_round.split(' - ')[1])
+        except (AttributeError, IndexError, ValueError):
+            errors.add(('league',), "Not a valid round.")
+
+        fixtures.append({
+            'fixture_id': _int(fixture.get('id'), ('fixture', 'id'), errors),
+            'season_id': season_id,
+            'round': fixture_round,
+            'date_time': _datetime(fixture.get('date'), ('fixture', 'date'), errors),
+            'status': _str(_reach(fixture.get('status'), 'short'), ('fixture', 'status'), errors),
+            'home_team_id': _int(_reach(teams.get('home'), 'id'), ('teams', 'home'), errors),
+            'away_team_id': _int(_reach(teams.get('away'), 'id'), ('teams', 'away'), errors),
+            'home_score': _int(goals.get('home'), ('goals', 'home'), errors, allow_none=True),
+            'away_score': _int(goals.get('away'), ('goals', 'away'), errors, allow_none=True)
+        })
+
+    errors.raise_if_any()
+    return fixtures
+
+def parse_standings(response: list[dict[str, Any]],
+                    season_id: int) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+    """Parse the standings list of a standings payload into pairs of team and standing column
+    values. Raise a ValidationError if any standing is invalid."""
+
+    errors = _Errors()
+    last_update = datetime.datetime.now()
+    teams_and_standings = []
+    for index, standing_json in enumerate(response):
+        errors.index = index
+        team_json = _dict(standing_json.get('team'), ('team',), errors, TEAM_KEYS)
+        all_json = _dict(standing_json.get('all'), ('all',), errors)
+        if team_json is None or all_json is None:
+            continue
+        goals = _dict(all_json.get('goals'), ('all', 'goals'), errors, TEAM_GOALS_KEYS)
+        if goals is None:
+            continue
+
+        team = {
+            'team_id': _int(team_json.get('id'), ('team', 'id'), errors),
+            'name': _str(team_json.get('name'), ('team', 'name'), errors),
+            'logo': _str(team_json.get('logo'), ('team', 'logo'), errors, allow_none=True)
+        }
+
+        promotion = _str(standing_json.get('description'), ('description',), errors,
+                         allow_none=True)
+        if promotion:
+            promotion = next((value for phrase, value in PROMOTIONS if phrase in promotion),
+                             promotion)
+
+        standing = {
+            'season_id': season_id,
+            'team_id': team['team_id'],
+            'rank': _int(standing_json.get('rank'), ('rank',), errors),
+            'points': _int(standing_json.get('points', 0), ('points',), errors, allow_none=True),
+            'games_played': _int(all_json.get('played'), ('all', 'played'), errors),
+            'wins': _int(all_json.get('win'), ('all', 'win'), errors),
+            'draws': _int(all_json.get('draw'), ('all', 'draw'), errors),
+            'losses': _int(all_json.get('lose'), ('all', 'lose'), errors),
+            'goals_scored': _int(goals.get('for', 0), ('all', 'goals', 'for'), errors),
+            'goals_conceded': _int(goals.get('against', 0), ('all', 'goals', 'against'), errors),
+            'form': _str(standing_json.get('form', ''), ('form',), errors, allow_none=True),
+            'status': _str(standing_json.get('status', ''), ('status',), errors, allow_none=True),
+            'promotion': promotion,
+            'last_update': last_update
+        }
+        teams_and_standings.append((team, standing))
+
+    errors.raise_if_any()
+    return teams_and_standings
+
+def _dict(value: Any, path: tuple[str, ...], errors: _Errors,
+          keys: frozenset[str] = None) -> dict[str, Any]:
+    """Return a nested dictionary, or None and add an error if it is invalid or has unknown keys
+    when the known keys are given."""
+
+    if type(value) is not dict:  # pylint: disable=unidiomatic-typecheck
+        errors.add(path, "Invalid input type." if value is not None else "Field may not be null.")
+        return None
+    if keys is not None and not value.keys() <= keys:
+        for key in value.keys() - keys:
+            errors.add(path + (key,), "Unknown field.")
+    return value
+
+def _reach(value: Any, key: str) -> Any:
+    """Return a value in a nested dictionary, or None if it is missing."""
+
+    return value.get(key) if type(value) is dict else None  # pylint: disable=unidiomatic-typecheck
+
+def _int(value: Any, path: tuple[str, ...], errors: _Errors, allow_none: bool = False) -> int:
+    """Return a value as an integer, or add an error if it is not a valid integer."""
+
+    if type(value) is int:  # pylint: disable=unidiomatic-typecheck
+        return value
+    if value is None:
+        if not allow_none:
+            errors.add(path, "Field may not be null.")
+        return None
+    if value is not True and value is not False:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+    errors.add(path, "Not a valid integer.")
+    return None
+
+def _str(value: Any, path: tuple[str, ...], errors: _Errors, allow_none: bool = False) -> str:
+    """Return a string value, or add an error if it is not a string."""
+
+    if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+        return value
+    if value is None:
+        if not allow_none:
+            errors.add(path, "Field may not be null.")
+        return None
+    errors.add(path, "Not a valid string.")
+    return None
+
+def _datetime(value: Any, path: tuple[str, ...], errors: _Errors) -> datetime.datetime:
+    """Return an ISO 8601 string as a datetime, or add an error if it is not valid."""
+
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        errors.add(path, "Not a valid datetime." if value is not None
+                   else "Field may not be null.")
+        return None
@@ -0,0 +1,241 @@
+"""Scoring."""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any
+from sqlalchemy import delete, insert, update
+from .models import User, Tip, Fixture, Result, ResultRound, Season, LeaderboardEntry
+from .utils import get_outcome
+from . import db
+
+# Counts kept per user and round
+ROUND_STATS = ('tips', 'finished', 'correct', 'tip_1', 'tip_X', 'tip_2')
+
+def calculate_season_results(season: Season) -> list[Result]:
+    """Calculate the results for all users in a given season in one pass over the season's tips and
+    write the tip statuses and results to the database in bulk. Return the list of results."""
+
+    last_update = datetime.now()
+    users = [user for user in User.all() if user.username != 'admin']
+    existing_results = {result.user_id: result for result in Result.by_season_id(season.id)}
+    round_stats = {user.id: defaultdict(_empty_round) for user in users}
+    results = {}
+    for user in users:
+        result = existing_results.get(user.id)
+        if result is None:
+            result = Result(user_id=user.id, season_id=season.id, last_update=last_update)
+            db.session.add(result)
+        result.total = result.finished = result.correct = result.incorrect = 0
+        result.tip_1 = result.tip_X = result.tip_2 = 0
+        results[user.id] = result
+
+    tip_updates = []
+    for row in Tip.with_fixtures_by_season(season.id):
+        result = results.get(row.user_id)
+        if result is None:
+            continue
+
+        # Calculate tip results
+        correct = 0
+        result.total += 1
+        if row.status == 'FT':
+            result.finished += 1
+            correct = 1 if get_outcome(row.home_score, row.away_score) == row.tip else -1
+            if correct == 1:
+                result.correct += 1
+            else:
+                result.incorrect += 1
+
+            if row.tip == '1':
+                result.tip_1 += 1
+            elif row.tip == 'X':
+                result.tip_X += 1
+            elif row.tip == '2':
+                result.tip_2 += 1
+
+        if correct != row.correct:
+            tip_updates.append({'id': row.id, 'correct': correct})
+
+        # Calculate round stats
+        stats = round_stats[row.user_id][row.round]
+        stats["tips"] += 1
+        if correct != 0:
+            stats["finished"] += 1
+            if row.tip in ('1', 'X', '2'):
+                stats[f"tip_{row.tip}"] += 1
+        if correct == 1:
+            stats["correct"] += 1
+
+    if tip_updates:
+        db.session.execute(update(Tip), tip_updates)
+    Fixture.mark_scored(season.id)
+
+    for result in results.values():
+        result.last_update = last_update
+    _write_rounds(results, round_stats, ResultRound.rows_by_season_id(season.id))
+
+    return list(results.values())
+
+def update_season_results(season: Season) -> list[Result]:
+    """Update the results for all users in a given season from the fixtures whose tips need to be
+    scored, i.e. fixtures that have finished, had their score or round changed, or had tips added
+    or changed since they were last scored. Only the tips in those fixtures are rescored, and only
+    their rounds are recounted. The results are then updated by the difference between the new
+    and the stored round stats. Fall back to a full calculation if a user is missing a result.
+    Return the list of updated results."""
+
+    users = [user for user in User.all() if user.username != 'admin']
+    results = {result.user_id: result for result in Result.by_season_id(season.id)}
+    if any(user.id not in results for user in users):
+        return calculate_season_results(season)
+
+    fixtures = Fixture.unscored_by_season_id(season.id)
+    if not fixtures:
+        return []
+    fixture_ids = [row.fixture_id for row in fixtures]
+    # A fixture that moved round also changes the round it was counted in
+    rounds = ({row.round for row in fixtures}
+              | {row.scored_round for row in fixtures if row.scored_round is not None})
+
+    tip_updates = []
+    for row in Tip.with_fixtures_by_season(season.id, fixture_ids):
+        correct = 0
+        if row.status == 'FT':
+            correct = 1 if get_outcome(row.home_score, row.away_score) == row.tip else -1
+        if correct != row.correct:
+            tip_updates.append({'id': row.id, 'correct': correct})
+
+    if tip_updates:
+        db.session.execute(update(Tip), tip_updates)
+    Fixture.mark_scored(season.id, fixture_ids)
+
+    round_stats = {user.id: {} for user in users}
+    for row in Tip.stats_by_round(season.id, list(rounds)):
+        if row.user_id in round_stats:
+            round_stats[row.user_id][row.round] = {key: getattr(row, key) for key in ROUND_STATS}
+    existing = [row for row in ResultRound.rows_by_season_id(season.id, list(rounds))
+                if row.user_id in round_stats]
+
+    # Difference between the new and the stored round stats of each user
+    changes = {user_id: dict.fromkeys(ROUND_STATS, 0) for user_id in round_stats}
+    for user_id, user_rounds in round_stats.items():
+        for stats in user_rounds.values():
+            for key in ROUND_STATS:
+                changes[user_id][key] += stats[key]
+    for row in existing:
+        for key in ROUND_STATS:
+            changes[row.user_id][key] -= getattr(row, key)
+
+    last_update = datetime.now()
+    changed_results = []
+    for user_id, change in changes.items():
+        if not any(change.values()):
+            continue
+        result = results[user_id]
+        result.total += change['tips']
+        result.finished += change['finished']
+        result.correct += change['correct']
+        result.incorrect += change['finished'] - change['correct']
+        result.tip_1 += change['tip_1']
+        result.tip_X += change['tip_X']
+        result.tip_2 += change['tip_2']
+        result.last_update = last_update
+        changed_results.append(result)
+    _write_rounds(results, round_stats, existing)
+
+    return changed_results
+
+def update_leaderboard(season: Season) -> int:
+    """Update the leaderboard of a season for the whole season and each round from the status of
+    its tips. Ranks are recalculated in memory, and only entries whose points or rank have changed
+    are written. Return the number of written entries."""
+
+    user_ids = [user.id for user in User.all() if user.username != 'admin']
+    # Points and finished tips by user for each round, and for the whole season as round 0
+    stats = defaultdict(dict)
+    stats[0] = {user_id: (0, 0) for user_id in user_ids}
+    for row in ResultRound.rows_by_season_id(season.id):
+        if row.user_id not in stats[0]:
+            continue
+        stats[row.round][row.user_id] = (row.correct, row.finished)
+        points, finished = stats[0][row.user_id]
+        stats[0][row.user_id] = (points + row.correct, finished + row.finished)
+
+    existing = {(row.round, row.user_id): row
+                for row in LeaderboardEntry.rows_by_season_id(season.id)}
+    last_update = datetime.now()
+    inserts = []
+    updates = []
+    for round_number, round_stats in stats.items():
+        for user_id, rank in _rank(round_stats).items():
+            points, finished = round_stats[user_id]
+            values = {
+                'points': points,
+                'finished': finished,
+                'accuracy': points / finished if finished else 0,
+                'rank': rank,
+                'last_update': last_update
+            }
+            row = existing.pop((round_number, user_id), None)
+            if row is None:
+                inserts.append({'season_id': season.id, 'round': round_number,
+                                'user_id': user_id, **values})
+            elif row.points != points or row.finished != finished or row.rank != rank:
+                if row.rank != rank:
+                    values['previous_rank'] = row.rank
+                updates.append({'id': row.id, **values})
+
+    if inserts:
+        db.session.execute(insert(LeaderboardEntry), inserts)
+    if updates:
+        db.session.execute(update(LeaderboardEntry), updates)
+    # Entries of users or rounds that no longer have tips
+    if existing:
+        db.session.execute(delete(LeaderboardEntry)
+                           .where(LeaderboardEntry.id.in_([row.id for row in existing.values()])))
+
+    return len(inserts) + len(updates) + len(existing)
+
+def _write_rounds(results: dict[str, Result], round_stats: dict[str, dict[int, dict[str, int]]],
+                  existing: list[Any]) -> None:
+    """Write the round stats of the given users' results in bulk given the existing rounds they
+    replace. Only rounds that are new or changed are written, and existing rounds that are
+    missing from the round stats are deleted."""
+
+    # New results need their IDs
+    db.session.flush()
+    existing = {(row.user_id, row.round): row for row in existing if row.user_id in round_stats}
+    inserts = []
+    updates = []
+    for user_id, rounds in round_stats.items():
+        for round_number, stats in rounds.items():
+            row = existing.pop((user_id, round_number), None)
+            if row is None:
+                inserts.append({'result_id': results[user_id].id, 'round': round_number, **stats})
+            elif any(getattr(row, key) != stats[key] for key in ROUND_STATS):
+                updates.append({'id': row.id, **stats})
+
+    if inserts:
+        db.session.execute(insert(ResultRound), inserts)
+    if updates:
+        db.session.execute(update(ResultRound), updates)
+    if existing:
+        db.session.execute(delete(ResultRound)
+                           .where(ResultRound.id.in_([row.id for row in existing.values()])))
+
+def _empty_round() -> dict[str, int]:
+    return dict.fromkeys(ROUND_STATS, 0)
+
+def _rank(stats: dict[str, tuple[int, int]]) -> dict[str, int]:
+    """Return the rank by points of each user. Users with the same points share the rank and the
+    next rank is skipped, e.g. 1, 2, 2, 4."""
+
+    ranks = {}
+    previous_points = None
+    ordered = sorted(stats.items(), key=lambda item: item[1][0], reverse=True)
+    for position, (user_id, (points, _finished)) in enumerate(ordered, start=1):
+        if points != previous_points:
+            rank = position
+            previous_points = points
+        ranks[user_id] = rank
+    return ranks
@@ -1,9 +1,36 @@
 function triggerAdminAction(endpoint) {
   fetch(endpoint, {
     method: 'POST',
-  }).then((_res) => {
-    window.location.href = '/admin';
-  });
+  })
+    .then((res) => res.json())
+    .then((data) => {
+      if (data.job_id) {
+        pollJob(data.job_id);
+      } else {
+        window.location.href = '/admin';
+      }
+    });
+}
+
+function fetchEndpoint(endpoint) {
+  const force = document.getElementById('force-refresh-checkbox').checked;
+  return force ? `${endpoint}?force=1` : endpoint;
+}
+
+function pollJob(jobId) {
+  const status = document.getElementById('job-status');
+  status.hidden = false;
+  fetch(`/admin/jobs/${jobId}`)
+    .then((res) => res.json())
+    .then((job) => {
+      const duration = job.duration !== null ? ` (${job.duration.toFixed(1)} s)` : '';
+      status.innerText = `Job ${job.id} ${job.kind}: ${job.status} ${job.progress}%${duration}`;
+      if (job.status === 'finished' || job.status === 'failed') {
+        window.location.href = '/admin';
+      } else {
+        setTimeout(() => pollJob(jobId), 1000);
+      }
+    });
 }
 
 function addSeason() {
@@ -2,6 +2,7 @@ window.onload = function () {
   var id = document.getElementById('next-fixture-id').innerText.trim();
 
   var fixture = document.getElementById(id);
+  if (!fixture) return;
   fixture.scrollIntoView({
     alignToTop: true,
     block: 'center',
@@ -58,16 +58,12 @@ for (const carousel of carousels) {
 
   const roundsCtx = document.getElementById(`${userId}-round-stats`);
   const roundStats = JSON.parse(roundsCtx.dataset.stats);
-  const roundScores = [];
-  const roundGuesses = [];
-  for (let i = 1; i <= 38; i++) {
-    const round = String(i);
-    if (roundStats[round]) {
-      roundScores.push(roundStats[round].correct);
-      roundGuesses.push(roundStats[round].tips);
-    } else {
-      roundScores.push(0);
-      roundGuesses.push(0);
+  const roundScores = Array(38).fill(0);
+  const roundGuesses = Array(38).fill(0);
+  for (const stats of roundStats) {
+    if (stats.round >= 1 && stats.round <= 38) {
+      roundScores[stats.round - 1] = stats.correct;
+      roundGuesses[stats.round - 1] = stats.tips;
     }
   }
 
@@ -0,0 +1,94 @@
+"""Sync."""
+
+import datetime
+
+from typing import Callable
+from .apicache import ApiPayload
+from .cache import kickoff_indexes
+from .models import General, Fixture, Team, Season, DataVersion
+from .parsers import parse_fixtures, parse_standings
+from .scoring import calculate_season_results, update_season_results, update_leaderboard
+from .utils import api_cache, cached_api_call
+from . import db
+
+def sync_fixtures(season: Season, progress: Callable[[int], None], force: bool = False) -> str:
+    """Fetch fixture data from the API and update the database. Report progress in percent to the
+    progress callback and return a status message. The payload is served from the API cache and
+    skipped if it hasn't changed since the last sync, unless force is True."""
+
+    payload = __fetch('fixtures', season, force)
+    progress(40)
+    if not force and api_cache.is_processed(payload):
+        return "Unchanged since last sync."
+
+    fixtures = parse_fixtures(payload.data['response'], season.id)
+    progress(60)
+
+    counts = Fixture.bulk_create_or_update(fixtures)
+    if counts['inserted'] or counts['updated']:
+        DataVersion.bump(season.id, 'fixtures')
+    db.session.commit()
+    api_cache.mark_processed(payload)
+    if counts['rescheduled']:
+        kickoff_indexes.invalidate(season.id)
+
+    return (f"{counts['inserted']} added, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged.")
+
+def sync_standings(season: Season, progress: Callable[[int], None], force: bool = False) -> str:
+    """Fetch standings data from the API and update the database. The payload is served from the
+    API cache and skipped if it hasn't changed since the last sync, unless force is True."""
+
+    payload = __fetch('standings', season, force)
+    progress(40)
+    if not force and api_cache.is_processed(payload):
+        return "Unchanged since last sync."
+
+    teams_and_standings = parse_standings(
+        payload.data['response'][0]['league']['standings'][0], season.id)
+    progress(60)
+
+    Team.bulk_create_or_update_rows(teams_and_standings)
+    DataVersion.bump(season.id, 'standings')
+    db.session.commit()
+    api_cache.mark_processed(payload)
+
+    return f"{len(teams_and_standings)} teams updated."
+
+def calculate_results(season: Season, progress: Callable[[int], None], full: bool = False) -> str:
+    """Calculate the results for all users in a season and update the database. Only tips in
+    fixtures that have changed since the last calculation are applied unless full is True."""
+
+    # Tips of finished fixtures can only change when late modification is allowed, which requires
+    # a full calculation
+    general = General.get()
+    if full or (general is not None and general.allow_late_modification):
+        results = calculate_season_results(season)
+    else:
+        results = update_season_results(season)
+    progress(70)
+    entries = update_leaderboard(season)
+    progress(90)
+    DataVersion.bump(season.id, 'results')
+    db.session.commit()
+
+    return f"{len(results)} results and {entries} leaderboard entries updated."
+
+def parse_headers(headers: dict) -> None:
+    """Update the General table with info from the API response headers."""
+
+    data = {
+        'last_update': datetime.datetime.now(),
+        'remaining_requests':  headers['x-ratelimit-requests-remaining']
+    }
+    General.update(**data)
+    db.session.commit()
+
+def __fetch(endpoint: str, season: Season, force: bool) -> ApiPayload:
+    """Return the payload for an endpoint through the API cache. Update the General table if the
+    payload was fetched from the API."""
+
+    payload = cached_api_call(endpoint, season, force)
+    if not payload.from_cache:
+        parse_headers(payload.headers)
+    return payload
@@ -1,61 +1,215 @@
 """Utils."""
 
 import json
-import requests
 
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from datetime import date, datetime, timedelta
-from typing import Any
+from datetime import date, datetime, time, timedelta
+from typing import Any, Iterator, NamedTuple
+from flask import get_template_attribute
 from keys import API_KEY
-from .models import Fixture, User, Result, Tip, Season
-from . import LEAGUE_ID
+from markupsafe import Markup
+from .apicache import ApiCache, ApiPayload
+from .apisports import ApiClient
+from .cache import fragments, kickoff_indexes
+from .models import (Fixture, User, Result, ResultRound, Tip, Season, SeasonInfo, TeamStanding,
+                     DataVersion)
+from . import LEAGUE_ID, API_URL, API_CACHE_DIR, API_CACHE_TTL, TIP_OPEN_STATUSES
 
-URL = 'https://v3.football.api-sports.io/'
 # Dump API response data to console for debugging
 DUMP_DATA = False
 
-def get_week_dates() -> tuple[str, str]:
-    """Return the start and end dates in string format for the current week."""
+api_client: ApiClient = ApiClient(API_URL, API_KEY)
+api_cache: ApiCache = ApiCache(API_CACHE_DIR, API_CACHE_TTL)
+
+def get_week_dates() -> tuple[datetime, datetime]:
+    """Return the first and last moment of the current week."""
 
     today = date.today()
     start = today - timedelta(days=today.weekday())
     end = start + timedelta(days=6)
-    return str(start), str(end)
+    return datetime.combine(start, time.min), datetime.combine(end, time.max)
 
-def calculate_next_fixture(fixtures: list[Fixture], selected_date: datetime) -> Fixture:
-    """Return the next upcoming fixture given a datetime object. If a fixture can't be found,
-    return None."""
+class Kickoff(NamedTuple):
+    """Kickoff time of a fixture."""
 
-    dates = [fixture.date_time for fixture in fixtures]
-    if not dates:
-        return None
+    date_time: datetime
+    fixture_id: int
+    round: int
+    status: str
+
+class KickoffIndex:
+    """Fixtures in a season sorted by kickoff time to look up fixtures by date with bisection.
+    Fixtures without a kickoff time are left out."""
+
+    def __init__(self, kickoffs: list[Kickoff]):
+        self.kickoffs: list[Kickoff] = sorted(kickoff for kickoff in kickoffs
+                                              if kickoff.date_time is not None)
+        self.dates: list[datetime] = [kickoff.date_time for kickoff in self.kickoffs]
+        # Fixtures that can still be tipped, so started and postponed fixtures are never scanned
+        self.open_kickoffs: list[Kickoff] = [kickoff for kickoff in self.kickoffs
+                                             if kickoff.status in TIP_OPEN_STATUSES]
+        self.open_dates: list[datetime] = [kickoff.date_time for kickoff in self.open_kickoffs]
+
+    def next_upcoming(self, selected_date: datetime) -> Kickoff:
+        """Return the first fixture that can still be tipped with a kickoff at or after a given
+        datetime. If no such fixture exists, return None."""
+
+        index = bisect_left(self.open_dates, selected_date)
+        return self.open_kickoffs[index] if index < len(self.open_kickoffs) else None
+
+    def last(self) -> Kickoff:
+        """Return the last fixture in the season, or None if the season has no fixtures."""
+
+        return self.kickoffs[-1] if self.kickoffs else None
+
+    def current_round(self, selected_date: datetime) -> int:
+        """Return the round of the next upcoming fixture at a given datetime, or the last round if
+        all fixtures have started. Return None if the season has no fixtures."""
+
+        kickoff = self.next_upcoming(selected_date) or self.last()
+        return kickoff.round if kickoff else None
+
+    def in_window(self, start_date: datetime, end_date: datetime) -> list[Kickoff]:
+        """Return the fixtures with a kickoff between two datetimes, inclusive."""
+
+        return self.kickoffs[bisect_left(self.dates, start_date):
+                             bisect_right(self.dates, end_date)]
+
+def get_kickoff_index(season: Season) -> KickoffIndex:
+    """Return the kickoff index for a given season. The index is cached until a fixture sync
+    changes the fixture dates."""
+
+    return kickoff_indexes.get(season.id, lambda: KickoffIndex(
+        [Kickoff(*row) for row in Fixture.kickoffs_by_season(season.id)]))
+
+def get_next_fixture(season: Season) -> Kickoff:
+    """Return the next upcoming fixture in a given season, or the last fixture if all fixtures have
+    started."""
+
+    index = get_kickoff_index(season)
+    return index.next_upcoming(datetime.now()) or index.last()
+
+def get_tips_by_fixture(season: Season, user: User) -> tuple[dict[int, list[tuple[str, str]]],
+                                                               set[int]]:
+    """Return a tuple containing an index from fixture ID to the list of (username, tip) pairs
+    made for that fixture in a given season, and the set of fixture IDs the given user has
+    tipped."""
+
+    tips_by_fixture = defaultdict(list)
+    tip_ids = set()
+    for row in Tip.with_usernames_by_season(season.id):
+        tips_by_fixture[row.fixture_id].append((row.username, row.tip))
+        if row.user_id == user.id:
+            tip_ids.add(row.fixture_id)
+
+    return dict(tips_by_fixture), tip_ids
+
+class FixtureFragment(NamedTuple):
+    """Rendered part of a fixture card that is the same for every user, and the fixture columns
+    the per-user part of the card needs."""
 
-    nearest = min(dates, key=lambda x: abs(x - selected_date))
-    for fixture in fixtures:
-        if nearest == fixture.date_time:
-            return fixture
+    fixture_id: int
+    round: int
+    status: str
+    html: Markup
 
-    return None
+def get_fixture_fragments(season: SeasonInfo, macro: str, user: User) -> list[FixtureFragment]:
+    """Return the fixture cards of a given season rendered by a macro in fragments/fixtures.html.
+    The cards are cached until a fixture or standings sync changes the season's data. Admins see
+    the fixture IDs, so they get their own cards."""
+
+    versions = DataVersion.by_season_id(season.id)
+    key = ('fixtures', macro, season.id, user.is_admin,
+           *(versions[kind].version if kind in versions else 0
+             for kind in ('fixtures', 'standings')))
+
+    def render() -> list[FixtureFragment]:
+        card = get_template_attribute('fragments/fixtures.html', macro)
+        return [FixtureFragment(fixture.fixture_id, fixture.round, fixture.status,
+                                card(fixture, user.is_admin))
+                for fixture in Fixture.by_season(season.season)]
+
+    return fragments.get(key, render,
+                         size=lambda cards: sum(len(fragment.html) for fragment in cards))
+
+def get_standings_fragment(season: str) -> Markup:
+    """Return the standings table of a given season. The table is cached until a standings sync
+    changes the season's data."""
+
+    info = Season.get_season_info(season)
+    table = get_template_attribute('fragments/standings.html', 'standings_table')
+    if info is None:
+        return table(TeamStanding.by_season(season))
+
+    versions = DataVersion.by_season_id(info.id)
+    key = ('standings', info.id, versions['standings'].version if 'standings' in versions else 0)
+    return fragments.get(key, lambda: table(TeamStanding.by_season(season)))
+
+def get_user_stats(season: str) -> list[dict[str, Any]]:
+    """Return a list with the statistics of every non-admin user with a result in a given season.
+    Each item is a dictionary containing the 'user', its 'result', the list of 'round_stats' with
+    the 'round', 'tips' and 'correct' tips of each round, the 'best_round' row or None, and the
+    list of (fixture, tip) pairs for the user's 'upcoming' fixtures."""
+
+    upcoming = defaultdict(list)
+    for tip, fixture in Tip.upcoming_by_season(season):
+        upcoming[tip.user_id].append((fixture, tip))
+
+    round_stats = defaultdict(list)
+    for row in ResultRound.rows_by_season(season):
+        round_stats[row.user_id].append({'round': row.round, 'tips': row.tips,
+                                         'correct': row.correct})
+    best_rounds = {row.user_id: row for row in ResultRound.best_by_season(season)}
+
+    user_stats = []
+    for user, result in Result.with_users_by_season(season):
+        user_stats.append({
+            'user': user,
+            'result': result,
+            'round_stats': round_stats[user.id],
+            'best_round': best_rounds.get(user.id),
+            'upcoming': upcoming[user.id]
+        })
+
+    return user_stats
 
 def api_call(endpoint: str, season: Season) -> tuple[dict, Any]:
     """Fetch data from the API and return a tuple containing the response headers and data as
     json objects."""
 
-    url = f"{URL}/{endpoint}?season={season.season}&league={LEAGUE_ID}"
+    headers, data = api_client.get(endpoint, __api_params(endpoint, season))
+    if DUMP_DATA:
+        print(json.dumps(data, indent=4))
+    return headers, data
 
-    if endpoint == 'fixtures':
-        url += '&timezone=Europe/Stockholm'
+def stream_api_call(endpoint: str, season: Season) -> tuple[dict, Iterator[Any]]:
+    """Fetch data from the API and return a tuple containing the response headers and an iterator
+    over the items of the response list, which are decoded as they are read."""
 
-    headers = {
-        'x-rapidapi-key': API_KEY,
-        'x-rapidapi-host': URL
-    }
+    return api_client.stream(endpoint, __api_params(endpoint, season))
 
-    response = requests.request('GET', url, headers=headers)
-    if DUMP_DATA:
-        print(json.dumps(response.json(), indent=4))
-    return dict(response.headers), response.json()
+def cached_api_call(endpoint: str, season: Season, force: bool = False) -> ApiPayload:
+    """Return the payload for an endpoint from the on-disk cache if it is still fresh, else fetch it
+    from the API and store it in the cache. If force is True, always fetch from the API."""
+
+    params = __api_params(endpoint, season)
+    key = api_cache.key(endpoint, params)
+    if not force:
+        payload = api_cache.lookup(endpoint, key)
+        if payload is not None:
+            return payload
 
+    headers, data = api_call(endpoint, season)
+    return api_cache.store(key, headers, data)
+
+def __api_params(endpoint: str, season: Season) -> dict[str, Any]:
+    """Return the query parameters for an endpoint in a given season."""
+
+    params = {'season': season.season, 'league': LEAGUE_ID}
+    if endpoint == 'fixtures':
+        params['timezone'] = 'Europe/Stockholm'
+    return params
 
 def calculate_user_result(user: User, season: Season) -> Result:
     """Calculate the result for a user in a given season. Return a Result object."""
@@ -64,7 +218,7 @@ def calculate_user_result(user: User, season: Season) -> Result:
     if user is None:
         return None
 
-    round_stats = defaultdict(lambda: {"tips": 0, "correct": 0})
+    round_stats = defaultdict(lambda: {"tips": 0, "finished": 0, "correct": 0})
     result = Result(user_id=user.id,
                     season_id=season.id,
                     total=0,
@@ -102,17 +256,27 @@ def calculate_user_result(user: User, season: Season) -> Result:
         # Calculate round stats
         stats = round_stats[fixture.round]
         stats["tips"] += 1
+        if tip.correct != 0:
+            stats["finished"] += 1
         if tip.correct == 1:
             stats["correct"] += 1
-        result.round_stats = json.dumps(round_stats)
 
+    result.rounds = [ResultRound(round=round_number, **stats)
+                     for round_number, stats in sorted(round_stats.items())]
     result.last_update = datetime.now()
     return result
 
 def is_correct(fixture: Fixture, tip: Tip) -> bool:
     """Return True if the tip is correct, False otherwise."""
 
-    score = fixture.home_score - fixture.away_score
-    return (score > 0 and tip.tip == '1') or \
-           (score < 0 and tip.tip == '2') or \
-           (score == 0 and tip.tip == 'X')
+    return get_outcome(fixture.home_score, fixture.away_score) == tip.tip
+
+def get_outcome(home_score: int, away_score: int) -> str:
+    """Return the outcome of a fixture given its score as '1', 'X' or '2'."""
+
+    score = home_score - away_score
+    if score > 0:
+        return '1'
+    if score < 0:
+        return '2'
+    return 'X'
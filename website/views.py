@@ -2,12 +2,13 @@
 
 import json
 
-from datetime import datetime
-from flask import Blueprint, Response, flash, render_template, jsonify, request
+from flask import Blueprint, Response, abort, flash, render_template, jsonify, request
 from flask_login import login_required, current_user
-from .models import User, Tip, Fixture, Team, TeamStanding, Result, General, Season
-from .utils import get_week_dates, calculate_next_fixture
-from . import db
+from .conditional import conditional
+from .models import User, Tip, Fixture, Team, Season, LeaderboardEntry, DataVersion
+from .utils import (get_week_dates, get_kickoff_index, get_next_fixture, get_tips_by_fixture,
+                    get_user_stats, get_fixture_fragments, get_standings_fragment)
+from . import db, LEADERBOARD_TOP, LEADERBOARD_AROUND, LEADERBOARD_MAX, PAGE_MAX_AGE
 
 views = Blueprint('views', __name__)
 current_user: User
@@ -18,7 +19,8 @@ def endpoint_home() -> str:
 
     season_data = Season.get_season_data()
     start, end = get_week_dates()
-    fixtures = Fixture.by_dates(season_data['active_season'].season, start, end)
+    kickoffs = get_kickoff_index(season_data['active_season']).in_window(start, end)
+    fixtures = Fixture.by_ids([kickoff.fixture_id for kickoff in kickoffs]) if kickoffs else []
     kwargs = {
         'season_data': season_data,
         'user': current_user,
@@ -35,37 +37,40 @@ def endpoint_tip(response: str) -> str:
         flash("Tippning regristrerad")
 
     season_data = Season.get_season_data()
-    fixtures = Fixture.by_season(season_data['active_season'].season)
-    general = General.get()
-    allow_late_modification = general.allow_late_modification if general else False
+    season = season_data['active_season']
     kwargs = {
         'season_data': season_data,
         'user': current_user,
-        'fixtures': fixtures,
-        'next_fixture': calculate_next_fixture(fixtures, datetime.now()),
-        'allow_late_modification': allow_late_modification
+        'fixture_fragments': get_fixture_fragments(season, 'tip_card', current_user),
+        'tips': Tip.values_by_season_id(current_user, season.id),
+        'next_fixture': get_next_fixture(season),
+        'allow_late_modification': season_data['allow_late_modification']
     }
     return render_template('tip.html', **kwargs)
 
 @views.route('/fixtures')
 @login_required
+@conditional('fixtures', 'tips', max_age=PAGE_MAX_AGE['fixtures'],
+             key=lambda season: getattr(get_next_fixture(season), 'fixture_id', None))
 def endpoint_fixtures() -> str:
     """Page to dislay all fixtures for the current season and view other user's tips."""
 
     season_data = Season.get_season_data()
-    fixtures = Fixture.by_season(season_data['active_season'].season)
+    season = season_data['active_season']
+    tips_by_fixture, tip_ids = get_tips_by_fixture(season, current_user)
     kwargs = {
         'season_data': season_data,
         'user': current_user,
-        'all_users': User.all(),
-        'fixtures': fixtures,
-        'next_fixture': calculate_next_fixture(fixtures, datetime.now()),
-        'tip_ids': [tip.fixture_id for tip in current_user.tips]
+        'fixture_fragments': get_fixture_fragments(season, 'fixture_card', current_user),
+        'next_fixture': get_next_fixture(season),
+        'tips_by_fixture': tips_by_fixture,
+        'tip_ids': tip_ids
     }
     return render_template('fixtures.html', **kwargs)
 
 @views.route('/standings/<season>')
 @login_required
+@conditional('standings', max_age=PAGE_MAX_AGE['standings'])
 def endpoint_standings(season: str) -> str:
     """Page to display all teams in a given season ordered by their rank."""
 
@@ -73,30 +78,47 @@ def endpoint_standings(season: str) -> str:
         'season_data': Season.get_season_data(),
         'selected_season': season,
         'user': current_user,
-        'team_standings': TeamStanding.by_season(season)
+        'standings_html': get_standings_fragment(season)
     }
     return render_template('standings.html', **kwargs)
 
 @views.route('/stats/<season>')
 @login_required
+@conditional('results', 'tips', max_age=PAGE_MAX_AGE['stats'])
 def endpoint_stats(season: str) -> str:
     """Page to display statistics for all users."""
 
-    fixtures = (db.session.query(Fixture)
-                          .join(Fixture.season)
-                          .filter(Season.season == season)
-                          .filter(Fixture.status == 'NS')
-                          .all())
     kwargs = {
         'season_data': Season.get_season_data(),
         'selected_season': season,
         'user': current_user,
-        'all_users': User.all(),
-        'fixtures': fixtures,
-        'results': Result.by_season(season)
+        'user_stats': get_user_stats(season)
     }
     return render_template('stats.html', **kwargs)
 
+@views.route('/leaderboard/<season>')
+@login_required
+def endpoint_leaderboard(season: str) -> Response:
+    """Endpoint for the top of the leaderboard in a season and the entries around the current
+    user. The round is given by the 'round' argument, or 0 for the whole season."""
+
+    selected_season = Season.by_season(season)
+    if selected_season is None:
+        abort(404)
+
+    round_number = request.args.get('round', 0, type=int)
+    limit = max(0, min(request.args.get('limit', LEADERBOARD_TOP, type=int), LEADERBOARD_MAX))
+    size = max(0, min(request.args.get('around', LEADERBOARD_AROUND, type=int), LEADERBOARD_MAX))
+    top = LeaderboardEntry.top(selected_season.id, round_number, limit)
+    around = LeaderboardEntry.around(selected_season.id, round_number, current_user.id, size)
+
+    return jsonify({
+        'season': selected_season.season,
+        'round': round_number,
+        'top': [entry.to_dict() for entry in top],
+        'around_me': [entry.to_dict() for entry in around]
+    })
+
 @views.route('/tips', methods=['GET', 'POST'])
 @login_required
 def endpoint_tips() -> str:
@@ -132,15 +154,28 @@ def endpoint_team_ranker() -> str:
     return render_template('teamranker.html', **kwargs)
 
 @views.route('/register-tips', methods=['POST'])
+@login_required
 def endpoint_register_tips() -> Response:
-    """Endpoint for registering a new tip for the current user."""
-
-    tips = json.loads(request.data)
+    """Endpoint for registering new tips for the current user. Return the outcome per fixture
+    ID, or 400 if the request isn't a list of tips with valid fixture IDs."""
 
-    for tip in tips:
-        fixture_id = int(str(tip['fixtureId']).strip())
-        value = str(tip['value']).strip()
-        Tip.create_or_update(current_user, fixture_id, value)
+    season_data = Season.get_season_data()
+    tips = {}
+    try:
+        for tip in json.loads(request.data):
+            # Later tips for the same fixture replace earlier ones. Missing values are invalid.
+            tips[int(str(tip['fixtureId']).strip())] = str(tip.get('value', '')).strip()
+    except (ValueError, TypeError, KeyError, AttributeError):
+        abort(400)
+
+    results = Tip.bulk_create_or_update(current_user, tips,
+                                        season_data['allow_late_modification'])
+    if 'accepted' in results.values():
+        DataVersion.bump(None, 'tips')
     db.session.commit()
 
-    return jsonify({})
+    rejected = sum(result != 'accepted' for result in results.values())
+    if rejected:
+        flash(f"{rejected} tips kunde inte registreras", category='error')
+
+    return jsonify({'results': results})